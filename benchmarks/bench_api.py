@@ -0,0 +1,305 @@
+"""
+Offline benchmark of the API layer
+
+Every workload runs against responses served by ReplayHttp, no quota is
+used. Responses of a synthetic YouTube API are recorded once per scale
+into a SQLite file, then replayed with the given latency, so the numbers
+measure the scraper itself: paging, batching, concurrency, parsing and
+DataFrame building.
+
+Workloads at 1k, 10k and 100k items:
+    get_videos_id          playlist pages of 50 videos
+    extract_videos_data    videos lookups of 50 ids and the videos DataFrame
+    search_by_keyword      search pages of 50 results
+    request_channels_data  channels lookups of 50 ids
+    comments               comment threads pages, missing replies and the threads/replies tables
+
+Run:
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --scales 1000 10000 --latency 0.05 --workers 16
+    python benchmarks/bench_api.py --save baseline.json
+    python benchmarks/bench_api.py --baseline baseline.json  # Exits with 1 on a throughput regression
+
+The regression check against benchmarks/baseline.json runs with the
+tests, see tests/test_bench.py
+"""
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import contextlib
+
+from urllib.parse import urlsplit, parse_qs
+
+import httplib2
+
+from yt_scrapper.yt_scrapper import YouTube
+from yt_scrapper.common import channel, comment, playlist, search, video
+from yt_scrapper.common.quota import QuotaScheduler
+from yt_scrapper.common.replay import ReplayHttp
+
+
+SCALES = (1000, 10000, 100000)
+PAGE_SIZE = 50
+PLAYLIST_ID = 'UUbenchmarkbenchmarkbenchmark0'
+CHANNEL_ID = 'UCbenchmarkbenchmarkbenchm'
+QUERY = 'benchmark'
+INLINE_REPLIES = 5  # Replies included in a comment thread, the rest are paged with comments().list()
+
+
+def video_id(i: int) -> str:
+    return f'v{i:010d}'
+
+
+def channel_id(i: int) -> str:
+    return f'UC{i:022d}'
+
+
+class SyntheticYouTube:
+    """
+    Upstream transport answering YouTube API requests with deterministic
+    data of scale items, recorded by ReplayHttp in place of the real API.
+    Responses carry an ETag, a request with a matching If-None-Match is
+    answered with 304 Not Modified
+    """
+
+    def __init__(self, scale: int):
+        self.scale = scale
+        self.threads = max(scale // 4, 1)  # ~scale comments with the replies
+
+    @staticmethod
+    def _page(params: dict, total: int, size: int) -> tuple:
+        start = int(params.get('pageToken') or 0)
+        stop = min(start + size, total)
+        return range(start, stop), (str(stop) if stop < total else '')
+
+    def _playlist_items(self, params: dict) -> dict:
+        indexes, next_page = self._page(params, self.scale, int(params.get('maxResults', PAGE_SIZE)))
+        items = [{'snippet': {'resourceId': {'videoId': video_id(i)}},
+                  'contentDetails': {'videoId': video_id(i), 'videoPublishedAt': '2022-01-02T00:00:00Z'}}
+                 for i in indexes]
+        return {'items': items, 'nextPageToken': next_page}
+
+    @staticmethod
+    def _videos(params: dict) -> dict:
+        items = [{
+            'id': item_id,
+            'snippet': {'title': f'Video {item_id}', 'publishedAt': '2022-01-02T03:04:05Z',
+                        'channelId': channel_id(int(item_id[1:]) % 1000)},
+            'statistics': {'viewCount': str(int(item_id[1:]) * 7), 'likeCount': '12', 'commentCount': '3'},
+            'contentDetails': {'duration': f'PT{int(item_id[1:]) % 3}H{int(item_id[1:]) % 60}M7S'},
+        } for item_id in params['id'].split(',')]
+        return {'items': items}
+
+    @staticmethod
+    def _channels(params: dict) -> dict:
+        items = [{
+            'id': item_id,
+            'snippet': {'title': f'Channel {item_id}', 'publishedAt': '2015-06-07T08:09:10Z',
+                        'country': 'US', 'customUrl': f'@{item_id.lower()}',
+                        'description': f'Videos about {QUERY}'},
+            'statistics': {'viewCount': '1000', 'subscriberCount': str(int(item_id[2:]) * 3),
+                           'videoCount': '42', 'hiddenSubscriberCount': False},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + item_id[2:]}},
+            'brandingSettings': {'channel': {'keywords': f'"{QUERY}" videos'}},
+        } for item_id in params['id'].split(',')]
+        return {'items': items}
+
+    def _search(self, params: dict) -> dict:
+        indexes, next_page = self._page(params, self.scale, int(params.get('maxResults', PAGE_SIZE)))
+        # Date windows of a sharded search find other results, ids are offset by the window start year
+        offset = int(params['publishedAfter'][:4]) * self.scale if params.get('publishedAfter') else 0
+        if params.get('type') == 'channel':
+            items = [{'id': {'kind': 'youtube#channel', 'channelId': channel_id(offset + i)}} for i in indexes]
+        else:
+            items = [{'id': {'kind': 'youtube#video', 'videoId': video_id(offset + i)}} for i in indexes]
+        return {'items': items, 'nextPageToken': next_page}
+
+    @staticmethod
+    def _comment(comment_id: str, text: str) -> dict:
+        return {'id': comment_id,
+                'snippet': {'textDisplay': text, 'authorDisplayName': 'Author', 'authorChannelUrl': 'http://youtube.com',
+                            'likeCount': 1, 'publishedAt': '2022-01-02T03:04:05Z'}}
+
+    def _comment_threads(self, params: dict) -> dict:
+        indexes, next_page = self._page(params, self.threads, int(params.get('maxResults', 100)))
+        items = []
+        for i in indexes:
+            thread_id = f'thread{i:08d}'
+            replies = [self._comment(f'{thread_id}.r{k}', 'Reply') for k in range(min(i % 8, INLINE_REPLIES))]
+            items.append({'id': thread_id,
+                          'snippet': {'videoId': video_id(i % self.scale), 'totalReplyCount': i % 8,
+                                      'topLevelComment': self._comment(thread_id, 'Comment')},
+                          'replies': {'comments': replies}})
+        return {'items': items, 'nextPageToken': next_page}
+
+    def _comments(self, params: dict) -> dict:
+        thread_id = params['parentId']
+        indexes, next_page = self._page(params, int(thread_id[6:]) % 8, int(params.get('maxResults', 100)))
+        return {'items': [self._comment(f'{thread_id}.r{k}', 'Reply') for k in indexes], 'nextPageToken': next_page}
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        parts = urlsplit(uri)
+        params = {name: ','.join(values) for name, values in parse_qs(parts.query).items()}  # Repeated ids
+        resource = parts.path.rsplit('/', 1)[-1]
+
+        responses = {
+            'playlistItems': self._playlist_items,
+            'videos': self._videos,
+            'channels': self._channels,
+            'search': self._search,
+            'commentThreads': self._comment_threads,
+            'comments': self._comments,
+        }
+        data = responses[resource](params)
+        if not data.get('nextPageToken'):
+            data.pop('nextPageToken', None)
+
+        # Unchanged response of a conditional request is a 304 Not Modified like the real API
+        etag = f'"{hashlib.sha1(json.dumps(data).encode()).hexdigest()[:16]}"'
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        if headers.get('if-none-match') == etag:
+            return httplib2.Response({'status': 304, 'etag': etag}), b''
+
+        data['etag'] = etag
+        return httplib2.Response({'status': 200, 'content-type': 'application/json; charset=UTF-8', 'etag': etag}), \
+            json.dumps(data).encode()
+
+
+def _comments(yt: YouTube, scale: int) -> int:
+    threads = [thread for page in comment.iter_threads(yt.service, allThreadsRelatedToChannelId=CHANNEL_ID)
+               for thread in page]
+    return comment.build_comments_table(yt.service, threads, yt.workers).rows
+
+
+# {workload: callable(yt, scale) returning no. of items produced}
+WORKLOADS = {
+    'get_videos_id': lambda yt, scale: len(playlist.get_videos_id(yt.service, PLAYLIST_ID)),
+    'extract_videos_data': lambda yt, scale: len(video.extract_videos_data(
+        yt.service, [video_id(i) for i in range(scale)], yt.workers, yt.batch_http)),
+    'search_by_keyword': lambda yt, scale: len(search.search_by_keyword(yt.service, QUERY, 'video', scale)),
+    'request_channels_data': lambda yt, scale: len(channel.request_channels_data(
+        yt.service, [channel_id(i) for i in range(scale)], yt.workers, yt.batch_http)),
+    'comments': _comments,
+}
+
+
+def create_youtube(http, workers: int, batch_http: bool) -> YouTube:
+    return YouTube(['benchmark'], workers=workers, batch_http=batch_http, http=http,
+                   scheduler=QuotaScheduler(['benchmark'], budget=10 ** 12))
+
+
+def record(path: str, scale: int, batch_http: bool):
+    """
+    Record responses of every workload at the scale, requests already recorded are skipped
+    """
+    http = ReplayHttp(path, mode='auto', http=SyntheticYouTube(scale))
+    yt = create_youtube(http, 8, batch_http)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for workload in WORKLOADS.values():
+            workload(yt, scale)
+
+    if http.recorded:
+        print(f'Recorded {http.recorded} responses for {scale} items: {path}')
+    http.close()
+
+
+def run(path: str, scale: int, args) -> dict:
+    """
+    Returns:
+        dict: {workload: {'seconds', 'items', 'items_per_sec', 'requests'}} best of args.repeat runs
+    """
+    http = ReplayHttp(path, mode='replay', latency=args.latency, jitter=args.jitter)
+    results = {}
+
+    for name, workload in WORKLOADS.items():
+        best = None
+        for _ in range(args.repeat):
+            yt = create_youtube(http, args.workers, args.batch_http)
+            replayed = http.replayed
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                items = workload(yt, scale)
+            seconds = time.perf_counter() - start
+
+            if best is None or seconds < best['seconds']:
+                best = {'seconds': seconds, 'items': items, 'items_per_sec': items / seconds,
+                        'requests': http.replayed - replayed}
+
+        results[name] = best
+        print(f'{name:<24}{scale:>8}{best["seconds"]:>10.2f} s{best["items_per_sec"]:>14,.0f}/s'
+              f'{best["requests"]:>10} requests')
+
+    http.close()
+    return results
+
+
+def check_regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns:
+        List of messages of workloads slower than the baseline by more than tolerance
+        or sending more requests than the baseline, e.g. a lost batching or page size
+    """
+    regressions = []
+    for scale, workloads in results.items():
+        for name, result in workloads.items():
+            expected = baseline.get(scale, {}).get(name)
+            if not expected:
+                continue
+            if result['items_per_sec'] < expected['items_per_sec'] * (1 - tolerance):
+                regressions.append(f'{name} at {scale} items: {result["items_per_sec"]:,.0f}/s, '
+                                   f'baseline {expected["items_per_sec"]:,.0f}/s')
+            if result['requests'] > expected.get('requests', result['requests']):
+                regressions.append(f'{name} at {scale} items: {result["requests"]} requests, '
+                                   f'baseline {expected["requests"]} requests')
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Offline benchmark of the API layer')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(SCALES), help='No. of items of each run')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds every round trip takes')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Max random seconds added to the latency')
+    parser.add_argument('--workers', type=int, default=8, help='No. of requests in flight at the same time')
+    parser.add_argument('--batch-http', action='store_true', help='Pack lookups into batch http requests')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each workload, the best one is kept')
+    parser.add_argument('--cassettes', default=os.path.join(tempfile.gettempdir(), 'yt_scrapper_bench'),
+                        help='Directory of the recorded responses')
+    parser.add_argument('--save', default='', help='Write results to a JSON file, e.g. a baseline')
+    parser.add_argument('--baseline', default='', help='JSON results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed throughput drop (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.cassettes, exist_ok=True)
+    results = {}
+
+    for scale in args.scales:
+        path = os.path.join(args.cassettes, f'api-{scale}.sqlite')
+        record(path, scale, args.batch_http)
+        results[str(scale)] = run(path, scale, args)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f'Results saved at: {args.save}')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = check_regressions(results, json.load(file), args.tolerance)
+
+        for message in regressions:
+            print(f'Regression: {message}')
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of video duration parsing
+
+Compares the previous implementation (up to six uncompiled re.search
+calls per duration) with the compiled single-pass parser and the batch
+parser used for DataFrame columns.
+
+Run:
+    python benchmarks/bench_duration.py
+"""
+import re
+import random
+import timeit
+
+from yt_scrapper.common.funcs import _duration_seconds
+from yt_scrapper.common.funcs import convert_duration_to_seconds
+from yt_scrapper.common.funcs import convert_durations_to_seconds
+
+
+def legacy_convert_duration_to_seconds(duration: str) -> int:
+    """
+    Previous implementation of funcs.convert_duration_to_seconds
+    """
+    h = int(re.search('\\d+H', duration)[0][:-1]) * 60 ** 2 if re.search('\\d+H', duration) else 0
+    m = int(re.search('\\d+M', duration)[0][:-1]) * 60 if re.search('\\d+M', duration) else 0
+    s = int(re.search('\\d+S', duration)[0][:-1]) if re.search('\\d+S', duration) else 0
+    return h + m + s
+
+
+def create_durations(size: int, unique: int) -> list:
+    """
+    Random durations, 'unique' distinct values repeated to size
+    """
+    random.seed(0)
+    values = [f'PT{random.randint(0, 3)}H{random.randint(0, 59)}M{random.randint(0, 59)}S'
+              for _ in range(unique)]
+    return [random.choice(values) for _ in range(size)]
+
+
+def main(size: int = 100000, repeat: int = 5):
+    for unique in (100, 10000, size):
+        durations = create_durations(size, unique)
+
+        parse = _duration_seconds.__wrapped__  # Compiled parser without the LRU cache
+
+        results = {
+            'legacy': lambda: [legacy_convert_duration_to_seconds(duration) for duration in durations],
+            'compiled': lambda: [parse(duration) for duration in durations],
+            'compiled+lru': lambda: [convert_duration_to_seconds(duration) for duration in durations],
+            'batch': lambda: convert_durations_to_seconds(durations),
+        }
+
+        assert results['compiled']() == results['legacy']() == list(results['batch']())
+
+        print(f'{size} durations, {unique} unique')
+        for name, func in results.items():
+            best = min(timeit.repeat(func, number=1, repeat=repeat))
+            print(f'    {name:<14}{best * 1000:>10.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Startup benchmark of the package
+
+Every case runs in a fresh interpreter, as a CLI invocation or a worker
+process of a crawl does: importing the package, constructing YouTube()
+with 10 keys and creating the first request (discovery client loaded and
+service of one key built from the bundled discovery document).
+Heavy modules loaded by each case are listed.
+
+Run:
+    python benchmarks/bench_startup.py
+"""
+import sys
+import json
+import statistics
+import subprocess
+
+
+HEAVY_MODULES = ('pandas', 'numpy', 'googleapiclient.discovery', 'google_auth_oauthlib', 'httplib2', 'bs4')
+
+CASES = {
+    'import': '',
+    'import db': 'import yt_scrapper.db',
+    'YouTube()': 'yt = YouTube([f"key{i}" for i in range(10)])',
+    'first request': 'yt = YouTube([f"key{i}" for i in range(10)])\n'
+                     'yt.service.videos().list(part="id", id="x")',
+}
+
+SCRIPT = '''
+import sys, time, json
+start = time.perf_counter()
+from yt_scrapper.yt_scrapper import YouTube
+{case}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules and '_LazyModule' not in type(sys.modules[name]).__name__]
+print(json.dumps([elapsed, loaded]))
+'''
+
+
+def run_case(case: str) -> tuple:
+    """
+    Returns:
+        tuple: (seconds, heavy modules loaded) of the case in a fresh interpreter
+    """
+    script = SCRIPT.format(case=case, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+    elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def main(repeat: int = 7):
+    for name, case in CASES.items():
+        results = [run_case(case) for _ in range(repeat)]
+        median = statistics.median(elapsed for elapsed, _ in results)
+
+        print(f'{name:<16}{median * 1000:>10.1f} ms    loaded: {", ".join(results[-1][1]) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
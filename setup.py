@@ -22,4 +22,7 @@ setuptools.setup(
     ],
     package_dir={'':"src"},
     packages=find_packages("src"),
-    python_requires=">=3.7",)
+    python_requires=">=3.7",
+    entry_points={
+        "console_scripts": ["yt-scrapper=yt_scrapper.cli:main"],
+    },)
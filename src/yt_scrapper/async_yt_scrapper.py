@@ -0,0 +1,343 @@
+# Built-in Modules import
+import time
+import asyncio
+import datetime as dt
+
+# Installed Modules import
+import pandas as pd
+from googleapiclient.errors import HttpError
+
+# Project files import
+from .common import channel, video, funcs
+from .common.fetch import BATCH_SIZE
+from .common.fetch import order_items
+from .common.fetch import create_batches
+from .common.lazy import lazy_import
+from .common.quota import request_cost
+from .common.quota import QuotaExceeded
+from .common.quota import QuotaScheduler
+from .common.retry import RetryPolicy
+from .common.retry import classify_error
+from .common.retry import error_reason
+from .common.service import QUOTA_ERRORS
+from .common.search import _grab_search_result_id
+from .common.grab import _grab_next_page_token
+from .common.grab import _grab_video_id_from_snippet
+from .common.grab import _grab_video_date_from_contentDetails
+from .common.grab import _grab_channel_playlist_id_from_contentDetails
+
+httplib2 = lazy_import('httplib2')
+
+
+API_URL = 'https://www.googleapis.com/youtube/v3'
+
+
+def _import_httpx():
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError('httpx is required for AsyncYouTube: pip install "httpx[http2]"')
+
+    return httpx
+
+
+def _http_error(response) -> HttpError:
+    """
+    Returns HttpError of the discovery client for a failed httpx response,
+    so errors are classified and reported like the ones of YouTube
+    """
+    resp = httplib2.Response({'status': response.status_code, **response.headers})
+    resp.reason = response.reason_phrase
+    return HttpError(resp, response.content, uri=str(response.url))
+
+
+# Creating AsyncYouTube class to communicate with YouTube API without blocking
+class AsyncYouTube:
+    """
+    Communicate with YouTube API using asyncio
+
+    Counterpart of YouTube that sends raw REST requests through one pooled
+    HTTP/2 client, no discovery document is needed. Many channels can be
+    scraped by a single process at the same time:
+
+        async with AsyncYouTube(API_KEY) as yt:
+            await asyncio.gather(*[yt.extract_channel_videos(c, c) for c in channel_ids])
+
+    ...
+
+    Attributes:
+        key: str
+            Api key used to authenticate requests.
+            A list of keys can be passed to spread requests across them
+        concurrency: int
+            Max no. of requests in flight at the same time
+        max_connections: int
+            Max no. of pooled connections of the HTTP client
+        scheduler: QuotaScheduler
+            Every request is admitted by it in priority order within its max_concurrent
+            slots, and is sent with the key it charges. A key the API reports out of quota is exhausted and
+            the request is sent again with the next key. One tracking usage
+            without a local cap is created if not provided
+        retry: RetryPolicy
+            Backoff and metrics of every request, temporary failures e.g. 5xx or
+            rateLimitExceeded are sent again, see common/retry.py
+
+    Methods:
+        extract_channel_videos():
+            Extract channel all videos data into a .csv file or sink
+        extract_channels_by_keyword():
+            Search channels by keyword and extract their data into a .csv file or sink
+        retrieve_channel_comments():
+            Retrieve all comment threads related to the channel
+        aclose():
+            Close the HTTP client
+    """
+
+    def __init__(self,
+                 key: str,
+                 concurrency: int = 50,
+                 max_connections: int = 100,
+                 scheduler=None,
+                 client=None,
+                 retry=None):
+        httpx = _import_httpx()
+
+        self.keys = list(key) if isinstance(key, (list, tuple)) else [key]
+        self.key = self.keys[0]
+        self.concurrency = concurrency
+        self.max_connections = max_connections
+        self.scheduler = scheduler or QuotaScheduler(self.keys, budget=None)
+        self.retry = retry or RetryPolicy()
+        self._transport_errors = (httpx.TransportError,)
+        self.client = client or httpx.AsyncClient(
+            http2=True,
+            base_url=API_URL,
+            timeout=30,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def request(self, resource: str, **params) -> dict:
+        """
+        Send GET request to resource 'list' endpoint and return its json response.
+        Temporary failures are sent again after the backoff of the retry policy.
+
+        Args:
+            resource: API resource e.g. 'videos', 'playlistItems'
+            params: Request parameters, list values are joined by commas
+
+        Raises:
+            HttpError of a fatal error or of a temporary one that failed every retry
+        """
+        params = {name: ','.join(value) if isinstance(value, (list, tuple)) else value
+                  for name, value in params.items()}
+        endpoint = f'{resource}.list'
+
+        for attempt in range(self.retry.retries + 1):
+            if self.retry.bucket is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self.retry.throttle)
+
+            start = time.monotonic()
+            try:
+                response = await self._send(resource, params, endpoint)
+            except Exception as err:
+                self.retry.metrics.record(endpoint, time.monotonic() - start, err)
+                temporary = isinstance(err, self._transport_errors) or classify_error(err) == 'retry'
+                if attempt == self.retry.retries or not temporary:
+                    raise
+
+                delay = self.retry.delay(attempt)
+                print(f'{endpoint} failed ({type(err).__name__}), retrying in {delay:.1f}s...')
+                self.retry.metrics.record_retry(endpoint)
+                await asyncio.sleep(delay)
+            else:
+                self.retry.metrics.record(endpoint, time.monotonic() - start)
+                return response
+
+    async def _acquire(self, resource: str, priority: int):
+        """
+        Wait for the turn and a slot of the request in the quota scheduler, charge
+        its quota and return the key to send it with. The scheduler blocks while
+        waiting, so it runs in the default executor
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.scheduler.acquire,
+                                          request_cost(resource, 'list'), f'{resource}.list', priority)
+
+    async def _send(self, resource: str, params: dict, endpoint: str) -> dict:
+        """
+        Send request with the key picked by the quota scheduler, a key out
+        of quota is exhausted and the request is sent with the next key
+        """
+        priority = self.scheduler.current_priority()  # Priority of the calling task, taken on the event loop
+
+        for _ in self.scheduler.keys:
+            key = await self._acquire(resource, priority)
+            try:
+                async with self._semaphore:
+                    response = await self.client.get(f'/{resource}', params={**params, 'key': key})
+            finally:
+                self.scheduler.release()
+
+            if response.is_success:
+                return response.json()
+
+            err = _http_error(response)
+            if error_reason(err) not in QUOTA_ERRORS:
+                raise err
+            print('Quota exceeded for API key, switching key...')
+            self.scheduler.exhaust(key)
+
+        raise QuotaExceeded(f'All API keys are out of quota for {endpoint}')
+
+    async def iter_pages(self, resource: str, **params):
+        """
+        Async iterator of the pages of resource
+        """
+        next_page_token = ''
+        while True:
+            page_params = {'pageToken': next_page_token} if next_page_token else {}
+            response = await self.request(resource, **params, **page_params)
+            yield response
+
+            next_page_token = _grab_next_page_token(response)
+            if not next_page_token:
+                break
+
+    async def request_items(self, resource: str, ids: list, part: str) -> list:
+        """
+        Request items of resource by ids, all batches of 50 are requested concurrently
+
+        Returns:
+            List of items in the order of ids
+        """
+        responses = await asyncio.gather(*[
+            self.request(resource, part=part, id=batch, maxResults=BATCH_SIZE)
+            for batch in create_batches(ids)
+        ])
+
+        items = [item for response in responses for item in response['items']]
+        return order_items(items, ids)
+
+    async def get_channel_uploads_id(self, channel_id: str) -> str:
+        response = await self.request('channels', part='contentDetails', id=channel_id)
+        return _grab_channel_playlist_id_from_contentDetails(response['items'][0])
+
+    async def get_videos_id(self, playlist_id: str) -> list:
+        videos_ids = []
+        async for response in self.iter_pages('playlistItems', part='snippet',
+                                              playlistId=playlist_id, maxResults=50):
+            videos_ids.extend(_grab_video_id_from_snippet(item) for item in response['items'])
+
+        return videos_ids
+
+    async def search_by_keyword(self, query: str, search_type: str = 'video,channel,playlist') -> list:
+        ids = {}  # Ordered set of IDs'
+        async for response in self.iter_pages('search', q=query, part='snippet',
+                                              type=search_type, maxResults=50):
+            for item in response['items']:
+                ids.setdefault(_grab_search_result_id(item))
+
+        return list(ids)
+
+    async def latest_upload_date(self, uploads_id: str) -> dt.datetime:
+        """
+        Returns publish date of the most recent video of the uploads playlist
+        """
+        response = await self.request('playlistItems', part='contentDetails',
+                                      playlistId=uploads_id, maxResults=1)
+        if not response['items']:
+            return dt.datetime.min
+
+        return dt.datetime.strptime(_grab_video_date_from_contentDetails(response['items'][0]), '%Y-%m-%d')
+
+    @staticmethod
+    def _write(data: pd.DataFrame, filename: str, sink=None):
+        if sink is not None:
+            sink.write(data)
+        else:
+            funcs.create_csv(data, filename)
+
+    async def extract_channel_videos(self,
+                                     channel_id: str,
+                                     filename: str,
+                                     sink=None) -> pd.DataFrame:
+        """
+        Args:
+            channel_id: ID of the YouTube Channel
+            filename: Name of output file without extension
+            sink: Sink the videos are written to instead of the csv file
+
+        Returns:
+            Pandas dataframe of channel all videos, also written to the .csv file or sink
+        """
+        uploads_id = await self.get_channel_uploads_id(channel_id)
+        videos_ids = await self.get_videos_id(uploads_id)
+        items = await self.request_items('videos', videos_ids, 'contentDetails,snippet,statistics')
+
+        videos_data = video.videos_frame(items)
+        print(f'Total videos data extracted for {channel_id}: {len(videos_data)}')
+
+        self._write(videos_data, filename, sink)
+        return videos_data
+
+    async def extract_channels_by_keyword(self,
+                                          search_query: str,
+                                          filename: str = '',
+                                          filter_channels: bool = False,
+                                          subs_min: int = 0,
+                                          subs_max: int = 1000000000,
+                                          vid_count: int = 0,
+                                          last_activity: int = 0,
+                                          sink=None) -> pd.DataFrame:
+        """
+        Search for channels by keyword, see YouTube.extract_channels_by_keyword()
+
+        Returns:
+            Pandas dataframe of channels, also written to the .csv file or sink
+        """
+        if not filename:
+            filename = search_query.strip().lower()
+
+        channel_ids = await self.search_by_keyword(search_query, 'channel')
+        channel_data = await self.request_items(
+            'channels', channel_ids, 'snippet,statistics,contentDetails,brandingSettings')
+
+        if filter_channels:
+            channel_data = channel.filter_channels_by_criteria(channel_data, subs_min, subs_max, vid_count)
+            if last_activity:
+                activity_time = dt.datetime.now() - dt.timedelta(days=last_activity)
+                upload_dates = await asyncio.gather(*[
+                    self.latest_upload_date(_grab_channel_playlist_id_from_contentDetails(item))
+                    for item in channel_data
+                ])
+                channel_data = [item for item, upload_date in zip(channel_data, upload_dates)
+                                if upload_date >= activity_time]
+
+        channel_data = channel.extract_channel_data(channel_data)
+
+        self._write(channel_data, filename, sink)
+        return channel_data
+
+    async def retrieve_channel_comments(self, channel_id: str) -> list:
+        """
+        Returns:
+            List of all comment threads related to the channel
+        """
+        comments_data = []
+        async for response in self.iter_pages('commentThreads', part='id,snippet,replies',
+                                              allThreadsRelatedToChannelId=channel_id,
+                                              maxResults=100):
+            comments_data.extend(response['items'])
+
+        return comments_data
@@ -0,0 +1,235 @@
+# Built-in Modules import
+import os
+import sys
+import json
+import argparse
+import contextlib
+
+# Installed Modules import
+from googleapiclient.errors import HttpError
+
+# Project files import
+from .yt_scrapper import YouTube
+from .common.jobs import JobState
+from .common.jobs import channel_videos_job_id
+from .common.jobs import channels_by_keyword_job_id
+from .common.cache import SQLiteCache
+from .common.quota import DAILY_QUOTA
+from .common.quota import QuotaExceeded
+from .common.quota import QuotaScheduler
+from .common.retry import DEFAULT_RETRIES
+from .common.retry import RetryPolicy
+from .common.sinks import create_sink
+
+
+OUTPUT_FORMATS = ('ndjson', 'parquet', 'csv')
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser):
+    """
+    Output, concurrency, cache and quota options of every subcommand
+    """
+    output = parser.add_argument_group('output')
+    output.add_argument('-o', '--output', default='-',
+                        help="File or parquet dataset directory, '-' for stdout (default)")
+    output.add_argument('-f', '--format', default='ndjson', choices=OUTPUT_FORMATS,
+                        help='Output format (default: ndjson)')
+    output.add_argument('--partition-by', default='',
+                        help="Comma separated columns of a parquet dataset e.g. 'channel_id'")
+
+    requests = parser.add_argument_group('requests')
+    requests.add_argument('-k', '--key', action='append', dest='keys',
+                          help='API key, repeat for many keys (default: API_KEY from env, comma separated)')
+    requests.add_argument('-w', '--workers', type=int, default=8,
+                          help='No. of requests in flight at the same time (default: 8)')
+    requests.add_argument('--batch-http', action='store_true',
+                          help='Pack lookups into batch http requests')
+    requests.add_argument('--cache', default='',
+                          help="SQLite response cache file e.g. 'yt_cache.sqlite'")
+    requests.add_argument('--checkpoint', default='',
+                          help="SQLite job state file e.g. 'yt_jobs.sqlite', a stopped run resumes "
+                               "(channel-videos and channels), a finished run is skipped")
+    requests.add_argument('--restart', action='store_true',
+                          help='Start the --checkpoint run over even if it is stopped or finished')
+
+    quota = parser.add_argument_group('quota')
+    quota.add_argument('--daily-quota', type=int, default=None,
+                       help=f'Daily quota units of each key e.g. {DAILY_QUOTA}, by default there is no local '
+                            f'limit and a key is switched when the API answers quotaExceeded')
+    quota.add_argument('--on-exhausted', default='raise', choices=('raise', 'wait'),
+                       help='Fail or wait for the quota reset once all keys are out of quota')
+    quota.add_argument('--rate', type=float, default=None,
+                       help='Max requests per second, no client side limit by default')
+    quota.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                       help=f'Times a temporary failure is retried (default: {DEFAULT_RETRIES})')
+    quota.add_argument('--stats', action='store_true',
+                       help='Print quota usage and request metrics to stderr when done')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Returns:
+        Argument parser of the yt-scrapper command
+    """
+    parser = argparse.ArgumentParser(
+        prog='yt-scrapper',
+        description='Scrape YouTube data with the YouTube Data API. Rows are streamed to stdout or '
+                    'a file as pages arrive, progress is printed to stderr.'
+    )
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    command = commands.add_parser('channel-videos', help='All videos of a channel')
+    command.add_argument('channel_id', help='ID of the YouTube channel')
+    command.set_defaults(resource='videos', run=_channel_videos)
+
+    command = commands.add_parser('playlist', help='All videos of a playlist')
+    command.add_argument('playlist', help='Playlist ID or playlist URL')
+    command.set_defaults(resource='videos', run=_playlist_videos)
+
+    command = commands.add_parser('channels', help='Channels found by keyword')
+    command.add_argument('query', help='Search keyword')
+    command.add_argument('--max-results', type=int, default=0, help='Max no. of channels, 0 for no limit')
+    command.add_argument('--shards', type=int, default=1, help='No. of concurrent search date windows')
+    command.add_argument('--subs-min', type=int, default=None, help='Min no. of subscribers')
+    command.add_argument('--subs-max', type=int, default=None, help='Max no. of subscribers')
+    command.add_argument('--min-videos', type=int, default=None, help='Min no. of videos')
+    command.add_argument('--last-activity', type=int, default=None, help='Last upload within no. of days')
+    command.set_defaults(resource='channels', run=_keyword_channels)
+
+    command = commands.add_parser('videos', help='Videos found by keyword')
+    command.add_argument('query', help='Search keyword')
+    command.add_argument('--max-results', type=int, default=0, help='Max no. of videos, 0 for no limit')
+    command.add_argument('--shards', type=int, default=1, help='No. of concurrent search date windows')
+    command.set_defaults(resource='videos', run=_keyword_videos)
+
+    command = commands.add_parser('comments', help='Comments and replies of all videos of a channel')
+    command.add_argument('channel_id', help='ID of the YouTube channel')
+    command.set_defaults(resource='comments', run=_channel_comments)
+
+    for command in commands.choices.values():
+        _add_common_arguments(command)
+
+    return parser
+
+
+def _job_id(args) -> str:
+    """
+    Returns id of the checkpointed job of the subcommand
+    """
+    if args.run is _channel_videos:
+        return channel_videos_job_id(args.channel_id)
+
+    return channels_by_keyword_job_id(args.query)
+
+
+def _channel_videos(yt: YouTube, args, sink):
+    yt.extract_channel_videos(args.channel_id, '', sink=sink, checkpoint=args.job_state)
+
+
+def _playlist_videos(yt: YouTube, args, sink):
+    yt.extract_videos_from_playlist(args.playlist, '', sink=sink)
+
+
+def _keyword_channels(yt: YouTube, args, sink):
+    criteria = (args.subs_min, args.subs_max, args.min_videos, args.last_activity)
+
+    yt.extract_channels_by_keyword(
+        args.query,
+        filter_channels=any(value is not None for value in criteria),
+        subs_min=args.subs_min or 0,
+        subs_max=args.subs_max if args.subs_max is not None else 1000000000,
+        vid_count=args.min_videos or 0,
+        last_activity=args.last_activity or 0,
+        sink=sink,
+        max_results=args.max_results,
+        search_shards=args.shards,
+        checkpoint=args.job_state,
+    )
+
+
+def _keyword_videos(yt: YouTube, args, sink):
+    yt.extract_videos_by_keyword(args.query, sink=sink, max_results=args.max_results, search_shards=args.shards)
+
+
+def _channel_comments(yt: YouTube, args, sink):
+    yt.extract_channel_comments(args.channel_id, '', sink=sink)
+
+
+def create_youtube(args) -> YouTube:
+    """
+    Create YouTube instance with the keys, cache, quota and retry options of the command
+    """
+    return YouTube(
+        args.keys,
+        workers=args.workers,
+        batch_http=args.batch_http,
+        cache=SQLiteCache(args.cache) if args.cache else None,
+        scheduler=QuotaScheduler(args.keys, budget=args.daily_quota, on_exhausted=args.on_exhausted),
+        retry=RetryPolicy(retries=args.retries, rate=args.rate),
+    )
+
+
+def main(argv: list = None) -> int:
+    """
+    Entry point of the yt-scrapper console script
+
+    Returns:
+        Exit status, 0 on success
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not args.keys:
+        args.keys = [key.strip() for key in os.environ.get('API_KEY', '').split(',') if key.strip()]
+    if not args.keys:
+        parser.error('an API key is required: pass --key or set API_KEY in the environment or .env file')
+    if args.format == 'csv' and args.output == '-':
+        parser.error('csv output needs a file, pass --output e.g. videos.csv')
+    if args.checkpoint and args.run not in (_channel_videos, _keyword_channels):
+        parser.error('--checkpoint is supported by channel-videos and channels')
+    if args.restart and not args.checkpoint:
+        parser.error('--restart needs --checkpoint')
+
+    partition_by = tuple(column.strip() for column in args.partition_by.split(',') if column.strip())
+    args.job_state = JobState(args.checkpoint) if args.checkpoint else None
+    resume = False
+    if args.job_state is not None:
+        if args.restart:
+            args.job_state.reset(_job_id(args))
+        resume = bool(args.job_state.status(_job_id(args)))
+    if resume and args.format == 'parquet' and args.output.endswith('.parquet'):
+        parser.error("a parquet file can't be resumed, pass a dataset directory e.g. -o videos/ or --restart")
+
+    # Output of a previous run is replaced, unless the stopped job is resumed or the finished one skipped
+    sink_options = {'append': resume}
+    if args.format == 'parquet':
+        sink_options['partition_by'] = partition_by
+
+    yt = create_youtube(args)
+
+    # Sink takes stdout before progress messages are moved to stderr
+    sink = create_sink(args.output, args.resource, args.format, **sink_options)
+
+    try:
+        with sink, contextlib.redirect_stdout(sys.stderr):
+            args.run(yt, args, sink)
+    except (QuotaExceeded, HttpError) as err:
+        print(f'Error: {err}', file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Reader of stdout is gone e.g. '| head', the rest of the output is dropped
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+    if args.stats:
+        stats = {'quota': yt.scheduler.usage(), 'requests': yt.retry.metrics.summary()}
+        print(json.dumps(stats, indent=2), file=sys.stderr)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
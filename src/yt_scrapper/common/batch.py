@@ -0,0 +1,171 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
+
+from .fetch import _thread_http
+from .fetch import create_batches
+from .retry import classify_error
+from .retry import error_reason
+from .retry import network_errors
+from .service import QUOTA_ERRORS
+from .service import Request
+
+
+BATCH_HTTP_SIZE = 50  # No. of requests packed into a single batch http request
+BATCH_HTTP_RETRIES = 3  # No. of times failed sub-requests are sent again
+
+
+def _send_batch(service, requests: list, indexes: list, threaded: bool = False) -> dict:
+    """
+    Pack requests at indexes into one batch http request and send it.
+    If the batch http request itself fails, its error is returned for every sub-request.
+
+    Returns:
+        dict: {index: (response, exception)} for every sub-request
+    """
+    policy = getattr(service, 'retry', None)
+    results = {}
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    batch = service.new_batch_http_request(callback=callback)
+    for index in indexes:
+        request = requests[index]
+        if isinstance(request, Request):
+            request = request.charge()  # Batch accepts requests of the discovery client only
+        batch.add(request, request_id=str(index))
+
+    if policy is not None:
+        policy.throttle(len(indexes))
+
+    start = time.monotonic()
+    try:
+        if threaded:
+            batch.execute(http=_thread_http(requests[indexes[0]].http))
+        else:
+            batch.execute()
+    except network_errors() + (HttpError,) as err:
+        results = {index: (None, err) for index in indexes}
+
+    if policy is not None:
+        latency = time.monotonic() - start
+        for index in indexes:
+            endpoint = getattr(requests[index], 'endpoint', 'batch')
+            policy.metrics.record(endpoint, latency, results.get(index, (None, None))[1])
+
+    return results
+
+
+def _exhaust_key(request, err: Exception) -> bool:
+    """
+    Mark the key of a sub-request out of quota if err is a quota error
+
+    Returns:
+        True if the sub-request can be sent again with another key
+    """
+    if not isinstance(request, Request) or request.service.scheduler is None or not isinstance(err, HttpError):
+        return False
+    if error_reason(err) not in QUOTA_ERRORS:
+        return False
+
+    print('Quota exceeded for API key, switching key...')
+    request.service.scheduler.exhaust(request.key)
+    return True
+
+
+def execute_batch(service,
+                  requests: list,
+                  batch_size: int = BATCH_HTTP_SIZE,
+                  workers: int = 1,
+                  retries: int = BATCH_HTTP_RETRIES,
+                  missing: dict = None) -> list:
+    """
+    Send requests packed into batch http requests, one round trip per batch_size requests.
+    Sub-requests that fail temporarily are collected and only those are sent
+    again after the backoff of the service retry policy. Sub-requests whose
+    key is out of quota are sent again at once with the next key.
+
+    Args:
+        service: YouTube Service Instance
+        requests: List of request objects created from the service
+        batch_size: No. of requests packed together (maximum: 1000)
+        workers: No. of batch http requests sent concurrently
+        retries: No. of times failed sub-requests are retried
+        missing: Response of sub-requests answered with 404 Not Found, raised if not provided
+
+    Returns:
+        List of responses in the same order as requests
+
+    Raises:
+        HttpError of the first sub-request that still fails after all retries,
+        QuotaExceeded once all keys are out of quota
+    """
+    policy = getattr(service, 'retry', None)
+    responses = [None] * len(requests)
+    pending = []
+
+    # Answer requests from the cache of the service where possible
+    for index, request in enumerate(requests):
+        if isinstance(request, Request):
+            responses[index] = request.lookup()
+        if responses[index] is None:
+            pending.append(index)
+
+    if not pending:
+        return responses
+
+    attempt = 0
+    while pending:
+        chunks = create_batches(pending, batch_size)
+
+        if workers <= 1 or len(chunks) <= 1:
+            results = [_send_batch(service, requests, chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                results = list(pool.map(
+                    lambda chunk: _send_batch(service, requests, chunk, threaded=True), chunks))
+
+        errors = {}
+        switched = []  # Sub-requests out of quota, sent again with the next key
+        for result in results:
+            for index, (response, exception) in result.items():
+                if exception is not None and isinstance(requests[index], Request):
+                    stale = requests[index].revalidated(exception)
+                    if stale is not None:
+                        # 304 Not Modified, the expired cached response is still valid
+                        responses[index] = stale
+                        continue
+
+                if missing is not None and isinstance(exception, HttpError) and exception.resp.status == 404:
+                    responses[index] = missing
+                elif exception is None:
+                    responses[index] = response
+                    if isinstance(requests[index], Request):
+                        requests[index].store(response)
+                elif _exhaust_key(requests[index], exception):
+                    switched.append(index)
+                else:
+                    errors[index] = exception
+
+        failed = sorted(errors)
+        if failed:
+            # Errors that fail again e.g. 404 are raised without sending the batch again
+            fatal = [index for index in failed if classify_error(errors[index]) == 'fatal']
+            if fatal:
+                raise errors[fatal[0]]
+            if attempt >= retries:
+                raise errors[failed[0]]
+
+            print(f'Batch sub-requests failed: {len(failed)}, retrying...')
+            if policy is not None:
+                for index in failed:
+                    policy.metrics.record_retry(getattr(requests[index], 'endpoint', 'batch'))
+            time.sleep(policy.delay(attempt) if policy is not None else 2 ** attempt)
+            attempt += 1
+
+        pending = sorted(failed + switched)
+
+    return responses
@@ -0,0 +1,260 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+
+# Seconds a cached response of each resource stays fresh
+DEFAULT_TTLS = {
+    'search': 24 * 60 ** 2,
+    'channels': 24 * 60 ** 2,
+    'videos': 60 ** 2,
+    'playlistItems': 60 ** 2,
+    'commentThreads': 60 ** 2,
+    'comments': 60 ** 2,
+}
+DEFAULT_TTL = 60 ** 2  # TTL for resources missing in DEFAULT_TTLS
+DEFAULT_MAX_SIZE = 256 * 1024 ** 2  # Max size of stored responses in bytes
+
+
+def cache_key(resource: str, method: str, params: dict) -> str:
+    """
+    Creates a key for the request from its endpoint and parameters
+    """
+    params = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.sha1(params.encode()).hexdigest()
+    return f'{resource}.{method}:{digest}'
+
+
+class Cache:
+    """
+    Base class of response caches
+
+    ...
+
+    Attributes:
+        ttls: dict
+            Seconds a response stays fresh per resource
+        hits: int
+            No. of requests answered from the cache
+        misses: int
+            No. of requests that were not found in the cache or were expired
+        revalidated: int
+            No. of expired responses the API confirmed unchanged (304 Not Modified)
+        revalidate: bool
+            Send expired responses' ETag with If-None-Match, unchanged responses
+            then cost a 304 instead of a full payload
+
+    Methods:
+        get():
+            Returns cached response of the key or None
+        lookup():
+            Returns cached response of the key and whether it is fresh
+        set():
+            Stores response of the key
+        refresh():
+            Marks response of the key fresh again, e.g. after a 304
+        stats():
+            Returns hit/miss counters
+    """
+
+    def __init__(self, ttls: dict = None, revalidate: bool = True):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.revalidate = revalidate
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.resource_stats = {}  # {resource: [hits, misses, revalidated]}
+        self._lock = threading.Lock()
+
+    def ttl(self, resource: str) -> int:
+        return self.ttls.get(resource, DEFAULT_TTL)
+
+    def _count(self, resource: str, hit: bool):
+        with self._lock:
+            counters = self.resource_stats.setdefault(resource, [0, 0, 0])
+            if hit:
+                self.hits += 1
+                counters[0] += 1
+            else:
+                self.misses += 1
+                counters[1] += 1
+
+    def lookup(self, key: str, resource: str) -> tuple:
+        """
+        Returns:
+            tuple: (stored response or None, True if the response is still fresh)
+        """
+        entry = self._load(key)
+        fresh = entry is not None and time.time() - entry[1] < self.ttl(resource)
+        self._count(resource, fresh)
+        return (entry[0] if entry is not None else None), fresh
+
+    def get(self, key: str, resource: str):
+        """
+        Returns the response stored for key if it is still fresh, else None
+        """
+        response, fresh = self.lookup(key, resource)
+        return response if fresh else None
+
+    def set(self, key: str, resource: str, response: dict):
+        self._store(key, resource, response)
+
+    def refresh(self, key: str, resource: str):
+        """
+        Reset the age of the response stored for key, the API confirmed it unchanged
+        """
+        with self._lock:
+            self.revalidated += 1
+            self.resource_stats.setdefault(resource, [0, 0, 0])[2] += 1
+        self._touch(key)
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'resources': {resource: {'hits': hits, 'misses': misses, 'revalidated': revalidated}
+                          for resource, (hits, misses, revalidated) in self.resource_stats.items()},
+        }
+
+    def _load(self, key: str):
+        """
+        Returns (response, stored_at) or None
+        """
+        raise NotImplementedError
+
+    def _store(self, key: str, resource: str, response: dict):
+        raise NotImplementedError
+
+    def _touch(self, key: str):
+        """
+        Set stored time of the response to now
+        """
+        raise NotImplementedError
+
+
+class MemoryCache(Cache):
+    """
+    In-memory response cache holding at most max_items responses (LRU)
+    """
+
+    def __init__(self, ttls: dict = None, max_items: int = 10000, revalidate: bool = True):
+        super().__init__(ttls, revalidate)
+        self.max_items = max_items
+        self._entries = OrderedDict()
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, resource, response):
+        with self._lock:
+            self._entries[key] = (response, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def _touch(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], time.time())
+
+
+class SQLiteCache(Cache):
+    """
+    On-disk response cache stored in a SQLite database.
+    Responses are stored compressed, least recently used responses are
+    evicted once the stored size exceeds max_size bytes. Expired responses
+    are kept until evicted so they can be revalidated with their ETag.
+    """
+
+    def __init__(self,
+                 path: str = 'yt_cache.sqlite',
+                 ttls: dict = None,
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 revalidate: bool = True):
+        super().__init__(ttls, revalidate)
+        self.path = path
+        self.max_size = max_size
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, resource TEXT, body BLOB, size INTEGER, '
+            'stored_at REAL, accessed_at REAL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+        self.conn.commit()
+
+        self.size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def _load(self, key):
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT body, stored_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+
+        return json.loads(zlib.decompress(row[0])), row[1]
+
+    def _store(self, key, resource, response):
+        body = zlib.compress(json.dumps(response).encode())
+        now = time.time()
+
+        with self._lock:
+            row = self.conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self.size -= row[0]
+
+            self.conn.execute(
+                'REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (key, resource, body, len(body), now, now)
+            )
+            self.size += len(body)
+            self._evict()
+            self.conn.commit()
+
+    def _touch(self, key):
+        with self._lock:
+            now = time.time()
+            self.conn.execute('UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, key))
+            self.conn.commit()
+
+    def _evict(self):
+        """
+        Delete least recently used responses until size fits in max_size
+        """
+        while self.size > self.max_size:
+            rows = self.conn.execute(
+                'SELECT key, size FROM responses ORDER BY accessed_at LIMIT 100'
+            ).fetchall()
+            if not rows:
+                break
+
+            for key, size in rows:
+                self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.size -= size
+                if self.size <= self.max_size:
+                    break
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM responses')
+            self.conn.commit()
+            self.size = 0
+
+    def close(self):
+        self.conn.close()
@@ -1,24 +1,34 @@
+from __future__ import annotations
 
-import requests
-
-import pandas as pd
 import datetime as dt
 
-from bs4 import BeautifulSoup
-
+from .lazy import lazy_import
 from .grab import _grab_channel_id
 from .grab import _grab_channel_url
-from .grab import _channel_subs_hidden
 from .grab import _grab_channel_title_from_snippet
 from .grab import _grab_channel_country_from_snippet
 from .grab import _grab_channel_custom_url_from_snippet
 from .grab import _grab_channel_subs_count_from_statistics
 from .grab import _grab_channel_view_count_from_statistics
-from .grab import _grab_video_duration_from_contentDetails
+from .grab import _grab_video_date_from_contentDetails
 from .grab import _grab_channel_video_count_from_statistics
 from .grab import _grab_channel_published_date_from_snippet
 from .grab import _grab_channel_playlist_id_from_contentDetails
 
+from .filters import subs_between
+from .filters import filter_channels
+from .filters import video_count_above
+
+from .fetch import rebatch
+from .fetch import order_items
+from .fetch import fetch_batches
+from .fetch import create_batches
+from .fetch import stream_batches
+
+requests = lazy_import('requests')
+pd = lazy_import('pandas')
+bs4 = lazy_import('bs4')
+
 
 def get_channel_uploads_id(service, channel_id: str) -> str:
     """
@@ -44,37 +54,67 @@ def get_channel_uploads_id(service, channel_id: str) -> str:
     return playlist_id
 
 
-def request_channels_data(service, channels_ids: []) -> list:
+def _channels_request(service, channels_batch: list):
+    """
+    Creates request for the data of upto 50 channels
+    """
+    return service.channels().list(
+        part='snippet,statistics,contentDetails,brandingSettings',
+        id=channels_batch,
+        maxResults=50,
+    )
+
+
+def request_channels_data(service, channels_ids: [], workers: int = 1, batch_http: bool = False) -> list:
     """
     Request channel data using channel id and return list containing channel data
     Args:
         service: YouTube Service Instance
         channels_ids: list containing YouTube channels IDs'
+        workers: No. of batches requested concurrently
+        batch_http: Pack the batches into batch http requests
 
     Returns:
-        List containing channels data
+        List containing channels data in the order of channels_ids
     """
-    channels_data = []  # Holds channels data
-
-    # Creates id batches to request data and store response in list
-    for batch_range in range(0, len(channels_ids), 50):
-        # Create batches
-        batch = channels_ids[batch_range: batch_range + 50]
 
-        # Request channel data using channel id
-        response = service.channels().list(
-            part='snippet,statistics,contentDetails,brandingSettings',
-            id=batch,
-            maxResults=50,
-        ).execute()
+    # Creates id batches of 50 and request channel data using channel id
+    responses = fetch_batches(
+        lambda batch: _channels_request(service, batch),
+        create_batches(channels_ids),
+        workers,
+        service if batch_http else None
+    )
 
-        channels_data.extend(response['items'])
+    channels_data = [item for response in responses for item in response['items']]
+    channels_data = order_items(channels_data, channels_ids)
 
     print(f'Total channels data received: {len(channels_data)}')
 
     return channels_data
 
 
+def iter_channels_data(service,
+                       channels_ids,
+                       workers: int = 1):
+    """
+    Args:
+        service: YouTube Service Instance
+        channels_ids: Iterable of channels ID's lists, e.g. search.iter_search_results()
+        workers: No. of batches requested concurrently
+
+    Yields:
+        List containing channels raw data of each batch of 50 channels, in the order of channels_ids
+
+    Request channels data while channels ID's are still arriving, e.g. from later search pages
+    """
+    for channels_batch, response in stream_batches(
+            lambda batch: _channels_request(service, batch),
+            rebatch(channels_ids),
+            workers):
+        yield order_items(response['items'], channels_batch)
+
+
 def extract_channel_data(data: list) -> pd.DataFrame:
     """
     Extract channel information from the YouTube API response
@@ -134,25 +174,16 @@ def filter_channels_by_criteria(data: list,
 
         Returns:
             List containing filtered channels
-    """
-    filtered_channels = []
 
-    # Filter channels and append them to list
-    for item in data:
-
-        # Check if subs are hidden and if hidden then add sub count '0'
-        subs_hidden = _channel_subs_hidden(item)
-        if subs_hidden:
-            # set the channel subs count to 0
-            item['statistics']['subscriberCount'] = '0'
-
-        # Get channel's uploaded videos count
-        vid_count = _grab_channel_video_count_from_statistics(item)
-        if int(vid_count) > min_vid_count:
-            subs = _grab_channel_subs_count_from_statistics(item)
-            if item not in filtered_channels:
-                if subs_hidden or subs_min < int(subs) < subs_max:
-                    filtered_channels.append(item)
+        Repeated channels are dropped by channel id, for more criteria
+        see filters.filter_channels()
+    """
+    # Channels with hidden subs count pass the subs criteria
+    filtered_channels = filter_channels(
+        data,
+        video_count_above(min_vid_count),
+        subs_between(subs_min, subs_max, include_hidden=True)
+    )
 
     print(f'Channels Dropped: {len(data) - len(filtered_channels)}')
     print(f'Channels Filtered: {len(filtered_channels)}')
@@ -160,7 +191,46 @@ def filter_channels_by_criteria(data: list,
     return filtered_channels  # Returns list of filtered channels
 
 
-def filter_active_channels(service, data: list, activity: int = 21) -> list:
+def request_latest_uploads(service,
+                           uploads_ids: list,
+                           workers: int = 1,
+                           batch_http: bool = False) -> dict:
+    """
+    Probe uploads playlists concurrently for the publish date of their most recent video
+
+    Args:
+        service: YouTube Service Instance
+        uploads_ids: List of channels uploads playlist ids
+        workers: No. of playlists probed concurrently
+        batch_http: Pack the probes into batch http requests
+
+    Returns:
+        dict: {uploads_id: 'YYYY-MM-DD'}, '' for playlists without videos or not found
+    """
+    responses = fetch_batches(
+        lambda uploads_id: service.playlistItems().list(
+            part='contentDetails',
+            playlistId=uploads_id,
+            maxResults=1
+        ),
+        uploads_ids,
+        workers,
+        service if batch_http else None,
+        missing={'items': []}  # Channels without an uploads playlist answer 404 playlistNotFound
+    )
+
+    return {
+        uploads_id: _grab_video_date_from_contentDetails(response['items'][0]) if response['items'] else ''
+        for uploads_id, response in zip(uploads_ids, responses)
+    }
+
+
+def filter_active_channels(service,
+                           data: list,
+                           activity: int = 21,
+                           workers: int = 1,
+                           batch_http: bool = False,
+                           latest_uploads: dict = None) -> list:
     """
         Filter channels based on their recent activity in no. of days
 
@@ -168,30 +238,34 @@ def filter_active_channels(service, data: list, activity: int = 21) -> list:
             service: YouTube Service Instance
             data: List of channels data retrieved from YouTube API response
             activity: int -> Last activity of channel in no. of days
+            workers: No. of channels probed concurrently
+            batch_http: Pack the probes into batch http requests
+            latest_uploads: dict {uploads_id: 'YYYY-MM-DD'} of known latest uploads.
+                Channels with a known upload inside the activity window are not
+                requested again, the dict is updated with the probed dates.
 
         Returns:
             List containing active channels
     """
 
-    active_channels = []  # Holds active channels
+    if latest_uploads is None:
+        latest_uploads = {}
 
     # Activity time from today
-    activity_time = dt.datetime.now() - dt.timedelta(days=activity)
+    activity_time = (dt.datetime.now() - dt.timedelta(days=activity)).strftime('%Y-%m-%d')
 
-    for item in data:
-        uploads = _grab_channel_playlist_id_from_contentDetails(item)
-        response = service.playlistItems().list(
-            part='contentDetails',
-            playlistId=uploads,
-            maxResults=1
-        ).execute()
+    uploads_ids = [_grab_channel_playlist_id_from_contentDetails(item) for item in data]
 
-        # Grabs recent published video time
-        vid_time = _grab_video_duration_from_contentDetails(response['items'][0])
-        vid_time = dt.datetime.strptime(vid_time, '%Y-%m-%d')
+    # Only channels without a known recent upload are probed
+    to_probe = list(dict.fromkeys(
+        uploads_id for uploads_id in uploads_ids
+        if latest_uploads.get(uploads_id, '') < activity_time
+    ))
+    latest_uploads.update(request_latest_uploads(service, to_probe, workers, batch_http))
 
-        if vid_time >= activity_time:
-            active_channels.append(item)
+    # Recent published video dates are compared as 'YYYY-MM-DD' strings
+    active_channels = [item for item, uploads_id in zip(data, uploads_ids)
+                       if latest_uploads[uploads_id] >= activity_time]
 
     print(f'In-active Channels Dropped: {len(data) - len(active_channels)}')
     print(f'Active Channels: {len(active_channels)}')
@@ -210,7 +284,7 @@ def get_channel_id(channel_link: str) -> str:
         str: Channel ID
     """
     req = requests.get(channel_link)
-    soup = BeautifulSoup(req.text, 'html.parser')
+    soup = bs4.BeautifulSoup(req.text, 'html.parser')
     return soup.find_all('meta', itemprop='channelId')[0]['content']
 
 
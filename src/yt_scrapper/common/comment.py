@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
+
+from .lazy import lazy_import
+from .fetch import execute
+from .service import error_reason
+from .sinks import arrow_schema
+from .sinks import typed_frame
+from .sinks import _import_pyarrow
+from .grab import _grab_next_page_token
+from .grab import _grab_thread_top_level_comment
+from .grab import _grab_thread_video_id
+from .grab import _grab_thread_reply_count
+from .grab import _grab_thread_replies
+from .grab import _grab_comment_text
+from .grab import _grab_comment_author
+from .grab import _grab_comment_author_channel
+from .grab import _grab_comment_likes
+from .grab import _grab_comment_published_date
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+COMMENTS_PAGE_SIZE = 100  # Max results of a single commentThreads or comments request
+COMMENTS_COLUMNS = ['video_id', 'thread_id', 'comment_id', 'parent_id', 'kind',
+                    'text', 'author', 'author_channel', 'likes', 'published_at', 'reply_count']
+_INT_COLUMNS = ('likes', 'reply_count')
+
+
+def iter_threads(
+        service,
+        threaded: bool = False,
+        **filters):
+    """
+    Parameters:
+        service: YouTube service instance
+        threaded: True if called from a worker thread
+        filters: Threads filter e.g. videoId='...' or allThreadsRelatedToChannelId='...'
+
+    Yields:
+        List of comment threads of each page
+    """
+    next_page_token = ''
+
+    while True:
+        params = {'pageToken': next_page_token} if next_page_token else {}
+
+        request = service.commentThreads().list(
+            part='snippet,replies',
+            maxResults=COMMENTS_PAGE_SIZE,
+            textFormat='plainText',
+            **filters,
+            **params
+        )
+        response = execute(request, threaded)
+
+        yield response['items']
+
+        next_page_token = _grab_next_page_token(response)
+        if not next_page_token:
+            break
+
+
+def request_replies(
+        service,
+        parent_id: str,
+        threaded: bool = False) -> list:
+    """
+    Parameters:
+        service: YouTube service instance
+        parent_id: Id of the thread top level comment
+        threaded: True if called from a worker thread
+
+    Returns:
+        List of all replies of the comment
+    """
+    replies = []
+    next_page_token = ''
+
+    while True:
+        params = {'pageToken': next_page_token} if next_page_token else {}
+
+        request = service.comments().list(
+            part='snippet',
+            parentId=parent_id,
+            maxResults=COMMENTS_PAGE_SIZE,
+            textFormat='plainText',
+            **params
+        )
+        response = execute(request, threaded)
+        replies.extend(response['items'])
+
+        next_page_token = _grab_next_page_token(response)
+        if not next_page_token:
+            break
+
+    return replies
+
+
+def thread_replies(service, thread, threaded: bool = False) -> list:
+    """
+    Returns all replies of the thread. Replies included in the thread are used
+    when complete, else they are paged with comments().list()
+    """
+    replies = _grab_thread_replies(thread)
+    if len(replies) < _grab_thread_reply_count(thread):
+        replies = request_replies(service, _grab_thread_top_level_comment(thread)['id'], threaded)
+
+    return replies
+
+
+class CommentsBuilder:
+    """
+    Collect threads and replies into preallocated column arrays of the
+    comments table, one row per comment: every thread top level comment
+    followed by its replies, linked to it by thread_id and parent_id.
+    Memory grows with the no. of rows only, no DataFrame cell is written
+    one at a time.
+
+    ...
+
+    Attributes:
+        capacity: int
+            Expected no. of comments, arrays grow if more are added
+
+    Methods:
+        add_thread():
+            Add thread and its replies
+        to_frame():
+            Returns comments Pandas DataFrame
+        to_arrow():
+            Returns comments pyarrow Table
+    """
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(capacity, 1)
+        self.columns = {column: np.zeros(capacity, dtype=np.int64) if column in _INT_COLUMNS
+                        else np.empty(capacity, dtype=object)
+                        for column in COMMENTS_COLUMNS}
+        self.rows = 0
+
+    def _reserve(self, needed: int):
+        """
+        Double the arrays when needed rows do not fit
+        """
+        capacity = len(self.columns['comment_id'])
+        if self.rows + needed <= capacity:
+            return
+
+        capacity = max(capacity * 2, self.rows + needed)
+        for column, values in self.columns.items():
+            grown = np.zeros(capacity, dtype=values.dtype) if values.dtype != object \
+                else np.empty(capacity, dtype=object)
+            grown[:self.rows] = values[:self.rows]
+            self.columns[column] = grown
+
+    def _add_comment(self, item, video_id: str, thread_id: str, kind: str, reply_count: int = 0):
+        row = self.rows
+        columns = self.columns
+        columns['video_id'][row] = video_id
+        columns['thread_id'][row] = thread_id
+        columns['comment_id'][row] = item['id']
+        columns['parent_id'][row] = thread_id if kind == 'reply' else ''
+        columns['kind'][row] = kind
+        columns['text'][row] = _grab_comment_text(item)
+        columns['author'][row] = _grab_comment_author(item)
+        columns['author_channel'][row] = _grab_comment_author_channel(item)
+        columns['likes'][row] = _grab_comment_likes(item)
+        columns['published_at'][row] = _grab_comment_published_date(item)
+        columns['reply_count'][row] = reply_count
+        self.rows += 1
+
+    def add_thread(self, thread, replies: list = None):
+        """
+        Args:
+            thread: Comment thread from commentThreads().list()
+            replies: All replies of the thread, inline replies are used if not provided
+        """
+        if replies is None:
+            replies = _grab_thread_replies(thread)
+
+        video_id = _grab_thread_video_id(thread)
+        self._reserve(1 + len(replies))
+        self._add_comment(_grab_thread_top_level_comment(thread), video_id, thread['id'], 'thread',
+                          _grab_thread_reply_count(thread))
+        for reply in replies:
+            self._add_comment(reply, video_id, thread['id'], 'reply')
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns:
+            Pandas DataFrame with COMMENTS_COLUMNS, replies refer to their thread by parent_id
+        """
+        return pd.DataFrame({column: values[:self.rows] for column, values in self.columns.items()})
+
+    def to_arrow(self):
+        """
+        Returns:
+            pyarrow Table typed by the 'comments' schema of the sinks
+        """
+        pa = _import_pyarrow()
+        return pa.Table.from_pandas(typed_frame(self.to_frame(), 'comments'),
+                                    schema=arrow_schema('comments'), preserve_index=False)
+
+
+def build_comments_table(
+        service,
+        comments_data: list,
+        workers: int = 8) -> CommentsBuilder:
+    """
+    Build the comments table in one pass over comments_data.
+    Replies not included in the threads are requested concurrently.
+
+    Parameters:
+        service: YouTube service instance
+        comments_data: List of comment threads e.g. from iter_threads()
+        workers: Max no. of requests in flight at the same time
+
+    Returns:
+        CommentsBuilder holding the table
+    """
+    builder = CommentsBuilder(sum(1 + _grab_thread_reply_count(thread) for thread in comments_data))
+
+    if workers <= 1:
+        for thread in comments_data:
+            builder.add_thread(thread, thread_replies(service, thread))
+        return builder
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        replies = pool.map(lambda thread: thread_replies(service, thread, True), comments_data)
+        for thread, thread_replies_data in zip(comments_data, replies):
+            builder.add_thread(thread, thread_replies_data)
+
+    return builder
+
+
+def crawl_video_comments(service, video_id: str, threaded: bool = False) -> pd.DataFrame:
+    """
+    Crawl all threads and replies of the video
+
+    Returns:
+        Pandas DataFrame of the comments, see CommentsBuilder, empty if comments are disabled
+    """
+    builder = CommentsBuilder()
+
+    try:
+        for threads in iter_threads(service, threaded, videoId=video_id):
+            for thread in threads:
+                builder.add_thread(thread, thread_replies(service, thread, threaded))
+    except HttpError as err:
+        if error_reason(err) != 'commentsDisabled':
+            raise
+        print(f'Comments are disabled for {video_id}')
+
+    return builder.to_frame()
+
+
+def iter_comments_frames(
+        service,
+        videos_ids,
+        workers: int = 8):
+    """
+    Crawl comments of many videos at the same time.
+    At most 2 * workers videos are held in memory.
+
+    Parameters:
+        service: YouTube service instance
+        videos_ids: Iterable of videos ids, it can be a generator
+        workers: Max no. of videos crawled at the same time
+
+    Yields:
+        tuple: (video_id, Pandas DataFrame of its comments) in the order of videos_ids
+    """
+    if workers <= 1:
+        for video_id in videos_ids:
+            yield video_id, crawl_video_comments(service, video_id)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+
+        for video_id in videos_ids:
+            in_flight.append((video_id, pool.submit(crawl_video_comments, service, video_id, True)))
+
+            if len(in_flight) >= 2 * workers:
+                video_id, future = in_flight.popleft()
+                yield video_id, future.result()
+
+        while in_flight:
+            video_id, future = in_flight.popleft()
+            yield video_id, future.result()
@@ -0,0 +1,170 @@
+import threading
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
+
+from .lazy import lazy_import
+
+httplib2 = lazy_import('httplib2')
+api_http = lazy_import('googleapiclient.http')
+
+
+BATCH_SIZE = 50  # Max ids accepted by a single 'list' request
+
+_local = threading.local()  # Holds http objects owned by each worker thread
+
+
+def _thread_http(http):
+    """
+    Returns an http object owned by the current thread.
+
+    httplib2.Http is not thread-safe, so every worker thread gets its own
+    connection (re-authorized when the service uses OAuth credentials).
+    Custom transports are returned as is and must be thread-safe themselves.
+    """
+    credentials = getattr(http, 'credentials', None)
+    if credentials is None and type(http) is not httplib2.Http:
+        return http
+
+    pool = getattr(_local, 'pool', None)
+    if pool is None:
+        pool = _local.pool = {}
+
+    key = id(credentials)
+    if key not in pool:
+        if credentials is None:
+            pool[key] = api_http.build_http()
+        else:
+            import google_auth_httplib2
+            pool[key] = google_auth_httplib2.AuthorizedHttp(credentials, http=api_http.build_http())
+
+    return pool[key]
+
+
+def execute(request, threaded: bool = None, missing: dict = None) -> dict:
+    """
+    Send request and receive response
+
+    Args:
+        request: YouTube API request object
+        threaded: True if request is executed from a worker thread,
+            detected from the current thread if not provided
+        missing: Response of a request answered with 404 Not Found, raised if not provided
+
+    Returns:
+        dict: Response of the request
+    """
+    if threaded is None:
+        threaded = threading.current_thread() is not threading.main_thread()
+
+    try:
+        if threaded and hasattr(request, 'http'):
+            return request.execute(http=_thread_http(request.http))
+
+        return request.execute()
+    except HttpError as err:
+        if missing is None or err.resp.status != 404:
+            raise
+        return missing
+
+
+def create_batches(ids: list, batch_size: int = BATCH_SIZE) -> list:
+    """
+    Split ids into batches of batch_size
+    """
+    return [ids[batch_range: batch_range + batch_size]
+            for batch_range in range(0, len(ids), batch_size)]
+
+
+def rebatch(pages, batch_size: int = BATCH_SIZE):
+    """
+    Regroup an iterable of id lists (e.g. playlist pages) into batches of batch_size.
+    Batches are yielded as soon as enough ids have arrived.
+    """
+    batch = []
+    for page in pages:
+        for item in page:
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
+
+
+def stream_batches(build_request,
+                   batches,
+                   workers: int = 1,
+                   missing: dict = None):
+    """
+    Create a request for every batch and execute them concurrently while
+    batches are still arriving. At most 2 * workers responses are held in memory.
+
+    Args:
+        build_request: Callable that receives a batch and returns a request object
+        batches: Iterable of batches, it can be a generator
+        workers: Max no. of requests in flight at the same time
+        missing: Response of requests answered with 404 Not Found, raised if not provided
+
+    Yields:
+        tuple: (batch, response) in the same order as batches
+    """
+    if workers <= 1:
+        for batch in batches:
+            yield batch, execute(build_request(batch), missing=missing)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+
+        for batch in batches:
+            # Requests are created in the calling thread, only execution is concurrent
+            in_flight.append((batch, pool.submit(execute, build_request(batch), True, missing)))
+
+            if len(in_flight) >= 2 * workers:
+                batch, future = in_flight.popleft()
+                yield batch, future.result()
+
+        while in_flight:
+            batch, future = in_flight.popleft()
+            yield batch, future.result()
+
+
+def fetch_batches(build_request,
+                  batches: list,
+                  workers: int = 1,
+                  batch_service=None,
+                  missing: dict = None) -> list:
+    """
+    Create a request for every batch and execute them concurrently
+
+    Args:
+        build_request: Callable that receives a batch and returns a request object
+        batches: List of batches, e.g. ids batches created by create_batches()
+        workers: Max no. of requests in flight at the same time
+        batch_service: YouTube Service Instance. If provided, requests are packed
+            into batch http requests of the service instead of being sent one by one
+        missing: Response of requests answered with 404 Not Found e.g. {'items': []},
+            raised if not provided
+
+    Returns:
+        List of responses in the same order as batches
+    """
+    if batch_service is not None:
+        from .batch import execute_batch
+        requests = [build_request(batch) for batch in batches]
+        return execute_batch(batch_service, requests, workers=workers, missing=missing)
+
+    return [response for _, response in stream_batches(build_request, batches, workers, missing)]
+
+
+def order_items(items: list, ids: list) -> list:
+    """
+    Sort response items in the order of requested ids.
+    Ids missing in the response (deleted, private etc.) are skipped.
+    """
+    items_by_id = {item['id']: item for item in items}
+    return [items_by_id[item_id] for item_id in ids if item_id in items_by_id]
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import re
+import datetime as dt
+
+from .lazy import lazy_import
+from .grab import _grab_channel_id
+from .grab import _grab_channel_title_from_snippet
+from .grab import _grab_channel_country_from_snippet
+from .grab import _grab_channel_subs_count_from_statistics
+from .grab import _grab_channel_view_count_from_statistics
+from .grab import _grab_channel_video_count_from_statistics
+from .grab import _grab_channel_published_date_from_snippet
+from .grab import _grab_channel_keywords_from_brandingSettings
+from .grab import _grab_channel_description_from_brandingSettings
+
+pd = lazy_import('pandas')
+
+
+class Predicate:
+    """
+    Channel filter that works on both raw channel items and channel frames
+
+    Predicates compose with & (and), | (or) and ~ (not):
+        subs_between(1000, 100000) & ~country_in(['US'])
+
+    ...
+
+    Attributes:
+        item_func:
+            Callable(item) -> bool, item is a raw channel from request_channels_data()
+        frame_func:
+            Callable(frame) -> boolean Series, frame is created by channels_frame()
+    """
+
+    def __init__(self, item_func, frame_func):
+        self.item_func = item_func
+        self.frame_func = frame_func
+
+    def __call__(self, item) -> bool:
+        return self.item_func(item)
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        return self.frame_func(frame)
+
+    def __and__(self, other):
+        return Predicate(lambda item: self(item) and other(item),
+                         lambda frame: self.mask(frame) & other.mask(frame))
+
+    def __or__(self, other):
+        return Predicate(lambda item: self(item) or other(item),
+                         lambda frame: self.mask(frame) | other.mask(frame))
+
+    def __invert__(self):
+        return Predicate(lambda item: not self(item),
+                         lambda frame: ~self.mask(frame))
+
+
+def _subs_hidden(item) -> bool:
+    return bool(item['statistics'].get('hiddenSubscriberCount', False))
+
+
+def subs_between(subs_min: int = 0,
+                 subs_max: int = 1000000000,
+                 include_hidden: bool = True) -> Predicate:
+    """
+    Channels with subs_min < subscribers < subs_max. Channels with hidden
+    subscribers count pass if include_hidden is True.
+    """
+    def item_func(item):
+        if _subs_hidden(item):
+            return include_hidden
+        return subs_min < int(_grab_channel_subs_count_from_statistics(item)) < subs_max
+
+    def frame_func(frame):
+        hidden = frame['subs_hidden']
+        in_range = (frame['subs'] > subs_min) & (frame['subs'] < subs_max)
+        return (in_range & ~hidden) | (hidden & include_hidden)
+
+    return Predicate(item_func, frame_func)
+
+
+def video_count_above(min_vid_count: int = 0) -> Predicate:
+    """
+    Channels with more than min_vid_count uploaded videos
+    """
+    return Predicate(lambda item: int(_grab_channel_video_count_from_statistics(item)) > min_vid_count,
+                     lambda frame: frame['video_count'] > min_vid_count)
+
+
+def country_in(countries: list) -> Predicate:
+    """
+    Channels of any of the countries e.g. ['US', 'GB']
+    """
+    countries = set(countries)
+    return Predicate(lambda item: _grab_channel_country_from_snippet(item) in countries,
+                     lambda frame: frame['country'].isin(countries))
+
+
+def created_between(start: dt.datetime = dt.datetime.min,
+                    end: dt.datetime = dt.datetime.max) -> Predicate:
+    """
+    Channels created on or after start and before end
+    """
+    def item_func(item):
+        created = dt.datetime.strptime(_grab_channel_published_date_from_snippet(item), '%Y-%m-%d')
+        return start <= created < end
+
+    def frame_func(frame):
+        created = frame['created_on']
+        mask = pd.Series(True, index=frame.index)
+        if start != dt.datetime.min:
+            mask &= created >= pd.Timestamp(start)
+        if end != dt.datetime.max:
+            mask &= created < pd.Timestamp(end)
+        return mask
+
+    return Predicate(item_func, frame_func)
+
+
+def keyword_regex(pattern: str, flags: int = re.IGNORECASE) -> Predicate:
+    """
+    Channels whose title, description or branding keywords match the regex pattern
+    """
+    search_pattern = re.compile(pattern, flags)
+
+    def item_func(item):
+        return any(search_pattern.search(text) for text in (
+            _grab_channel_title_from_snippet(item),
+            _grab_channel_description_from_brandingSettings(item),
+            _grab_channel_keywords_from_brandingSettings(item),
+        ))
+
+    def frame_func(frame):
+        mask = pd.Series(False, index=frame.index)
+        for column in ('title', 'description', 'keywords'):
+            mask |= frame[column].str.contains(search_pattern, regex=True, na=False)
+        return mask
+
+    return Predicate(item_func, frame_func)
+
+
+def unique_channels(data: list) -> list:
+    """
+    Drop repeated channels by channel id in linear time, first one is kept
+    """
+    channels = {}
+    for item in data:
+        channels.setdefault(_grab_channel_id(item), item)
+
+    return list(channels.values())
+
+
+def filter_channels(data: list, *predicates: Predicate) -> list:
+    """
+    Keep unique channels passing all predicates
+
+    Args:
+        data: List containing channels data from request_channels_data()
+        predicates: Predicates e.g. subs_between(1000, 10000), country_in(['US'])
+
+    Returns:
+        List containing filtered channels
+    """
+    return [item for item in unique_channels(data)
+            if all(predicate(item) for predicate in predicates)]
+
+
+def channels_frame(data: list) -> pd.DataFrame:
+    """
+    Build typed channel columns from request_channels_data() output for vectorized filtering
+
+    Returns:
+        Pandas DataFrame with columns channel_id, title, description, keywords,
+        country, subs, subs_hidden, video_count, view_count, created_on
+    """
+    data = unique_channels(data)
+
+    return pd.DataFrame({
+        'channel_id': [_grab_channel_id(item) for item in data],
+        'title': [_grab_channel_title_from_snippet(item) for item in data],
+        'description': [_grab_channel_description_from_brandingSettings(item) for item in data],
+        'keywords': [_grab_channel_keywords_from_brandingSettings(item) for item in data],
+        'country': [_grab_channel_country_from_snippet(item) for item in data],
+        'subs': pd.to_numeric([_grab_channel_subs_count_from_statistics(item) for item in data]),
+        'subs_hidden': [_subs_hidden(item) for item in data],
+        'video_count': pd.to_numeric([_grab_channel_video_count_from_statistics(item) for item in data]),
+        'view_count': pd.to_numeric([_grab_channel_view_count_from_statistics(item) for item in data]),
+        'created_on': pd.to_datetime([_grab_channel_published_date_from_snippet(item) for item in data],
+                                     format='%Y-%m-%d'),
+    })
+
+
+def filter_channels_frame(frame, *predicates: Predicate):
+    """
+    Vectorized filter over a channels frame
+
+    Args:
+        frame: Pandas DataFrame or pyarrow Table created by channels_frame()
+        predicates: Predicates e.g. subs_between(1000, 10000), country_in(['US'])
+
+    Returns:
+        Filtered rows, of the same type as frame
+    """
+    table = None
+    if not isinstance(frame, pd.DataFrame):
+        table, frame = frame, frame.to_pandas()  # pyarrow Table
+
+    frame = frame.drop_duplicates('channel_id')
+
+    mask = pd.Series(True, index=frame.index)
+    for predicate in predicates:
+        mask &= predicate.mask(frame)
+
+    frame = frame[mask]
+
+    if table is not None:
+        return type(table).from_pandas(frame, preserve_index=False)
+    return frame
@@ -1,8 +1,54 @@
+from __future__ import annotations
+
 import re
 import os
 import smtplib
+import functools
+
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# ISO-8601 video duration e.g. 'PT1H2M3S', 'P1DT2H', 'P2W'
+DURATION_PATTERN = re.compile(
+    r'P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?'
+)
+DURATION_UNITS = (7 * 24 * 60 ** 2, 24 * 60 ** 2, 60 ** 2, 60, 1)  # Seconds of each pattern group
+
+
+@functools.lru_cache(maxsize=4096)
+def _duration_seconds(duration: str) -> int:
+    """
+    Parse ISO-8601 duration in a single pass, results are memoized
+    """
+    match = DURATION_PATTERN.search(duration)
+    if match is None:
+        return 0
+
+    return sum(int(value) * unit for value, unit in zip(match.groups(), DURATION_UNITS) if value)
+
 
-import pandas as pd
+def convert_durations_to_seconds(durations) -> pd.Series:
+    """
+    Converts an array of video durations to seconds at once
+
+    Parameters:
+        durations: list, numpy array or Pandas Series of ISO-8601 durations e.g. 'PT1H2M3S'
+
+    Returns:
+        Pandas Series of int32 seconds, 0 for missing or invalid durations
+    """
+    if not isinstance(durations, pd.Series):
+        durations = pd.Series(durations, dtype=object)
+
+    # Durations repeat a lot, parse only the unique ones
+    codes, uniques = pd.factorize(durations)
+    seconds = np.array([_duration_seconds(str(duration)) for duration in uniques] + [0], dtype='int64')
+
+    # Missing durations have code -1, which picks the trailing 0
+    return pd.Series(seconds[codes], index=durations.index).astype('int32')
 
 
 def convert_duration_to_seconds(duration: str) -> int:
@@ -11,16 +57,20 @@ def convert_duration_to_seconds(duration: str) -> int:
 
     Parameters:
         duration: str ->.
-            time duration in format '00H00M00S'
+            ISO-8601 time duration e.g. 'PT00H00M00S', 'P1DT2H', 'P2W'
 
     Returns:
         int: total number of seconds
     """
+    return _duration_seconds(duration)
+
 
-    h = int(re.search('\d+H', duration)[0][:-1]) * 60 ** 2 if re.search('\d+H', duration) else 0
-    m = int(re.search('\d+M', duration)[0][:-1]) * 60 if re.search('\d+M', duration) else 0
-    s = int(re.search('\d+S', duration)[0][:-1]) if re.search('\d+S', duration) else 0
-    return h + m + s
+def csv_path(filename: str) -> str:
+    """
+    Returns path of the csv file created by create_csv(), /data next to the
+    current working directory, without changing the working directory
+    """
+    return os.path.join(os.path.dirname(os.getcwd()), 'data', f'{filename}.csv')
 
 
 def create_csv(data: pd.DataFrame, filename: str) -> None:
@@ -38,15 +88,14 @@ def create_csv(data: pd.DataFrame, filename: str) -> None:
     """
     print(f'Creating file: {filename}.csv')
 
-    os.chdir('..')
-    path = f'{os.getcwd()}/data'
+    path = csv_path(filename)
 
-    if not os.path.exists(path):
-        os.makedirs(path)
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
 
-    data.to_csv(f'{os.getcwd()}/data/{filename}.csv',
+    data.to_csv(path,
                 index=False)
-    print(f'File created at: {os.getcwd()}/data/{filename}.csv')
+    print(f'File created at: {path}')
 
 
 def add_data_to_dataframe(
@@ -96,6 +96,48 @@ def _grab_channel_view_count_from_statistics(item) -> str:
     return item['statistics']['viewCount']
 
 
+def _grab_channel_description_from_brandingSettings(item) -> str:
+    """
+    Grabs channel description from response 'channels.brandingSettings',
+    falls back to 'channels.snippet'
+    """
+    try:
+        return item['brandingSettings']['channel']['description']
+    except KeyError:
+        return item.get('snippet', {}).get('description', '')
+
+
+def _grab_channel_keywords_from_brandingSettings(item) -> str:
+    """
+    Grabs channel keywords string from response 'channels.brandingSettings'.
+    If no keywords found then returns empty string.
+    """
+    try:
+        return item['brandingSettings']['channel']['keywords']
+    except KeyError:
+        return ''
+
+
+def _grab_channel_keywords_list(item) -> list:
+    """
+    Grabs channel keywords from response 'channels.brandingSettings' as a list,
+    quoted keywords may contain spaces
+    e.g. 'food "street food" travel' -> ['food', 'street food', 'travel']
+    """
+    keywords = _grab_channel_keywords_from_brandingSettings(item)
+    if isinstance(keywords, list):
+        return keywords
+
+    words = []
+    for i, part in enumerate(keywords.split('"')):
+        part = part.strip()
+        if not part:
+            continue
+        words.extend([part] if i % 2 else part.split())
+
+    return words
+
+
 def _channel_subs_hidden(item) -> bool:
     """
     Checks if the channel's subscriber count is hidden or not from response 'channels.statistics'
@@ -229,6 +271,79 @@ def _grab_playlistId_from_search(item) -> str:
     return item['id']['playlistId']
 
 
+"""Comment related functionality"""
+"""
+    The following section contains functions that are related to YouTube Service responses
+    'commentThreads' and 'comments'
+"""
+
+
+def _grab_thread_top_level_comment(item) -> dict:
+    """
+    Grabs top level comment from response 'commentThreads.snippet'
+    """
+    return item['snippet']['topLevelComment']
+
+
+def _grab_thread_video_id(item) -> str:
+    """
+    Grabs id of the commented video from response 'commentThreads.snippet'
+    """
+    return item['snippet'].get('videoId', '')
+
+
+def _grab_thread_reply_count(item) -> int:
+    """
+    Grabs total no. of replies of the thread from response 'commentThreads.snippet'
+    """
+    return int(item['snippet']['totalReplyCount'])
+
+
+def _grab_thread_replies(item) -> list:
+    """
+    Grabs replies included in the response 'commentThreads.replies', at most 5 are included
+    """
+    try:
+        return item['replies']['comments']
+    except KeyError:
+        return []
+
+
+def _grab_comment_text(item) -> str:
+    """
+    Grabs comment text from response 'comments.snippet'
+    """
+    return item['snippet']['textDisplay']
+
+
+def _grab_comment_author(item) -> str:
+    """
+    Grabs comment author name from response 'comments.snippet'
+    """
+    return item['snippet']['authorDisplayName']
+
+
+def _grab_comment_author_channel(item) -> str:
+    """
+    Grabs comment author channel url from response 'comments.snippet'
+    """
+    return item['snippet'].get('authorChannelUrl', '')
+
+
+def _grab_comment_likes(item) -> int:
+    """
+    Grabs comment likes from response 'comments.snippet'
+    """
+    return int(item['snippet'].get('likeCount', 0))
+
+
+def _grab_comment_published_date(item) -> str:
+    """
+    Grabs comment published date from response 'comments.snippet'
+    """
+    return item['snippet']['publishedAt']
+
+
 """Common Functions for YouTube Api Service"""
 
 
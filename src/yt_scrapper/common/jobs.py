@@ -0,0 +1,317 @@
+import json
+import time
+import sqlite3
+import threading
+
+from .fetch import order_items
+from .fetch import stream_batches
+from .fetch import create_batches
+from .video import videos_frame
+from .video import _videos_request
+from .search import iter_search_pages
+from .channel import _channels_request
+from .channel import extract_channel_data
+from .channel import get_channel_uploads_id
+from .playlist import iter_playlist_pages
+
+
+CHECKPOINT_BATCHES = 20  # Batches written to the sink between two checkpoints
+
+
+class JobState:
+    """
+    Stores checkpoints of long running jobs in a SQLite database. Page
+    tokens and ids of every page are saved as soon as the page arrives and
+    batches are marked finished once their rows are committed to the sink,
+    so a job that stops on a quota error or a network failure resumes
+    exactly where it stopped.
+
+    ...
+
+    Attributes:
+        path: str
+            Path of the SQLite database file
+
+    Methods:
+        status():
+            Returns status of the job, '' if never started
+        set_status():
+            Stores status of the job
+        get_pages():
+            Returns saved pages of a job stage and the token to resume from
+        save_page():
+            Stores ids and next page token of a page
+        finished_batches():
+            Returns no. of the batches of a job stage already written
+        finish_batches():
+            Marks batches of a job stage written
+        reset():
+            Deletes all checkpoints of the job
+    """
+
+    def __init__(self, path: str = 'yt_jobs.sqlite'):
+        self.path = path
+        self._lock = threading.Lock()
+
+        # Waits for the lock when processes of a crawl write at the same time
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'job_id TEXT PRIMARY KEY, status TEXT, updated_at REAL);'
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'job_id TEXT, stage TEXT, page_no INTEGER, ids TEXT, next_page_token TEXT, '
+            'PRIMARY KEY (job_id, stage, page_no));'
+            'CREATE TABLE IF NOT EXISTS batches ('
+            'job_id TEXT, stage TEXT, batch_no INTEGER, '
+            'PRIMARY KEY (job_id, stage, batch_no));'
+        )
+        self.conn.commit()
+
+    def status(self, job_id: str) -> str:
+        with self._lock:
+            row = self.conn.execute('SELECT status FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+
+        return row[0] if row else ''
+
+    def set_status(self, job_id: str, status: str):
+        with self._lock:
+            self.conn.execute('REPLACE INTO jobs VALUES (?, ?, ?)', (job_id, status, time.time()))
+            self.conn.commit()
+
+    def get_pages(self, job_id: str, stage: str) -> tuple:
+        """
+        Returns:
+            tuple: (list of ids of each saved page, token to resume from, True if the last page was saved)
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT ids, next_page_token FROM pages WHERE job_id = ? AND stage = ? ORDER BY page_no',
+                (job_id, stage)
+            ).fetchall()
+
+        if not rows:
+            return [], '', False
+
+        return [json.loads(ids) for ids, _ in rows], rows[-1][1], not rows[-1][1]
+
+    def save_page(self, job_id: str, stage: str, page_no: int, ids: list, next_page_token: str):
+        with self._lock:
+            self.conn.execute('REPLACE INTO pages VALUES (?, ?, ?, ?, ?)',
+                              (job_id, stage, page_no, json.dumps(ids), next_page_token))
+            self.conn.commit()
+
+    def finished_batches(self, job_id: str, stage: str) -> set:
+        with self._lock:
+            rows = self.conn.execute('SELECT batch_no FROM batches WHERE job_id = ? AND stage = ?',
+                                     (job_id, stage)).fetchall()
+
+        return {row[0] for row in rows}
+
+    def finish_batches(self, job_id: str, stage: str, batches_no: list):
+        with self._lock:
+            self.conn.executemany('INSERT OR IGNORE INTO batches VALUES (?, ?, ?)',
+                                  [(job_id, stage, batch_no) for batch_no in batches_no])
+            self.conn.commit()
+
+    def reset(self, job_id: str):
+        with self._lock:
+            for table in ('jobs', 'pages', 'batches'):
+                self.conn.execute(f'DELETE FROM {table} WHERE job_id = ?', (job_id,))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def checkpointed_pages(state: JobState, job_id: str, stage: str, iter_pages, max_items: int = 0) -> list:
+    """
+    Collect all pages of a job stage, saved pages are reused and
+    requesting continues from the saved page token
+
+    Args:
+        state: JobState of the job
+        job_id: ID of the job
+        stage: Name of the stage e.g. 'playlist', 'search'
+        iter_pages: Callable receiving a page token and returning an
+            iterable of (ids, next page token) e.g. playlist.iter_playlist_pages()
+        max_items: Stop once this many unique ids are found, 0 for no limit
+
+    Returns:
+        List of ids of all pages
+    """
+    pages, page_token, finished = state.get_pages(job_id, stage)
+    if pages:
+        print(f'Resuming {job_id} ({stage}) after {len(pages)} saved pages')
+
+    seen = {item_id for page in pages for item_id in page}
+
+    if not finished and not (max_items and len(seen) >= max_items):
+        for ids, next_page_token in iter_pages(page_token):
+            state.save_page(job_id, stage, len(pages), ids, next_page_token)
+            pages.append(ids)
+
+            seen.update(ids)
+            if max_items and len(seen) >= max_items:
+                break
+
+    return [item_id for page in pages for item_id in page]
+
+
+def checkpointed_batches(state: JobState,
+                         job_id: str,
+                         stage: str,
+                         ids: list,
+                         build_request,
+                         process,
+                         sink,
+                         workers: int = 1,
+                         checkpoint_batches: int = CHECKPOINT_BATCHES):
+    """
+    Request ids in batches of 50 and write the processed rows to the sink.
+    Batches already written by a previous run are skipped, written batches
+    are marked finished every checkpoint_batches batches once the sink has
+    committed them, and when the job stops on an error. If the process is
+    killed, batches written since the last checkpoint are written again.
+
+    Args:
+        state: JobState of the job
+        job_id: ID of the job
+        stage: Name of the stage e.g. 'videos'
+        ids: All ids of the stage, in the same order on every run
+        build_request: Callable that receives a batch and returns a request object
+        process: Callable receiving (batch, response) and returning the rows to write
+        sink: Sink the rows are written to
+        workers: Max no. of requests in flight at the same time
+        checkpoint_batches: No. of batches written between two checkpoints
+    """
+    batches = list(enumerate(create_batches(ids)))
+    finished = state.finished_batches(job_id, stage)
+    if finished:
+        print(f'Resuming {job_id} ({stage}) after {len(finished)} of {len(batches)} batches')
+
+    pending = [(batch_no, batch) for batch_no, batch in batches if batch_no not in finished]
+    written = []
+
+    try:
+        responses = stream_batches(lambda item: build_request(item[1]), pending, workers)
+        for (batch_no, batch), response in responses:
+            sink.write(process(batch, response))
+            written.append(batch_no)
+
+            if len(written) >= checkpoint_batches:
+                sink.commit()
+                state.finish_batches(job_id, stage, written)
+                written = []
+    finally:
+        # Batches written before an error are kept, e.g. on quota errors or network failures
+        sink.commit()
+        state.finish_batches(job_id, stage, written)
+
+
+def channel_videos_job_id(channel_id: str) -> str:
+    return f'channel_videos:{channel_id}'
+
+
+def channels_by_keyword_job_id(query: str) -> str:
+    return f'channels_by_keyword:{query.strip().lower()}'
+
+
+def channel_videos_job(service,
+                       state: JobState,
+                       channel_id: str,
+                       sink,
+                       workers: int = 1):
+    """
+    Resumable extraction of channel all videos data
+
+    Args:
+        service: YouTube Service Instance
+        state: JobState where checkpoints are saved
+        channel_id: ID of the YouTube Channel
+        sink: Sink the videos are written to
+        workers: Max no. of requests in flight at the same time
+    """
+    job_id = channel_videos_job_id(channel_id)
+    if state.status(job_id) == 'done':
+        print(f'Job already finished: {job_id}')
+        return
+
+    state.set_status(job_id, 'running')
+
+    uploads_id = get_channel_uploads_id(service, channel_id)
+    videos_ids = checkpointed_pages(state, job_id, 'playlist',
+                                    lambda page_token: iter_playlist_pages(service, uploads_id, page_token))
+    print(f'Total Videos found: {len(videos_ids)}')
+
+    checkpointed_batches(
+        state, job_id, 'videos', videos_ids,
+        lambda batch: _videos_request(service, batch),
+        lambda batch, response: videos_frame(order_items(response['items'], batch)),
+        sink, workers
+    )
+
+    state.set_status(job_id, 'done')
+    print(f'Total videos data written: {sink.rows}')
+
+
+def channels_by_keyword_job(service,
+                            state: JobState,
+                            query: str,
+                            sink,
+                            workers: int = 1,
+                            max_results: int = 0,
+                            windows: list = None,
+                            filter_data=None):
+    """
+    Resumable search for channels by keyword and extraction of their data
+
+    Args:
+        service: YouTube Service Instance
+        state: JobState where checkpoints are saved
+        query: Search query
+        sink: Sink the channels are written to
+        workers: Max no. of requests in flight at the same time
+        max_results: Max no. of channels searched for, 0 for no limit
+        windows: Date windows from search.create_date_windows(), each one is searched
+            and checkpointed as its own stage
+        filter_data: Callable receiving a list of channels data and returning the channels to keep
+    """
+    job_id = channels_by_keyword_job_id(query)
+    if state.status(job_id) == 'done':
+        print(f'Job already finished: {job_id}')
+        return
+
+    state.set_status(job_id, 'running')
+
+    channel_ids = {}  # Ordered set of IDs'
+    for i, window in enumerate(windows or [None]):
+        filters = {'publishedAfter': window[0], 'publishedBefore': window[1]} if window else {}
+        if max_results and len(channel_ids) >= max_results:
+            break
+
+        ids = checkpointed_pages(
+            state, job_id, f'search:{i}',
+            lambda page_token: iter_search_pages(service, query, 'channel', page_token, **filters),
+            max_results - len(channel_ids) if max_results else 0
+        )
+        channel_ids.update(dict.fromkeys(ids))
+
+    channel_ids = list(channel_ids)
+    if max_results:
+        channel_ids = channel_ids[:max_results]
+    print(f"Total Channel's found: {len(channel_ids)}")
+
+    def process(batch, response):
+        channels_data = order_items(response['items'], batch)
+        if filter_data is not None:
+            channels_data = filter_data(channels_data)
+        return extract_channel_data(channels_data)
+
+    checkpointed_batches(
+        state, job_id, 'channels', channel_ids,
+        lambda batch: _channels_request(service, batch),
+        process, sink, workers
+    )
+
+    state.set_status(job_id, 'done')
+    print(f'Total channels data written: {sink.rows}')
@@ -0,0 +1,156 @@
+import re
+
+from .grab import _grab_channel_id
+from .grab import _grab_channel_keywords_list
+from .grab import _grab_channel_description_from_brandingSettings
+
+
+# Pattern parts that can't be a group of the combined regex: backreferences, group names and
+# conditionals would point to groups of other patterns, global inline flags would apply to all of them
+_STANDALONE_SYNTAX = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]|\(\?P[<=]|\(\?\(|\(\?[aiLmsux]+\)')
+
+
+class KeywordMatcher:
+    """
+    Match many keyword patterns in a single pass.
+
+    Patterns are compiled once into one alternation regex where every
+    pattern is a named group, so a text is scanned once whatever the no.
+    of patterns and the group that matched tells which pattern hit.
+    The scan finds non-overlapping hits only, so the other patterns are
+    confirmed on their own at the positions of the hits, e.g. 'food'
+    inside a 'street food' hit. Texts without any hit cost a single scan.
+    Patterns using backreferences, group names or global inline flags
+    are matched on their own instead of being part of the alternation.
+
+    ...
+
+    Attributes:
+        patterns: list
+            Keyword patterns e.g. ['cooking', 'street food', r'vlog\\d+']
+        literal: bool
+            If True patterns are matched as plain text instead of regex
+        flags: int
+            Regex flags, case insensitive by default
+
+    Methods:
+        find():
+            Returns patterns found in the text
+        match_channel():
+            Returns patterns found in channel description and branding keywords
+        filter_channels():
+            Returns channels matching any pattern with the patterns they hit
+    """
+
+    def __init__(self, patterns: list, literal: bool = False, flags: int = re.IGNORECASE):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if not patterns:
+            raise Exception('At least one keyword pattern is required')
+
+        self.patterns = list(dict.fromkeys(patterns))
+        self.literal = literal
+        self.flags = flags
+
+        sources = [re.escape(pattern) if literal else pattern for pattern in self.patterns]
+        self.singles = [self._compile(source, pattern) for source, pattern in zip(sources, self.patterns)]
+
+        self.standalone = [i for i, source in enumerate(sources) if _STANDALONE_SYNTAX.search(source)]
+        self.combined = [i for i in range(len(sources)) if i not in self.standalone]
+        self.compiled = re.compile(
+            '|'.join(f'(?P<p{i}>{sources[i]})' for i in self.combined),
+            flags
+        ) if self.combined else None
+
+    def _compile(self, source: str, pattern: str):
+        try:
+            return re.compile(source, self.flags)
+        except re.error as err:
+            raise Exception(f"'{pattern}' is not a valid keyword pattern: {err}")
+
+    def _matches_at(self, index: int, text: str, spans: list) -> bool:
+        """
+        Returns True if pattern at index matches at a position inside the hits,
+        a match anywhere else would have been a hit of the scan itself
+        """
+        pattern = self.singles[index]
+        return any(pattern.match(text, position)
+                   for start, end in spans
+                   for position in range(start, max(end, start + 1)))
+
+    def find(self, text: str, first: bool = False) -> list:
+        """
+        Args:
+            text: Text to be searched
+            first: Stop at the first hit
+
+        Returns:
+            List of patterns found in the text, in the order of patterns
+        """
+        if not text:
+            return []
+
+        found = set()
+        spans = []
+
+        if self.compiled is not None:
+            if first:
+                hit = self.compiled.search(text)
+                if hit:
+                    return [self.patterns[int(hit.lastgroup[1:])]]
+            else:
+                for hit in self.compiled.finditer(text):
+                    found.add(int(hit.lastgroup[1:]))
+                    spans.append(hit.span())
+
+        for i in self.standalone:
+            if self.singles[i].search(text):
+                if first:
+                    return [self.patterns[i]]
+                found.add(i)
+
+        if first:
+            return []
+
+        # Patterns overlapping a hit of another pattern
+        if spans:
+            found.update(i for i in self.combined if i not in found and self._matches_at(i, text, spans))
+
+        return [self.patterns[i] for i in sorted(found)]
+
+    def match_channel(self, item, first: bool = False) -> list:
+        """
+        Returns:
+            List of patterns found in the channel description or branding keywords
+        """
+        found = self.find(_grab_channel_description_from_brandingSettings(item), first)
+        if found and first:
+            return found
+
+        # Keywords are joined by a new line so no pattern can match across two keywords
+        found.extend(pattern for pattern in self.find('\n'.join(_grab_channel_keywords_list(item)), first)
+                     if pattern not in found)
+        return found
+
+    def filter_channels(self, data: list) -> list:
+        """
+        Keep unique channels matching at least one pattern
+
+        Args:
+            data: List containing channels data from request_channels_data()
+
+        Returns:
+            List of tuples (channel, patterns hit)
+        """
+        channels = {}
+        for item in data:
+            channel_id = _grab_channel_id(item)
+            if channel_id in channels:
+                continue
+
+            found = self.match_channel(item)
+            if found:
+                channels[channel_id] = (item, found)
+
+        print(f'Channels matching keywords: {len(channels)}')
+        return list(channels.values())
@@ -0,0 +1,32 @@
+import sys
+import importlib.util
+
+
+def lazy_import(name: str, package: str = None):
+    """
+    Import module on first attribute access, heavy modules e.g. pandas or
+    the discovery client are only loaded by the functions that use them.
+    Annotations of modules using it are not evaluated, see
+    'from __future__ import annotations'.
+
+    Args:
+        name: Module name, relative names need package e.g. lazy_import('.channel', __package__)
+        package: Package relative names are resolved against
+
+    Returns:
+        Module, loaded when one of its attributes is first used
+    """
+    name = importlib.util.resolve_name(name, package)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f'No module named {name!r}', name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
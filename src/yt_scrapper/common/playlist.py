@@ -1,4 +1,4 @@
-
+from googleapiclient.errors import HttpError
 
 from .grab import _grab_next_page_token
 from .grab import _grab_video_id_from_snippet
@@ -8,6 +8,63 @@ from .grab import _grab_next_page_token
 from .grab import _grab_next_page_token
 
 
+def iter_playlist_pages(
+        service,
+        playlist_id: str,
+        page_token: str = ''):
+    """
+    Parameters:
+        service: YouTube service instance
+        playlist_id: Playlist id of YouTube channel
+        page_token: Page to start from, e.g. token saved by a previous run
+
+    Yields:
+        tuple: (videos ids of the page, token of the next page or '' for the last page)
+    """
+
+    next_page_token = page_token
+
+    while True:
+        params = {'pageToken': next_page_token} if next_page_token else {}
+
+        # Create request to retrieve playlist items
+        request = service.playlistItems().list(
+            part='snippet',
+            playlistId=playlist_id,
+            maxResults=50,  # max results per request (maximum: 50)
+            **params
+        )
+
+        response = request.execute()  # Send request and receive response
+
+        items = response['items']  # Grabs only videos info from the response
+        next_page_token = _grab_next_page_token(response)
+
+        yield [_grab_video_id_from_snippet(item) for item in items], next_page_token
+
+        if not next_page_token:
+            break
+
+
+def iter_videos_id(
+        service,
+        playlist_id: str):
+    """
+    Parameters:
+        service: YouTube service instance
+        playlist_id: Playlist id of YouTube channel
+
+    Yields:
+        List of videos ids of each playlist page
+
+    Retrieve videos Id's from playlist page by page, the next page
+    is only requested once the previous one is consumed.
+    """
+
+    for videos_ids, _ in iter_playlist_pages(service, playlist_id):
+        yield videos_ids
+
+
 def get_videos_id(
         service,
         playlist_id: str) -> list or tuple:
@@ -22,58 +79,82 @@ def get_videos_id(
     Retrieve all videos Id's from playlist.
     """
 
+    video_ids = [video_id for page in iter_videos_id(service, playlist_id) for video_id in page]
+
+    print(f'Total Videos found: {len(video_ids)}')
+
+    return video_ids
+
+
+def sync_videos_id(
+        service,
+        playlist_id: str,
+        state,
+        write=None) -> list:
+    """
+    Parameters:
+        service: YouTube service instance
+        playlist_id: Uploads playlist id of YouTube channel
+        state: PlaylistState holding the videos found by the previous sync
+        write: Callable receiving the new videos ids e.g. writing their data,
+            the state is only updated once it returns so a failed write is synced again
+
+    Returns:
+        List of videos ids added to the playlist since the previous sync, newest first
+
+    Retrieve only new videos Id's from the playlist. Uploads playlists list the newest
+    videos first, so paging stops at the first already known video. The first page
+    is requested with the stored ETag and costs no parsing if nothing has changed.
+    """
+
+    etag, known_ids = state.get(playlist_id)
+    known = set(known_ids)
+
     video_ids = []
+    first_page_etag = ''
+    next_page_token = ''
 
-    # Adding KeyError exception handling for channel less than 50 videos
-    try:
-        # Create request to retrieve playlist items
+    while True:
+        params = {'pageToken': next_page_token} if next_page_token else {}
         request = service.playlistItems().list(
             part='snippet',
             playlistId=playlist_id,
-            maxResults=50  # Max results per request (maximum: 50)
+            maxResults=50,  # max results per request (maximum: 50)
+            **params
         )
 
-        response = request.execute()  # Send request and receive response
-
-        items = response['items']  # Grabs only videos info from the response
-
-        for item in items:
-            video_id = _grab_video_id_from_snippet(item)
-            video_ids.append(video_id)
+        # Revalidate the first page, unchanged playlist returns 304 Not Modified
+        if etag and not next_page_token:
+            request.headers['If-None-Match'] = etag
 
         try:
-            next_page_token = _grab_next_page_token(response)  # Grabs next page token
-        except KeyError:
-            next_page_token = ''
-
-        while next_page_token:
-            request = service.playlistItems().list(
-                part='snippet',
-                playlistId=playlist_id,
-                maxResults=50,  # max results per request (maximum: 50)
-                pageToken=next_page_token
-            )
+            response = request.execute()
+        except HttpError as err:
+            if err.resp.status == 304:
+                print(f'No new videos found in playlist: {playlist_id}')
+                return []
+            raise
 
-            response = request.execute()  # Send request
+        if not next_page_token:
+            first_page_etag = response.get('etag', '')
 
-            items = response['items']  # Grabs only videos info from the response
+        reached_known = False
+        for item in response['items']:
+            video_id = _grab_video_id_from_snippet(item)
+            if video_id in known:
+                reached_known = True
+                break
+            video_ids.append(video_id)
 
-            for item in items:
-                video_id = _grab_video_id_from_snippet(item)
-                video_ids.append(video_id)
+        next_page_token = _grab_next_page_token(response)
+        if reached_known or not next_page_token:
+            break
 
-            next_page_token = _grab_next_page_token(response)
+    print(f'New Videos found: {len(video_ids)}')
 
-        print(f'Total Videos found: {len(video_ids)}')
+    if video_ids and write is not None:
+        write(video_ids)
 
-    # If KeyError occurs, prints out the total videos found and pass the error
-    except KeyError as err:
-        # If KeyError is for next page than continue the script
-        if err == 'nextPageToken':
-            print(f'Total Videos found: {len(video_ids)}')
-            pass
-        else:
-            raise
+    state.update(playlist_id, first_page_etag, video_ids + known_ids)
 
     return video_ids
-
@@ -0,0 +1,275 @@
+import heapq
+import itertools
+import threading
+import contextlib
+
+import datetime as dt
+
+
+# Quota units charged by YouTube Data API per request
+QUOTA_COSTS = {
+    'search.list': 100,
+    'videos.list': 1,
+    'channels.list': 1,
+    'playlistItems.list': 1,
+    'commentThreads.list': 1,
+    'comments.list': 1,
+}
+WRITE_COST = 50  # Cost of insert, update and delete requests
+DAILY_QUOTA = 10000  # Default daily quota of an API key
+
+# Request priorities, lower value is admitted first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class QuotaExceeded(Exception):
+    """
+    Raised when no API key has enough quota left for the request
+    """
+
+
+def request_cost(resource: str, method: str) -> int:
+    """
+    Returns quota units charged for the request
+    """
+    if method in ('insert', 'update', 'delete'):
+        return WRITE_COST
+    return QUOTA_COSTS.get(f'{resource}.{method}', 1)
+
+
+def _quota_day() -> dt.date:
+    """
+    Returns the current quota day. Quota resets at midnight Pacific Time,
+    approximated as UTC-8.
+    """
+    return (dt.datetime.utcnow() - dt.timedelta(hours=8)).date()
+
+
+def mask_key(key: str) -> str:
+    """
+    Hides API key except its last 4 characters
+    """
+    return f'...{key[-4:]}' if key and len(key) > 4 else str(key)
+
+
+class QuotaScheduler:
+    """
+    Admits every request sent through a Service. Keeps a daily unit
+    budget per API key, spreads requests across keys in round-robin and
+    admits waiting requests by priority.
+
+    ...
+
+    Attributes:
+        keys: list
+            API keys whose quota is managed
+        budget: int
+            Daily quota units of each key, None to track usage without a local cap.
+            Keys are then only switched when the API answers quotaExceeded
+        max_concurrent: int
+            Max no. of requests in flight at the same time
+        on_exhausted: str
+            'raise' to fail fast with QuotaExceeded, 'wait' to pause until the quota resets
+        low_priority_reserve: float
+            Fraction of the budget low priority requests are not allowed to spend
+
+    Methods:
+        acquire():
+            Wait for a free slot and charge quota, returns the key to use
+        release():
+            Free the slot taken by acquire()
+        charge():
+            Charge quota without taking a slot
+        exhaust():
+            Mark key out of quota e.g. when API responds with quotaExceeded
+        priority():
+            Context manager setting priority of the requests created inside it
+        usage():
+            Returns live usage counters
+    """
+
+    def __init__(self,
+                 keys: list = None,
+                 budget: int = DAILY_QUOTA,
+                 max_concurrent: int = 32,
+                 on_exhausted: str = 'raise',
+                 low_priority_reserve: float = 0.1):
+
+        if on_exhausted not in ('raise', 'wait'):
+            raise Exception(f"'{on_exhausted}' is not an acceptable keyword. Acceptable keywords are: raise, wait")
+
+        self.keys = list(keys) if keys else [None]
+        self.budget = budget
+        self.max_concurrent = max_concurrent
+        self.on_exhausted = on_exhausted
+        self.low_priority_reserve = low_priority_reserve
+
+        self.used = {key: 0 for key in self.keys}  # Units spent per key
+        self.exhausted = set()  # Keys the API reported out of quota today
+        self.requests = {key: 0 for key in self.keys}  # Requests sent per key
+        self.endpoint_units = {}  # Units spent per endpoint e.g. 'search.list'
+        self.in_flight = 0
+
+        self._day = _quota_day()
+        self._next_key = 0
+        self._waiting = []  # Heap of (priority, order) of requests waiting for a slot
+        self._order = itertools.count()
+        self._local = threading.local()
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def priority(self, priority: int):
+        """
+        Requests created inside the context are admitted with priority
+        """
+        previous = self.current_priority()
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self) -> int:
+        return getattr(self._local, 'priority', PRIORITY_NORMAL)
+
+    def _reset_if_new_day(self):
+        day = _quota_day()
+        if day != self._day:
+            self._day = day
+            self.used = {key: 0 for key in self.keys}
+            self.exhausted.clear()
+
+    def _available(self, key, cost: int, priority: int) -> bool:
+        if key in self.exhausted:
+            return False
+        if self.budget is None:
+            return True
+
+        reserve = self.budget * self.low_priority_reserve if priority >= PRIORITY_LOW else 0
+        return self.budget - self.used[key] - cost >= reserve
+
+    def _pick_key(self, cost: int, priority: int, key=None):
+        """
+        Returns next key in round-robin order that can afford cost, else None
+        """
+        if key is not None:
+            return key if self._available(key, cost, priority) else None
+
+        for offset in range(len(self.keys)):
+            candidate = self.keys[(self._next_key + offset) % len(self.keys)]
+            if self._available(candidate, cost, priority):
+                self._next_key = (self._next_key + offset + 1) % len(self.keys)
+                return candidate
+
+        return None
+
+    def _charge(self, key, cost: int, endpoint: str):
+        self.used[key] += cost
+        self.requests[key] += 1
+        self.endpoint_units[endpoint] = self.endpoint_units.get(endpoint, 0) + cost
+
+    def _wait_for_quota(self, cost: int, endpoint: str):
+        """
+        Raise QuotaExceeded or wait on the condition until the quota resets
+        """
+        if self.on_exhausted == 'raise':
+            raise QuotaExceeded(f'Not enough quota left for {endpoint} ({cost} units)')
+
+        self._condition.wait(timeout=60)
+        self._reset_if_new_day()
+
+    def acquire(self, cost: int, endpoint: str = '', priority: int = None, key=None):
+        """
+        Wait until the request is first in line and a slot is free,
+        then charge cost to an API key
+
+        Args:
+            cost: Quota units of the request
+            endpoint: Name of the endpoint e.g. 'search.list'
+            priority: Priority of the request, defaults to current_priority()
+            key: Charge this key instead of picking one in round-robin
+
+        Returns:
+            API key to send the request with
+        """
+        if priority is None:
+            priority = self.current_priority()
+
+        with self._condition:
+            ticket = (priority, next(self._order))
+            heapq.heappush(self._waiting, ticket)
+            self._condition.notify_all()  # Wake requests waiting for quota, ticket may come first
+            try:
+                while True:
+                    if self._waiting[0] == ticket and self.in_flight < self.max_concurrent:
+                        self._reset_if_new_day()
+                        chosen = self._pick_key(cost, priority, key)
+                        if chosen is not None:
+                            break
+                        self._wait_for_quota(cost, endpoint)
+                    else:
+                        self._condition.wait()
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+            self._charge(chosen, cost, endpoint)
+            self.in_flight += 1
+
+        return chosen
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def charge(self, cost: int, endpoint: str = '', key=None):
+        """
+        Charge quota without taking a slot, e.g. for sub-requests of a batch http request
+        """
+        with self._condition:
+            self._reset_if_new_day()
+            chosen = self._pick_key(cost, PRIORITY_HIGH, key)
+            while chosen is None:
+                self._wait_for_quota(cost, endpoint)
+                chosen = self._pick_key(cost, PRIORITY_HIGH, key)
+            self._charge(chosen, cost, endpoint)
+
+        return chosen
+
+    def exhaust(self, key):
+        """
+        Mark key out of quota for the rest of the day
+        """
+        with self._condition:
+            self.exhausted.add(key)
+            self._condition.notify_all()
+
+    def _remaining(self, key):
+        if key in self.exhausted:
+            return 0
+        return None if self.budget is None else self.budget - self.used[key]
+
+    def usage(self) -> dict:
+        """
+        Returns:
+            dict: units used and remaining per key (None without a budget),
+            units per endpoint and requests in flight
+        """
+        with self._condition:
+            self._reset_if_new_day()
+            return {
+                'keys': {
+                    mask_key(key): {
+                        'used': self.used[key],
+                        'remaining': self._remaining(key),
+                        'requests': self.requests[key],
+                    } for key in self.keys
+                },
+                'endpoints': dict(self.endpoint_units),
+                'in_flight': self.in_flight,
+                'waiting': len(self._waiting),
+            }
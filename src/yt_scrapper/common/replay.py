@@ -0,0 +1,251 @@
+import json
+import time
+import zlib
+import random
+import sqlite3
+import hashlib
+import threading
+
+from email.parser import BytesParser
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from .lazy import lazy_import
+from .retry import RETRY_STATUS
+from .retry import RETRY_REASONS
+
+httplib2 = lazy_import('httplib2')
+api_http = lazy_import('googleapiclient.http')
+
+
+REPLAY_MODES = ('replay', 'record', 'auto')
+IGNORED_PARAMS = ('key',)  # Query parameters left out of the request key, API keys are never stored
+MATCHED_HEADERS = ('if-none-match',)  # Request headers that change the response
+# Reasons of 403 responses that depend on the moment or the key, they are never stored
+TRANSIENT_REASONS = RETRY_REASONS + ('quotaExceeded', 'dailyLimitExceeded')
+
+
+class ReplayMiss(Exception):
+    """
+    Request has no stored response in replay mode
+    """
+    pass
+
+
+def request_key(method: str, uri: str, body=None, headers: dict = None) -> str:
+    """
+    Creates a key for the request from its method, path, sorted query
+    parameters without the API key, body and conditional headers.
+    Host is left out, so 'www.googleapis.com' and 'youtube.googleapis.com'
+    requests of a batch match the same response.
+    """
+    parts = urlsplit(uri)
+    params = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                    if name not in IGNORED_PARAMS)
+    key = f'{method.upper()} {parts.path}?{urlencode(params)}'
+
+    headers = {name.lower(): value for name, value in (headers or {}).items()}
+    for name in MATCHED_HEADERS:
+        if headers.get(name):
+            key += f' {name}={headers[name]}'
+
+    if body:
+        body = body.encode() if isinstance(body, str) else body
+        key += f' body={hashlib.sha1(body).hexdigest()}'
+
+    return key
+
+
+def is_transient(status: int, content: bytes) -> bool:
+    """
+    Returns True for temporary failures e.g. 503 or rateLimitExceeded, a stored one
+    would be replayed forever instead of the response of the request sent again
+    """
+    if status in RETRY_STATUS:
+        return True
+    if status != 403:
+        return False
+
+    try:
+        reason = json.loads(content)['error']['errors'][0]['reason']
+    except (ValueError, KeyError, IndexError, TypeError):
+        return False
+    return reason in TRANSIENT_REASONS
+
+
+class ReplayHttp:
+    """
+    httplib2 compatible transport that records real responses in a SQLite
+    file and serves them back offline. Pass it to YouTube(key, http=...)
+    or discovery build(..., http=...) to run the scraper without quota.
+
+    Batch http requests are split into their sub-requests, each one is
+    recorded and replayed on its own and the multipart response is
+    assembled again, so recordings work with and without batch_http.
+    Temporary failures e.g. 503 or rateLimitExceeded are passed through
+    without being stored, the retried request is recorded instead.
+    It is thread safe and shared by the worker threads as it is.
+
+    ...
+
+    Attributes:
+        path: str
+            Path of the SQLite file responses are stored in
+        mode: str
+            'replay' serves stored responses only and raises ReplayMiss for others,
+            'record' sends every request upstream and stores its response,
+            'auto' replays stored responses and records missing ones
+        http:
+            Upstream transport of record and auto modes, httplib2.Http by default
+        latency: float
+            Seconds every round trip takes in replay, to measure the scraper
+            under network latency
+        jitter: float
+            Max extra seconds added to the latency at random
+
+    Methods:
+        request():
+            Send request, same signature as httplib2.Http.request()
+        stats():
+            Returns counters of replayed and recorded requests
+    """
+
+    def __init__(self,
+                 path: str = 'yt_replay.sqlite',
+                 mode: str = 'replay',
+                 http=None,
+                 latency: float = 0.0,
+                 jitter: float = 0.0):
+
+        if mode not in REPLAY_MODES:
+            raise Exception(f"'{mode}' is not an acceptable keyword. Acceptable keywords are: {', '.join(REPLAY_MODES)}")
+
+        self.path = path
+        self.mode = mode
+        self.http = http
+        self.latency = latency
+        self.jitter = jitter
+        self.replayed = 0
+        self.recorded = 0
+
+        self._lock = threading.Lock()
+        self._upstream = threading.local()  # Upstream http object of each thread, httplib2.Http is not thread safe
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB)'
+        )
+        self.conn.commit()
+
+    def _load(self, key: str):
+        with self._lock:
+            row = self.conn.execute('SELECT status, headers, body FROM responses WHERE key = ?', (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        status, headers, body = row
+        return status, json.loads(headers), zlib.decompress(body)
+
+    def _store(self, key: str, status: int, headers: dict, body: bytes):
+        with self._lock:
+            self.conn.execute('REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                              (key, status, json.dumps(headers), zlib.compress(body)))
+            self.conn.commit()
+
+    def _send_upstream(self, uri: str, method: str, body, headers: dict) -> tuple:
+        http = self.http
+        if http is None:
+            http = getattr(self._upstream, 'http', None)
+            if http is None:
+                http = self._upstream.http = api_http.build_http()
+
+        response, content = http.request(uri, method=method, body=body, headers=headers)
+        content = content.encode() if isinstance(content, str) else content
+        return response.status, {name: value for name, value in response.items() if name != 'status'}, content
+
+    def _respond(self, uri: str, method: str, body, headers: dict) -> tuple:
+        """
+        Returns:
+            tuple: (status, headers, body) of the stored or upstream response
+        """
+        key = request_key(method, uri, body, headers)
+
+        if self.mode != 'record':
+            stored = self._load(key)
+            if stored is not None:
+                with self._lock:
+                    self.replayed += 1
+                return stored
+            if self.mode == 'replay':
+                raise ReplayMiss(f'No recorded response for {key}')
+
+        status, response_headers, content = self._send_upstream(uri, method, body, headers)
+        if is_transient(status, content):
+            return status, response_headers, content
+
+        self._store(key, status, response_headers, content)
+        with self._lock:
+            self.recorded += 1
+
+        return status, response_headers, content
+
+    def _respond_batch(self, uri: str, body, headers: dict) -> tuple:
+        """
+        Answer every sub-request of a batch http request and assemble the multipart response
+        """
+        body = body.encode() if isinstance(body, str) else body
+        content_type = {name.lower(): value for name, value in headers.items()}['content-type']
+        message = BytesParser().parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode() + body)
+
+        scheme, host = urlsplit(uri)[:2]
+        boundary = f'batch_{hashlib.sha1(body).hexdigest()[:16]}'
+        parts = []
+
+        for part in message.get_payload():
+            # Sub-request is serialized as 'GET /path HTTP/1.1', headers, blank line, body
+            head, _, sub_body = part.get_payload().replace('\r\n', '\n').partition('\n\n')
+            lines = head.strip().splitlines()
+            method, path, _ = lines[0].split(' ', 2)
+            sub_headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+
+            status, response_headers, content = self._respond(f'{scheme}://{host}{path}', method,
+                                                              sub_body.strip() or None, sub_headers)
+            response_type = response_headers.get('content-type', 'application/json; charset=UTF-8')
+            parts.append(
+                f'--{boundary}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{part["Content-ID"].strip("<>")}>\r\n\r\n'
+                f'HTTP/1.1 {status} OK\r\nContent-Type: {response_type}\r\n\r\n'.encode()
+                + content + b'\r\n'
+            )
+
+        content = b''.join(parts) + f'--{boundary}--'.encode()
+        return 200, {'content-type': f'multipart/mixed; boundary={boundary}'}, content
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        """
+        Returns:
+            tuple: (httplib2.Response, content bytes) like httplib2.Http.request()
+        """
+        headers = headers or {}
+        content_type = {name.lower(): value for name, value in headers.items()}.get('content-type', '')
+
+        if content_type.startswith('multipart/mixed') and urlsplit(uri).path.startswith('/batch'):
+            status, response_headers, content = self._respond_batch(uri, body, headers)
+        else:
+            status, response_headers, content = self._respond(uri, method, body, headers)
+
+        # A batch http request is a single round trip
+        if self.mode != 'record' and (self.latency or self.jitter):
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        return httplib2.Response({**response_headers, 'status': status}), content
+
+    def stats(self) -> dict:
+        with self._lock:
+            stored = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+        return {'replayed': self.replayed, 'recorded': self.recorded, 'stored': stored}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,232 @@
+import json
+import time
+import random
+import threading
+import http.client
+
+from googleapiclient.errors import HttpError
+
+from .lazy import lazy_import
+
+httplib2 = lazy_import('httplib2')
+
+
+RETRY_STATUS = (429, 500, 502, 503, 504)  # Status codes of temporary failures
+RETRY_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'backendError', 'internalError')
+
+DEFAULT_RETRIES = 5  # No. of times a failed request is sent again
+BASE_DELAY = 1  # Seconds waited before the first retry, doubled on every retry
+MAX_DELAY = 64  # Max seconds waited between two attempts
+
+
+def error_reason(err: HttpError) -> str:
+    """
+    Grabs reason of the error from YouTube API error response e.g. 'rateLimitExceeded'
+    """
+    try:
+        content = err.content.decode() if isinstance(err.content, bytes) else err.content
+        return json.loads(content)['error']['errors'][0]['reason']
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return ''
+
+
+def network_errors() -> tuple:
+    """
+    Returns exception types of network failures, httplib2 is loaded on first use
+    """
+    return OSError, httplib2.HttpLib2Error, http.client.HTTPException
+
+
+def classify_error(err: Exception) -> str:
+    """
+    Classify error of a request
+
+    Returns:
+        'retry' for temporary failures e.g. rateLimitExceeded, 5xx, network errors,
+        'fatal' for errors that fail again if the request is sent again e.g. 400, 404, quotaExceeded
+    """
+    if isinstance(err, HttpError):
+        if err.resp.status in RETRY_STATUS:
+            return 'retry'
+        if err.resp.status == 403 and error_reason(err) in RETRY_REASONS:
+            return 'retry'
+        return 'fatal'
+
+    if isinstance(err, network_errors()):
+        return 'retry'
+
+    return 'fatal'
+
+
+def _error_name(err: Exception) -> str:
+    if isinstance(err, HttpError):
+        return str(err.resp.status)
+    return type(err).__name__
+
+
+class TokenBucket:
+    """
+    Client side rate limit, at most rate requests per second on
+    average with bursts of up to capacity requests
+
+    ...
+
+    Attributes:
+        rate: float
+            Tokens added per second
+        capacity: int
+            Max no. of tokens held by the bucket
+    """
+
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1):
+        """
+        Wait until tokens are available and take them
+        """
+        tokens = min(tokens, self.capacity)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class Metrics:
+    """
+    Thread safe per endpoint counters of requests, errors, retries and latency
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, endpoint: str) -> dict:
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = {'requests': 0, 'errors': {}, 'retries': 0,
+                                        'total_latency': 0.0, 'max_latency': 0.0}
+        return self.endpoints[endpoint]
+
+    def record(self, endpoint: str, latency: float, error: Exception = None, requests: int = 1):
+        with self._lock:
+            counters = self._endpoint(endpoint)
+            counters['requests'] += requests
+            counters['total_latency'] += latency * requests
+            counters['max_latency'] = max(counters['max_latency'], latency)
+
+            # 304 Not Modified answers a conditional request, it is not an error
+            if error is not None and not (isinstance(error, HttpError) and error.resp.status == 304):
+                name = _error_name(error)
+                counters['errors'][name] = counters['errors'].get(name, 0) + requests
+
+    def record_retry(self, endpoint: str, requests: int = 1):
+        with self._lock:
+            self._endpoint(endpoint)['retries'] += requests
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: {endpoint: requests, errors per status or exception, retries, avg and max latency in seconds}
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': counters['requests'],
+                    'errors': dict(counters['errors']),
+                    'retries': counters['retries'],
+                    'avg_latency': counters['total_latency'] / counters['requests'] if counters['requests'] else 0,
+                    'max_latency': counters['max_latency'],
+                } for endpoint, counters in self.endpoints.items()
+            }
+
+
+class RetryPolicy:
+    """
+    Central executor of requests. Temporary failures are sent again
+    after an exponential backoff with full jitter, fatal errors are
+    raised at once. Every attempt waits for the token bucket and is
+    recorded in the metrics.
+
+    ...
+
+    Attributes:
+        retries: int
+            Max no. of times a failed request is sent again
+        base_delay: float
+            Seconds waited before the first retry, doubled on every retry
+        max_delay: float
+            Max seconds waited between two attempts
+        rate: float
+            Max requests per second, None for no client side limit
+        burst: int
+            Max no. of requests sent at once within the rate
+
+    Methods:
+        call():
+            Execute function with retries, rate limit and metrics
+        delay():
+            Returns seconds to wait before the retry attempt
+    """
+
+    def __init__(self,
+                 retries: int = DEFAULT_RETRIES,
+                 base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY,
+                 rate: float = None,
+                 burst: int = None):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.metrics = Metrics()
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def throttle(self, requests: int = 1):
+        """
+        Wait for the rate limit
+        """
+        if self.bucket is not None:
+            self.bucket.acquire(requests)
+
+    def call(self, func, endpoint: str = ''):
+        """
+        Args:
+            func: Callable sending the request and returning its response
+            endpoint: Name of the endpoint metrics are recorded for e.g. 'videos.list'
+
+        Returns:
+            Response returned by func
+        """
+        for attempt in range(self.retries + 1):
+            self.throttle()
+            start = time.monotonic()
+            try:
+                response = func()
+            except Exception as err:
+                self.metrics.record(endpoint, time.monotonic() - start, err)
+                if attempt == self.retries or classify_error(err) != 'retry':
+                    raise
+
+                delay = self.delay(attempt)
+                print(f'{endpoint or "Request"} failed ({_error_name(err)}), retrying in {delay:.1f}s...')
+                self.metrics.record_retry(endpoint)
+                time.sleep(delay)
+            else:
+                self.metrics.record(endpoint, time.monotonic() - start)
+                return response
@@ -1,5 +1,10 @@
 
 
+import datetime as dt
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .fetch import execute
 from .grab import _grab_next_page_token
 from .grab import _grab_search_result_kind
 from .grab import _grab_videoId_from_search
@@ -7,89 +12,210 @@ from .grab import _grab_channelId_from_search
 from .grab import _grab_playlistId_from_search
 
 
-def search_by_keyword(service,
-                      query: str,
-                      search_type: str = 'video,channel,playlist'):
+def _grab_search_result_id(item) -> str:
     """
-    Search on YouTube for channels, videos, and playlists for the provided keyword and return their IDs'
-    Args:
-        service: YouTube Service Instance
-        query: Search query | Your search keyword
-        search_type: Specify your search type. Acceptable keywords are channel, video, playlist.
-
-    Returns:
-        List of your selected type IDs'
+    Grabs channel, video or playlist id of the search result
     """
+    kind = _grab_search_result_kind(item)
+    if kind == 'youtube#channel':
+        return _grab_channelId_from_search(item)
+    elif kind == 'youtube#video':
+        return _grab_videoId_from_search(item)
+    elif kind == 'youtube#playlist':
+        return _grab_playlistId_from_search(item)
+    else:
+        # Raise KeyError if no item kind found
+        raise KeyError(kind)
+
 
+def _check_search_type(search_type: str) -> str:
     # Strip and lower the string
     search_type = search_type.strip().lower()
     if search_type not in 'video,channel,playlist':
         raise Exception(f'{search_type} is not an acceptable keyword. Acceptable keywords are: '
                         f'video, channel, playlist')
 
-    response = service.search().list(
-        q=query,
-        part='snippet',
-        type=search_type,
-        maxResults=50
-    ).execute()
-
-    ids = []  # Holds IDs'
-
-    items = response['items']
-    for item in items:
-        kind = _grab_search_result_kind(item)
-        if kind == 'youtube#channel':
-            item_id = _grab_channelId_from_search(item)
-        elif kind == 'youtube#video':
-            item_id = _grab_videoId_from_search(item)
-        elif kind == 'youtube#playlist':
-            item_id = _grab_playlistId_from_search(item)
-        else:
-            # Raise KeyError if no item kind found
-            raise KeyError(kind)
-
-        if item_id not in ids:
-            ids.append(item_id)  # Appends IDs' to the list
-
-    try:
-        next_page_token = _grab_next_page_token(response)
-    except KeyError:
-        next_page_token = False
+    return search_type
+
 
-    while next_page_token:
-        response = service.search().list(
+def iter_search_pages(service,
+                      query: str,
+                      search_type: str = 'video,channel,playlist',
+                      page_token: str = '',
+                      **filters):
+    """
+    Request search pages starting from page_token
+    Args:
+        service: YouTube Service Instance
+        query: Search query | Your search keyword
+        search_type: Specify your search type. Acceptable keywords are channel, video, playlist.
+        page_token: Page to start from, e.g. token saved by a previous run
+        filters: Other search parameters e.g. publishedAfter, publishedBefore
+
+    Yields:
+        tuple: (IDs' of the page, token of the next page or '' for the last page)
+    """
+    search_type = _check_search_type(search_type)
+    next_page_token = page_token
+
+    while True:
+        params = {'pageToken': next_page_token} if next_page_token else {}
+        response = execute(service.search().list(
             q=query,
             part='snippet',
             type=search_type,
             maxResults=50,
-            pageToken=next_page_token
-        ).execute()
-
-        items = response['items']
-        for item in items:
-            kind = _grab_search_result_kind(item)
-            if kind == 'youtube#channel':
-                item_id = _grab_channelId_from_search(item)
-            elif kind == 'youtube#video':
-                item_id = _grab_videoId_from_search(item)
-            elif kind == 'youtube#playlist':
-                item_id = _grab_playlistId_from_search(item)
-            else:
-                # Raise KeyError if no item kind found
-                raise KeyError(kind)
-
-            if item_id not in ids:
-                ids.append(item_id)  # Appends IDs' to the list
-
-        try:
-            next_page_token = _grab_next_page_token(response)
-        except KeyError:
-            next_page_token = False
+            **filters,
+            **params
+        ))
+        next_page_token = _grab_next_page_token(response)
+
+        yield [_grab_search_result_id(item) for item in response['items']], next_page_token
+
+        if not next_page_token:
+            break
+
+
+def iter_search_results(service,
+                        query: str,
+                        search_type: str = 'video,channel,playlist',
+                        max_results: int = 0,
+                        max_pages: int = 0,
+                        **filters):
+    """
+    Search on YouTube for channels, videos, and playlists for the provided keyword and yield their IDs'
+    page by page
+    Args:
+        service: YouTube Service Instance
+        query: Search query | Your search keyword
+        search_type: Specify your search type. Acceptable keywords are channel, video, playlist.
+        max_results: Stop once this many IDs' are found, 0 for no limit
+        max_pages: Stop after this many pages (100 quota units each), 0 for no limit
+        filters: Other search parameters e.g. publishedAfter, publishedBefore
+
+    Yields:
+        List of IDs' of each search page not found in the previous pages
+    """
+
+    seen = set()  # IDs' already yielded
+    pages = 0
+
+    for page, _ in iter_search_pages(service, query, search_type, **filters):
+        pages += 1
+
+        ids = []
+        for item_id in page:
+            if item_id not in seen:
+                seen.add(item_id)
+                ids.append(item_id)
+
+        if max_results and len(seen) >= max_results:
+            # Drop the IDs' found after the limit
+            yield ids[:len(ids) - (len(seen) - max_results)]
+            break
+
+        yield ids
+
+        if pages == max_pages:
+            break
 
+
+def search_by_keyword(service,
+                      query: str,
+                      search_type: str = 'video,channel,playlist',
+                      max_results: int = 0,
+                      max_pages: int = 0):
+    """
+    Search on YouTube for channels, videos, and playlists for the provided keyword and return their IDs'
+    Args:
+        service: YouTube Service Instance
+        query: Search query | Your search keyword
+        search_type: Specify your search type. Acceptable keywords are channel, video, playlist.
+        max_results: Stop once this many IDs' are found, 0 for no limit
+        max_pages: Stop after this many pages (100 quota units each), 0 for no limit
+
+    Returns:
+        List of your selected type IDs'
+    """
+
+    ids = [item_id
+           for page in iter_search_results(service, query, search_type, max_results, max_pages)
+           for item_id in page]
+
+    search_type = search_type.strip().lower()
     if len(search_type) == 22:
         print(f'{len(ids)} items found in the search')
     else:
         print(f'Total {search_type.capitalize()}\'s found: {len(ids)}')
 
     return ids
+
+
+def create_date_windows(shards: int,
+                        start: dt.datetime = dt.datetime(2005, 4, 23),
+                        end: dt.datetime = None) -> list:
+    """
+    Split time between start and end into equal windows
+
+    Args:
+        shards: No. of windows
+        start: Start of the first window, defaults to the first YouTube upload
+        end: End of the last window, defaults to now
+
+    Returns:
+        List of (publishedAfter, publishedBefore) RFC 3339 strings, newest window first
+    """
+    end = end or dt.datetime.utcnow()
+    step = (end - start) / shards
+    edges = [start + step * shard for shard in range(shards)] + [end]
+
+    windows = [(after.strftime('%Y-%m-%dT%H:%M:%SZ'), before.strftime('%Y-%m-%dT%H:%M:%SZ'))
+               for after, before in zip(edges, edges[1:])]
+
+    return windows[::-1]
+
+
+def search_sharded(service,
+                   query: str,
+                   search_type: str = 'video,channel,playlist',
+                   windows: list = None,
+                   workers: int = 4,
+                   max_results: int = 0,
+                   max_pages: int = 0) -> list:
+    """
+    Search in sub-queries of publishedAfter/publishedBefore windows running concurrently.
+    Each query returns ~500 results at most, windows get past this cap.
+
+    Args:
+        service: YouTube Service Instance
+        query: Search query | Your search keyword
+        search_type: Specify your search type. Acceptable keywords are channel, video, playlist.
+        windows: List of (publishedAfter, publishedBefore), see create_date_windows()
+        workers: No. of windows searched concurrently
+        max_results: Max IDs' returned in total, 0 for no limit. A window may hold
+            all of them, so each window stops at this many IDs' as well
+        max_pages: Max pages per window, 0 for no limit
+
+    Returns:
+        List of unique IDs' in the order of windows, the newest windows are kept
+        when more than max_results are found
+    """
+    windows = windows or create_date_windows(workers)
+
+    def search_window(window):
+        after, before = window
+        return [item_id
+                for page in iter_search_results(service, query, search_type, max_results, max_pages,
+                                                publishedAfter=after, publishedBefore=before)
+                for item_id in page]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(windows)))) as pool:
+        results = list(pool.map(search_window, windows))
+
+    ids = list(dict.fromkeys(item_id for window_ids in results for item_id in window_ids))
+    if max_results:
+        ids = ids[:max_results]
+
+    print(f'Total IDs\' found in {len(windows)} windows: {len(ids)}')
+
+    return ids
@@ -0,0 +1,347 @@
+import copy
+import json
+import functools
+import threading
+
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+from googleapiclient.errors import HttpError
+
+from .lazy import lazy_import
+from .cache import cache_key
+from .quota import request_cost
+from .quota import QuotaExceeded
+from .retry import error_reason
+
+discovery = lazy_import('googleapiclient.discovery')
+api_http = lazy_import('googleapiclient.http')
+
+
+CACHEABLE_METHODS = ('list',)  # Read only methods whose responses can be cached
+QUOTA_ERRORS = ('quotaExceeded', 'dailyLimitExceeded')  # Error reasons of a key out of quota
+
+
+@functools.lru_cache(maxsize=None)
+def discovery_document(api_service: str, api_version: str) -> dict:
+    """
+    Returns discovery document of the API bundled with the discovery client,
+    parsed once per process and shared by the services of every key.
+    None if the installed client has no bundled document.
+    """
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+    except ImportError:  # google-api-python-client < 2.0
+        return None
+
+    document = get_static_doc(api_service, api_version)
+    return json.loads(document) if document else None
+
+
+def build_service(api_service: str, api_version: str, **kwargs):
+    """
+    Creates service instance of the discovery client from the bundled
+    discovery document, without fetching it over the network
+
+    Args:
+        api_service: API name e.g. 'youtube'
+        api_version: API version e.g. 'v3'
+        kwargs: Arguments of discovery.build() e.g. developerKey, credentials
+
+    Returns:
+        Service instance of the discovery client
+    """
+    document = discovery_document(api_service, api_version)
+    if document is None:
+        return discovery.build(api_service, api_version, **kwargs)
+
+    return discovery.build_from_document(document, **kwargs)
+
+
+def _with_key(request, key):
+    """
+    Returns copy of the discovery client request with key as its 'key' query parameter
+    """
+    parts = urlsplit(request.uri)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if key is None or ('key', key) in params:
+        return request
+    if not any(name == 'key' for name, _ in params):
+        raise Exception(f"'{parts.path}' has no API key in its uri, it can't be sent with another key")
+
+    recreated = copy.copy(request)
+    recreated.headers = dict(request.headers)
+    query = urlencode([(name, key if name == 'key' else value) for name, value in params])
+    recreated.uri = parts._replace(query=query).geturl()
+    return recreated
+
+
+class Request:
+    """
+    Wraps a YouTube API request object, every execute() goes through the
+    cache and quota scheduler of the Service it was created from.
+
+    ...
+
+    Attributes:
+        service: Service
+            Service the request is created from
+        resource: str
+            API resource e.g. 'videos', 'channels'
+        method: str
+            Resource method e.g. 'list'
+        params: dict
+            Parameters the request is created with
+        request: HttpRequest
+            Request object created by the discovery client
+        cost: int
+            Quota units charged for the request
+        priority: int
+            Priority the quota scheduler admits the request with
+        key: str
+            API key the request was last sent or charged with
+    """
+
+    def __init__(self, service, resource: str, method: str, params: dict, request):
+        self.service = service
+        self.resource = resource
+        self.method = method
+        self.params = params
+        self.request = request
+        self.cache_key = cache_key(resource, method, params)
+        self.stale = None  # Expired cached response being revalidated
+
+        self.endpoint = f'{resource}.{method}'
+        self.cost = request_cost(resource, method)
+        self.priority = service.scheduler.current_priority() if service.scheduler else None
+        self.key = service.key  # Key the request was last charged to
+
+    @property
+    def http(self):
+        return self.request.http
+
+    @property
+    def headers(self) -> dict:
+        return self.request.headers
+
+    @property
+    def cacheable(self) -> bool:
+        return self.service.cache is not None and self.method in CACHEABLE_METHODS
+
+    def lookup(self):
+        """
+        Returns fresh cached response of the request or None. The ETag of an
+        expired response is sent with If-None-Match, so an unchanged response
+        costs a 304 instead of a full payload, see revalidated()
+        """
+        self.stale = None
+        if not self.cacheable:
+            return None
+
+        response, fresh = self.service.cache.lookup(self.cache_key, self.resource)
+        if fresh:
+            return response
+
+        # Headers set by the caller e.g. playlist.sync_videos_id() are left as they are
+        if response is not None and response.get('etag') and self.service.cache.revalidate \
+                and 'If-None-Match' not in self.headers:
+            self.stale = response
+            self.headers['If-None-Match'] = response['etag']
+
+        return None
+
+    def revalidated(self, err: Exception):
+        """
+        Returns the expired cached response if err is 304 Not Modified for its ETag, else None
+        """
+        if self.stale is None or not isinstance(err, HttpError) or err.resp.status != 304:
+            return None
+
+        self.service.cache.refresh(self.cache_key, self.resource)
+        return self.stale
+
+    def store(self, response: dict):
+        """
+        Store response of the request in the cache
+        """
+        if self.cacheable:
+            self.service.cache.set(self.cache_key, self.resource, response)
+
+    def execute(self, http=None) -> dict:
+        """
+        Send request and receive response, answered from the cache if possible
+        """
+        response = self.lookup()
+        if response is not None:
+            return response
+
+        try:
+            response = self.send(http)
+        except HttpError as err:
+            response = self.revalidated(err)
+            if response is None:
+                raise
+            return response
+
+        self.store(response)
+        return response
+
+    def charge(self):
+        """
+        Charge quota of the request to a key picked by the quota scheduler, used by
+        batch http requests. Keys out of quota are skipped, see execute_batch()
+
+        Returns:
+            Request of the discovery client sending with the charged key
+        """
+        scheduler = self.service.scheduler
+        if scheduler is None:
+            return self.request
+
+        self.key = scheduler.charge(self.cost, self.endpoint)
+        return self.service.recreate(self, self.key)
+
+    def send(self, http=None) -> dict:
+        """
+        Send request through the retry policy of the service, temporary
+        failures e.g. rateLimitExceeded or 5xx are sent again after a backoff
+        """
+        if self.service.retry is None:
+            return self._send(http)
+
+        return self.service.retry.call(lambda: self._send(http), self.endpoint)
+
+    def _send(self, http=None) -> dict:
+        """
+        Send request with the API key picked by the quota scheduler. If the
+        key turns out to be out of quota, request is sent again with the next key.
+        """
+        scheduler = self.service.scheduler
+        if scheduler is None:
+            return self.request.execute(http=http)
+
+        for _ in scheduler.keys:
+            key = self.key = scheduler.acquire(self.cost, self.endpoint, self.priority)
+            try:
+                return self.service.recreate(self, key).execute(http=http)
+            except HttpError as err:
+                if error_reason(err) not in QUOTA_ERRORS:
+                    raise
+                print('Quota exceeded for API key, switching key...')
+                scheduler.exhaust(key)
+            finally:
+                scheduler.release()
+
+        raise QuotaExceeded(f'All API keys are out of quota for {self.endpoint}')
+
+
+class Resource:
+    """
+    Wraps a resource of the discovery client e.g. service.videos()
+    """
+
+    def __init__(self, service, name: str, resource):
+        self.service = service
+        self.name = name
+        self.resource = resource
+
+    def __getattr__(self, method):
+        attr = getattr(self.resource, method)
+        if method.startswith('_') or not callable(attr):
+            return attr
+
+        def create_request(*args, **kwargs):
+            # Unwrap requests passed back to the client e.g. list_next(request, response)
+            args = [arg.request if isinstance(arg, Request) else arg for arg in args]
+            request = attr(*args, **kwargs)
+            if not isinstance(request, api_http.HttpRequest):
+                return request
+
+            params = kwargs if kwargs else {'uri': request.uri}
+            return Request(self.service, self.name, method, params, request)
+
+        return create_request
+
+
+class Service:
+    """
+    Wraps YouTube service instance created by the discovery client.
+    It can be used in place of the service instance, the requests
+    created from it are answered from the cache when one is provided,
+    are admitted by the quota scheduler and are retried by the retry policy.
+
+    ...
+
+    Attributes:
+        services: dict
+            {api_key: YouTube service instance}, a single instance can be passed as well.
+            Instances that are None are created by factory when first used
+        cache: Cache
+            Response cache, see common/cache.py
+        scheduler: QuotaScheduler
+            Quota scheduler, see common/quota.py
+        retry: RetryPolicy
+            Retry, rate limit and metrics of every request, see common/retry.py
+        factory:
+            Callable(api_key) creating the service instance of a key
+    """
+
+    def __init__(self, service, cache=None, scheduler=None, retry=None, factory=None):
+        if isinstance(service, dict):
+            self.services = dict(service)
+        else:
+            self.services = {scheduler.keys[0] if scheduler else None: service}
+
+        self.key = next(iter(self.services))  # Key of the service requests are created from
+        self.cache = cache
+        self.scheduler = scheduler
+        self.retry = retry
+        self.factory = factory
+        self._lock = threading.Lock()
+
+    def client(self, key):
+        """
+        Returns service instance of key, created on first use
+        """
+        service = self.services.get(key)
+        if service is None and self.factory is not None:
+            with self._lock:
+                service = self.services.get(key)
+                if service is None:
+                    service = self.services[key] = self.factory(key)
+
+        return service
+
+    @property
+    def service(self):
+        return self.client(self.key)
+
+    def recreate(self, request: Request, key):
+        """
+        Returns the discovery client request of request, created again
+        from the service of key if it differs from the one it was created with.
+        Requests created from a uri e.g. list_next() get the key in their uri
+        """
+        if 'uri' in request.params:
+            return _with_key(request.request, key)
+
+        if key == self.key or key not in self.services:
+            return request.request
+
+        recreated = getattr(getattr(self.client(key), request.resource)(), request.method)(**request.params)
+        recreated.headers.update(request.request.headers)
+        return recreated
+
+    def __getattr__(self, name):
+        attr = getattr(self.service, name)
+        if name.startswith('_') or name.startswith('new_') or not callable(attr):
+            return attr
+
+        def create_resource(*args, **kwargs):
+            resource = attr(*args, **kwargs)
+            if not isinstance(resource, discovery.Resource):
+                return resource
+            return Resource(self, name, resource)
+
+        return create_resource
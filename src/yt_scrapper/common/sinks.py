@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+import os
+import csv
+import sys
+import uuid
+
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+
+# Typed columns of each resource: {column: arrow type name}
+SCHEMAS = {
+    'videos': {
+        'title': 'string',
+        'date': 'date32',
+        'views': 'int64',
+        'URL': 'string',
+        'duration': 'int32',
+        'likes': 'int64',
+        'dislikes': 'int64',
+        'comments': 'int64',
+        'channel_id': 'string',
+    },
+    'channels': {
+        'custom_URL': 'string',
+        'channel_URL': 'string',
+        'Title': 'string',
+        'Subs': 'int64',
+        'Country': 'string',
+        'email': 'string',
+        'Channel_created_on': 'date32',
+        'Total_Videos': 'int64',
+        'Total_Views': 'int64',
+    },
+    'comments': {
+        'video_id': 'string',
+        'thread_id': 'string',
+        'comment_id': 'string',
+        'parent_id': 'string',
+        'kind': 'string',
+        'text': 'string',
+        'author': 'string',
+        'author_channel': 'string',
+        'likes': 'int64',
+        'published_at': 'timestamp',
+        'reply_count': 'int64',
+    },
+}
+ROW_GROUP_SIZE = 64 * 1024  # Rows buffered per partition before a row group is written
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('pyarrow is required for parquet output: pip install pyarrow')
+
+    return pyarrow
+
+
+def arrow_schema(resource: str):
+    """
+    Returns arrow schema of the resource
+    """
+    pa = _import_pyarrow()
+    types = {
+        'string': pa.string(),
+        'int32': pa.int32(),
+        'int64': pa.int64(),
+        'date32': pa.date32(),
+        'timestamp': pa.timestamp('s', tz='UTC'),
+    }
+    return pa.schema([(column, types[kind]) for column, kind in SCHEMAS[resource].items()])
+
+
+def typed_frame(data, resource: str) -> pd.DataFrame:
+    """
+    Convert records or DataFrame of the resource to typed columns.
+    Counts become integers, dates become datetimes and values
+    like 'NaN' that can not be parsed become missing values.
+
+    Args:
+        data: List of records or Pandas DataFrame
+        resource: 'videos', 'channels' or 'comments'
+
+    Returns:
+        Pandas DataFrame with the columns of the resource schema
+    """
+    frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    typed = {}
+
+    for column, kind in SCHEMAS[resource].items():
+        values = frame[column] if column in frame else pd.Series([None] * len(frame), dtype=object)
+
+        if kind in ('int32', 'int64'):
+            values = pd.to_numeric(values, errors='coerce').astype('Int32' if kind == 'int32' else 'Int64')
+        elif kind == 'date32':
+            values = pd.to_datetime(values, errors='coerce').dt.date
+        elif kind == 'timestamp':
+            values = pd.to_datetime(values, errors='coerce', utc=True)
+        else:
+            values = values.astype(object).where(values.notna(), None)
+
+        typed[column] = values.reset_index(drop=True)
+
+    return pd.DataFrame(typed)
+
+
+class Sink:
+    """
+    Base class of output sinks. Data is written incrementally with
+    write() and files are finalized with close().
+
+    Sinks can be used as context manager:
+        with ParquetSink('data/videos', 'videos') as sink:
+            for page in pages:
+                sink.write(page)
+    """
+
+    def write(self, data):
+        raise NotImplementedError
+
+    def commit(self):
+        """
+        Make everything written so far durable, e.g. before a checkpoint is saved
+        """
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(Sink):
+    """
+    Append records to a csv file, header is written only to a new file.
+    With append=False an existing file is truncated first. Records appended
+    to an existing file are written in the order of its header, a file with
+    other columns e.g. written before a column was added can't be appended to.
+    """
+
+    def __init__(self, path: str, resource: str = None, append: bool = True):
+        self.path = path
+        self.resource = resource
+        self.rows = 0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        if not append:
+            open(path, 'w').close()
+
+    def write(self, data):
+        frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        if frame.empty:
+            return
+
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if not new_file:
+            frame = frame[self._header(list(frame.columns))]
+        frame.to_csv(self.path, mode='a', header=new_file, index=False)
+        self.rows += len(frame)
+
+    def _header(self, columns: list) -> list:
+        """
+        Returns columns of the existing file, if they are the same as columns
+        """
+        with open(self.path, encoding='utf-8', newline='') as file:
+            header = next(csv.reader(file), [])
+
+        if sorted(header) != sorted(map(str, columns)):
+            raise Exception(f"'{self.path}' has the columns {header}, rows with the columns {columns} "
+                            f"can't be appended to it, write them to a new file")
+        return header
+
+
+class NdjsonSink(Sink):
+    """
+    Write records as newline delimited JSON, one object per line. Lines
+    are flushed after every write so a reader of the pipe or file gets
+    each page as soon as it arrives.
+
+    ...
+
+    Attributes:
+        path: str
+            Path of the file records are written to, '-' for stdout
+        resource: str
+            Resource of the records e.g. 'videos'
+        append: bool
+            If False an existing file is truncated first
+    """
+
+    def __init__(self, path: str = '-', resource: str = None, append: bool = True):
+        self.path = path
+        self.resource = resource
+        self.rows = 0
+
+        if path == '-':
+            self.file = sys.stdout
+        else:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, data):
+        frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        if frame.empty:
+            return
+
+        lines = frame.to_json(orient='records', lines=True, date_format='iso', force_ascii=False)
+        lines = lines.replace('\\/', '/')  # pandas escapes every '/' of the urls
+        self.file.write(lines if lines.endswith('\n') else lines + '\n')
+        self.file.flush()
+        self.rows += len(frame)
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class ParquetSink(Sink):
+    """
+    Write typed records of a resource as partitioned parquet dataset.
+
+    Rows are buffered per partition and written as a row group once
+    row_group_size rows are collected, so large exports are never held
+    in memory. Every sink writes new part files, appending to a dataset
+    never rewrites existing files. With append=False the part files of
+    previous runs are removed first. A path ending with '.parquet', or '-'
+    for stdout, is written as a single file instead of a dataset, a file
+    can't be appended to so an existing one is only replaced with append=False.
+
+    ...
+
+    Attributes:
+        path: str
+            Directory of the dataset, or single file path
+        resource: str
+            'videos', 'channels' or 'comments'
+        partition_by: tuple
+            Columns partitioning the dataset e.g. ('channel_id', 'date'),
+            stored as 'column=value' directories
+        row_group_size: int
+            No. of rows written per row group
+        append: bool
+            If False the dataset or file of previous runs is replaced
+    """
+
+    def __init__(self,
+                 path: str,
+                 resource: str,
+                 partition_by: tuple = (),
+                 row_group_size: int = ROW_GROUP_SIZE,
+                 append: bool = True):
+        self.pa = _import_pyarrow()
+        self.path = path
+        self.resource = resource
+        self.partition_by = tuple(partition_by)
+        self.single_file = path == '-' or path.endswith('.parquet')
+        if self.single_file and self.partition_by:
+            raise Exception(f"'{path}' is a single file, partition_by needs a dataset directory")
+        if self.single_file and append and path != '-' and os.path.exists(path) and os.path.getsize(path):
+            raise Exception(f"'{path}' is a single parquet file and can't be appended to, "
+                            f"write to a dataset directory or replace it with append=False")
+        if not self.single_file and not append:
+            self._remove_parts()
+
+        self.row_group_size = row_group_size
+        self.schema = arrow_schema(resource)
+        self.file_schema = self.pa.schema([field for field in self.schema
+                                           if field.name not in self.partition_by])
+        self.rows = 0
+
+        self._part = uuid.uuid4().hex  # Name of the files written by this sink
+        self._stdout = sys.stdout.buffer if path == '-' else None  # Taken before stdout is redirected
+        self._buffers = {}  # {partition values: [DataFrame]}
+        self._buffered = {}  # {partition values: no. of buffered rows}
+        self._writers = {}  # {partition values: ParquetWriter}
+
+    def _remove_parts(self):
+        """
+        Remove part files of previous runs and the partition directories left empty
+        """
+        for directory, _, files in os.walk(self.path, topdown=False):
+            for name in files:
+                if name.startswith('part-') and name.endswith('.parquet'):
+                    os.remove(os.path.join(directory, name))
+            if directory != self.path and not os.listdir(directory):
+                os.rmdir(directory)
+
+    def _partition_path(self, values: tuple) -> str:
+        if self.single_file:
+            return self.path
+
+        directories = [f'{column}={value}' for column, value in zip(self.partition_by, values)]
+        return os.path.join(self.path, *directories, f'part-{self._part}.parquet')
+
+    def write(self, data):
+        frame = typed_frame(data, self.resource)
+        if frame.empty:
+            return
+
+        if self.partition_by:
+            groups = frame.groupby([frame[column].astype(str) for column in self.partition_by], sort=False)
+        else:
+            groups = [((), frame)]
+
+        for values, group in groups:
+            values = values if isinstance(values, tuple) else (values,)
+            self._buffers.setdefault(values, []).append(group)
+            self._buffered[values] = self._buffered.get(values, 0) + len(group)
+
+            if self._buffered[values] >= self.row_group_size:
+                self._flush(values)
+
+        self.rows += len(frame)
+
+    def _flush(self, values: tuple):
+        """
+        Write buffered rows of the partition as a row group
+        """
+        frames = self._buffers.pop(values, [])
+        self._buffered.pop(values, None)
+        if not frames:
+            return
+
+        # Partition columns are stored in the directory names only
+        frame = pd.concat(frames, ignore_index=True).drop(columns=list(self.partition_by))
+        table = self.pa.Table.from_pandas(frame, schema=self.file_schema, preserve_index=False)
+
+        writer = self._writers.get(values)
+        if writer is None:
+            path = self._partition_path(values)
+            if self._stdout is not None:
+                path = self._stdout
+            elif os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            writer = self._writers[values] = self.pa.parquet.ParquetWriter(path, self.file_schema)
+
+        writer.write_table(table, row_group_size=self.row_group_size)
+
+    def commit(self):
+        """
+        Write buffered rows and finalize the part files, next rows go to new part files.
+        A single file stays open, its buffered rows are written as row groups
+        """
+        if self.single_file:
+            for values in list(self._buffers):
+                self._flush(values)
+            return
+
+        self.close()
+        self._part = uuid.uuid4().hex
+
+    def close(self):
+        for values in list(self._buffers):
+            self._flush(values)
+
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+
+def create_sink(path: str, resource: str, output_format: str = 'csv', **kwargs) -> Sink:
+    """
+    Create sink of the output format
+
+    Args:
+        path: File path for csv and ndjson, dataset directory or .parquet file for parquet,
+            '-' writes ndjson or a parquet file to stdout
+        resource: 'videos', 'channels' or 'comments'
+        output_format: 'csv', 'ndjson' or 'parquet'
+        kwargs: Passed to the sink e.g. partition_by, append
+
+    Returns:
+        Sink
+    """
+    if output_format == 'csv':
+        return CsvSink(path, resource, **kwargs)
+    elif output_format == 'ndjson':
+        return NdjsonSink(path, resource, **kwargs)
+    elif output_format == 'parquet':
+        return ParquetSink(path, resource, **kwargs)
+
+    raise Exception(f"'{output_format}' is not an acceptable keyword. Acceptable keywords are: csv, ndjson, parquet")
@@ -0,0 +1,42 @@
+import asyncio
+
+from .video import iter_videos_data
+from .playlist import iter_videos_id
+from .search import iter_search_results
+
+
+async def aiterate(iterable):
+    """
+    Iterate a blocking iterable from asyncio code. Every next() runs
+    in the default executor, so the event loop is never blocked.
+    """
+    loop = asyncio.get_event_loop()
+    iterator = iter(iterable)
+    done = object()
+
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, done)
+        if item is done:
+            break
+        yield item
+
+
+def aiter_videos_id(service, playlist_id: str):
+    """
+    Async iterator variant of playlist.iter_videos_id()
+    """
+    return aiterate(iter_videos_id(service, playlist_id))
+
+
+def aiter_search_results(service, query: str, search_type: str = 'video,channel,playlist'):
+    """
+    Async iterator variant of search.iter_search_results()
+    """
+    return aiterate(iter_search_results(service, query, search_type))
+
+
+def aiter_videos_data(service, videos_ids, workers: int = 1):
+    """
+    Async iterator variant of video.iter_videos_data()
+    """
+    return aiterate(iter_videos_data(service, videos_ids, workers))
@@ -0,0 +1,66 @@
+import json
+import time
+import sqlite3
+import threading
+
+
+KNOWN_IDS_LIMIT = 200  # No. of most recent video ids remembered per playlist
+
+
+class PlaylistState:
+    """
+    Stores per playlist sync state in a SQLite database, used by
+    playlist.sync_videos_id() to request only the videos added since the last sync
+
+    ...
+
+    Attributes:
+        path: str
+            Path of the SQLite database file
+
+    Methods:
+        get():
+            Returns (etag, known video ids) of the playlist
+        update():
+            Stores etag and most recent video ids of the playlist
+    """
+
+    def __init__(self, path: str = 'yt_sync.sqlite'):
+        self.path = path
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS playlists ('
+            'playlist_id TEXT PRIMARY KEY, etag TEXT, video_ids TEXT, synced_at REAL)'
+        )
+        self.conn.commit()
+
+    def get(self, playlist_id: str) -> tuple:
+        """
+        Returns:
+            tuple: (etag, list of known video ids newest first), ('', []) if never synced
+        """
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT etag, video_ids FROM playlists WHERE playlist_id = ?', (playlist_id,)
+            ).fetchone()
+
+        if row is None:
+            return '', []
+
+        return row[0], json.loads(row[1])
+
+    def update(self, playlist_id: str, etag: str, video_ids: list):
+        """
+        Store etag of the playlist first page and its most recent video ids
+        """
+        with self._lock:
+            self.conn.execute(
+                'REPLACE INTO playlists VALUES (?, ?, ?, ?)',
+                (playlist_id, etag, json.dumps(video_ids[:KNOWN_IDS_LIMIT]), time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
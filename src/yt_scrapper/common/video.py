@@ -1,77 +1,150 @@
-import pandas as pd
+from __future__ import annotations
+
+from .lazy import lazy_import
 from .funcs import convert_duration_to_seconds
+from .funcs import convert_durations_to_seconds
+from .fetch import rebatch
+from .fetch import order_items
+from .fetch import fetch_batches
+from .fetch import stream_batches
+from .fetch import create_batches
 
+pd = lazy_import('pandas')
 
-def extract_videos_data(service,
-                        videos_ids: list) -> pd.DataFrame:
+
+def _videos_request(service, videos_batch: list):
+    """
+    Creates request for the data of upto 50 videos
+    """
+    return service.videos().list(
+        id=videos_batch,
+        part='contentDetails,snippet,statistics',
+        maxResults=50
+    )
+
+
+def request_videos_data(service,
+                        videos_ids: list,
+                        workers: int = 1,
+                        batch_http: bool = False) -> list:
     """
     Args:
         service: YouTube API service instance
         videos_ids: list of videos ID's
+        workers: No. of batches requested concurrently
+        batch_http: Pack the batches into batch http requests
 
     Returns:
-        Pandas dataframe
+        List containing videos raw data in the order of videos_ids
 
-    Retrieve YouTube videos statistics and creates data frame
+    Request videos data in batches of 50
     """
+    responses = fetch_batches(
+        lambda videos_batch: _videos_request(service, videos_batch),
+        create_batches(videos_ids),
+        workers,
+        service if batch_http else None
+    )
 
-    videos_data = []  # Use to hold videos info
+    items = [item for response in responses for item in response['items']]
 
-    for batch_range in range(0, len(videos_ids), 50):
-        # Creates videos batches of 50
-        videos_batch = videos_ids[batch_range:batch_range + 50]
+    return order_items(items, videos_ids)
 
-        response = service.videos().list(
-            id=videos_batch,
-            part='contentDetails,snippet,statistics',
-            maxResults=50
-        ).execute()
 
-        items = response['items']  # Holds videos data from response
+def videos_frame(items: list) -> pd.DataFrame:
+    """
+    Convert a page of response 'videos' items into typed columns at once.
+    Counts are int64 (0 if hidden), date is datetime64 and duration is int32 seconds.
 
-        for item in items:
-            title = item['snippet']['title']
-            date = item['snippet']['publishedAt'][:10]
-            views = item['statistics']['viewCount']
+    Args:
+        items: List containing videos raw data
 
-            vid_id = item['id']
-            video_url = f'https://www.youtube.com/watch?v={vid_id}'
+    Returns:
+        Pandas dataframe of the videos, the same columns are written to csv files and sinks
+    """
+    snippets = [item['snippet'] for item in items]
+    statistics = [item.get('statistics', {}) for item in items]
+
+    def counts(name):
+        return pd.to_numeric(pd.Series([stats.get(name) for stats in statistics], dtype=object),
+                             errors='coerce').fillna(0).astype('int64')
+
+    return pd.DataFrame({
+        'title': [snippet['title'] for snippet in snippets],
+        'date': pd.to_datetime([snippet['publishedAt'][:10] for snippet in snippets], format='%Y-%m-%d'),
+        'views': counts('viewCount'),
+        'URL': [f"https://www.youtube.com/watch?v={item['id']}" for item in items],
+        'duration': convert_durations_to_seconds(
+            pd.Series([item['contentDetails'].get('duration') for item in items], dtype=object)),
+        'likes': counts('likeCount'),
+        'dislikes': counts('dislikeCount'),
+        'comments': counts('commentCount'),
+        'channel_id': [snippet.get('channelId', '') for snippet in snippets],
+    })
+
+
+def iter_videos_data(service,
+                     videos_ids,
+                     workers: int = 1):
+    """
+    Args:
+        service: YouTube API service instance
+        videos_ids: Iterable of videos ID's lists, e.g. playlist.iter_videos_id()
+        workers: No. of batches requested concurrently
+
+    Yields:
+        List containing videos raw data of each batch of 50 videos, in the order of videos_ids
+
+    Request videos data while videos ID's are still arriving, so videos are fetched
+    while the later playlist or search pages are being requested
+    """
+    for videos_batch, response in stream_batches(
+            lambda batch: _videos_request(service, batch),
+            rebatch(videos_ids),
+            workers):
+        yield order_items(response['items'], videos_batch)
+
+
+def iter_videos_frames(service,
+                       videos_ids,
+                       workers: int = 1):
+    """
+    Args:
+        service: YouTube API service instance
+        videos_ids: Iterable of videos ID's lists, e.g. playlist.iter_videos_id()
+        workers: No. of batches requested concurrently
+
+    Yields:
+        Typed Pandas dataframe of each batch of 50 videos, see videos_frame()
+    """
+    for items in iter_videos_data(service, videos_ids, workers):
+        yield videos_frame(items)
 
-            duration = item['contentDetails']['duration']
-            duration = convert_duration_to_seconds(duration)
 
-            try:
-                likes = item['statistics']['likeCount']
-            except KeyError:
-                item['statistics']['likeCount'] = '0'
-                likes = item['statistics']['likeCount']
-
-            try:
-                dislikes = item['statistics']['dislikeCount']
-            except KeyError:
-                item['statistics']['dislikeCount'] = '0'
-                dislikes = item['statistics']['dislikeCount']
-
-            try:
-                comments = item['statistics']['commentCount']
-            except KeyError:
-                item['statistics']['commentCount'] = '0'
-                comments = item['statistics']['commentCount']
-
-            videos_data.append({
-                'title': title,
-                'date': date,
-                'views': views,
-                'URL': video_url,
-                'duration': duration,
-                'likes': likes,
-                'dislikes': dislikes,
-                'comments': comments
-            })
+def extract_videos_data(service,
+                        videos_ids: list,
+                        workers: int = 1,
+                        batch_http: bool = False) -> pd.DataFrame:
+    """
+    Args:
+        service: YouTube API service instance
+        videos_ids: list of videos ID's
+        workers: No. of batches requested concurrently
+        batch_http: Pack the batches into batch http requests
+
+    Returns:
+        Pandas dataframe with typed columns, see videos_frame()
+
+    Retrieve YouTube videos statistics and creates data frame
+    """
+
+    items = request_videos_data(service, videos_ids, workers, batch_http)  # Videos data in order of videos_ids
+
+    videos_data = videos_frame(items)
 
     print(f'Total videos data extracted: {len(videos_data)}')
 
-    return pd.DataFrame(videos_data)
+    return videos_data
 
 
 def extract_videos_data_for_trello(service, videos_ids):
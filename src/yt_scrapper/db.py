@@ -1,9 +1,19 @@
-
+from __future__ import annotations
 
 import os
+import time
+import sqlite3
+import threading
+
 import dotenv
 
-import mysql.connector as connector
+from .common.lazy import lazy_import
+from .common.sinks import Sink
+from .common.sinks import SCHEMAS
+from .common.sinks import typed_frame
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
 
 
 dotenv.load_dotenv()
@@ -12,21 +22,492 @@ dotenv.load_dotenv()
 # db_pass = os.environ.get('DB_PASS')
 
 
+# Counts stored per resource: (id column, count columns)
+SNAPSHOT_COUNTS = {
+    'videos': ('video_id', ('views', 'likes', 'comments')),
+    'channels': ('channel_id', ('subs', 'views', 'videos')),
+}
+SQLITE_MAX_PARAMS = 500  # Ids per 'IN (...)' query
+
+# Primary key of each resource table
+MYSQL_KEYS = {
+    'videos': 'URL',
+    'channels': 'channel_URL',
+    'comments': 'comment_id',
+}
+MYSQL_TYPES = {
+    'string': 'TEXT',
+    'int32': 'INT',
+    'int64': 'BIGINT',
+    'date32': 'DATE',
+    'timestamp': 'DATETIME',
+}
+MYSQL_BATCH_SIZE = 5000  # Rows sent and committed together
+
+
+def _import_mysql_connector():
+    try:
+        import mysql.connector as connector
+    except ImportError:
+        raise ImportError('mysql-connector-python is required for Competitor: '
+                          'pip install mysql-connector-python')
+
+    return connector
+
+
+def _create_table_sql(resource: str) -> str:
+    """
+    Returns CREATE TABLE statement of the resource from its sinks schema
+    """
+    key = MYSQL_KEYS[resource]
+    columns = [f'`{column}` VARCHAR(255) NOT NULL' if column == key else f'`{column}` {MYSQL_TYPES[kind]}'
+               for column, kind in SCHEMAS[resource].items()]
+
+    return (f'CREATE TABLE IF NOT EXISTS `{resource}` ({", ".join(columns)}, PRIMARY KEY (`{key}`)) '
+            f'ENGINE=InnoDB DEFAULT CHARSET=utf8mb4')
+
+
+def _upsert_sql(resource: str, columns: list) -> str:
+    """
+    Returns INSERT statement updating the rows whose key already exists
+    """
+    names = ', '.join(f'`{column}`' for column in columns)
+    updates = ', '.join(f'`{column}` = VALUES(`{column}`)' for column in columns if column != MYSQL_KEYS[resource])
+
+    return (f'INSERT INTO `{resource}` ({names}) VALUES ({", ".join(["%s"] * len(columns))}) '
+            f'ON DUPLICATE KEY UPDATE {updates}')
+
+
+def _mysql_rows(data, resource: str) -> tuple:
+    """
+    Returns (columns, list of row tuples) of typed data, missing values become None
+    """
+    frame = typed_frame(data, resource)
+    frame = frame[frame[MYSQL_KEYS[resource]].notna()]
+
+    columns = list(frame.columns)
+    values = []
+    for column in columns:
+        series = frame[column]
+        if SCHEMAS[resource][column] == 'timestamp':
+            # MySQL DATETIME has no time zone, UTC is stored
+            series = series.dt.tz_convert(None)
+        values.append([None if pd.isna(value) else value.to_pydatetime() if isinstance(value, pd.Timestamp)
+                       else int(value) if isinstance(value, np.integer) else value
+                       for value in series.astype(object)])
+
+    return columns, list(zip(*values))
+
+
+def _count(value):
+    """
+    Returns count as int, None for hidden or missing counts e.g. 'NaN'
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _video_counts(data) -> list:
+    """
+    Returns [(video_id, views, likes, comments)] from request_videos_data() items
+    or a DataFrame of videos_frame()
+    """
+    if isinstance(data, pd.DataFrame):
+        ids = data['video_id'] if 'video_id' in data else data['URL'].str.split('v=').str[-1]
+        return list(zip(ids, *(data[column].map(_count) for column in ('views', 'likes', 'comments'))))
+
+    return [(item['id'],
+             _count(item['statistics'].get('viewCount')),
+             _count(item['statistics'].get('likeCount')),
+             _count(item['statistics'].get('commentCount')))
+            for item in data]
+
+
+def _channel_counts(data) -> list:
+    """
+    Returns [(channel_id, subs, views, videos)] from request_channels_data() items
+    or a DataFrame of extract_channel_data()
+    """
+    if isinstance(data, pd.DataFrame):
+        ids = data['channel_URL'].str.rstrip('/').str.split('/').str[-1]
+        return list(zip(ids, *(data[column].map(_count) for column in ('Subs', 'Total_Views', 'Total_Videos'))))
+
+    return [(item['id'],
+             None if item['statistics'].get('hiddenSubscriberCount') else
+             _count(item['statistics'].get('subscriberCount')),
+             _count(item['statistics'].get('viewCount')),
+             _count(item['statistics'].get('videoCount')))
+            for item in data]
+
+
+class SnapshotStore:
+    """
+    Append-only time series of video and channel counts in a SQLite database.
+
+    Every crawl appends one row per changed video or channel holding the
+    difference to its previous counts, unchanged ones only move their last
+    crawl time. Counts at any time are the running sum of the differences.
+    Times are stored in seconds, crawls within the same second share a row.
+    Rows are clustered by (id, fetched_at) so the history of one id is a
+    single range read.
+
+    ...
+
+    Attributes:
+        path: str
+            Path of the SQLite database file
+
+    Methods:
+        record_videos():
+            Append counts of videos
+        record_channels():
+            Append counts of channels
+        history():
+            Returns counts of a video or channel over time
+        growth():
+            Returns counts gained since the last crawl or since a time
+        latest():
+            Returns the latest counts of all videos or channels
+    """
+
+    def __init__(self, path: str = 'yt_snapshots.sqlite'):
+        self.path = path
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        for resource, (id_column, counts) in SNAPSHOT_COUNTS.items():
+            deltas = ', '.join(f'{count}_delta INTEGER' for count in counts)
+            values = ', '.join(f'{count} INTEGER' for count in counts)
+            self.conn.executescript(
+                f'CREATE TABLE IF NOT EXISTS {resource}_snapshots ('
+                f'{id_column} TEXT, fetched_at INTEGER, {deltas}, '
+                f'PRIMARY KEY ({id_column}, fetched_at)) WITHOUT ROWID;'
+                f'CREATE INDEX IF NOT EXISTS {resource}_snapshots_fetched ON {resource}_snapshots (fetched_at);'
+                f'CREATE TABLE IF NOT EXISTS {resource}_latest ('
+                f'{id_column} TEXT PRIMARY KEY, fetched_at INTEGER, changed_at INTEGER, {values});'
+            )
+        self.conn.commit()
+
+    def _latest_counts(self, resource: str, ids: list) -> dict:
+        """
+        Returns {id: (counts)} of the ids already recorded
+        """
+        id_column, counts = SNAPSHOT_COUNTS[resource]
+        latest = {}
+
+        for i in range(0, len(ids), SQLITE_MAX_PARAMS):
+            chunk = ids[i: i + SQLITE_MAX_PARAMS]
+            rows = self.conn.execute(
+                f'SELECT {id_column}, {", ".join(counts)} FROM {resource}_latest '
+                f'WHERE {id_column} IN ({", ".join("?" * len(chunk))})',
+                chunk
+            ).fetchall()
+            latest.update((row[0], row[1:]) for row in rows)
+
+        return latest
+
+    def record(self, resource: str, rows: list, fetched_at: float = None) -> int:
+        """
+        Append counts as differences to the previous counts
+
+        Args:
+            resource: 'videos' or 'channels'
+            rows: List of tuples (id, *counts) in the order of SNAPSHOT_COUNTS
+            fetched_at: Unix time of the crawl, now if not provided
+
+        Returns:
+            No. of ids whose counts changed
+        """
+        id_column, counts = SNAPSHOT_COUNTS[resource]
+        fetched_at = int(fetched_at if fetched_at is not None else time.time())
+        rows = list({row[0]: row for row in rows}.values())  # Last counts of repeated ids
+
+        with self._lock:
+            latest = self._latest_counts(resource, [row[0] for row in rows])
+
+            snapshots = []
+            updates = []
+            for item_id, *values in rows:
+                previous = latest.get(item_id)
+                if previous is None:
+                    deltas = [value or 0 for value in values]
+                    values = [value or 0 for value in values]
+                    changed = True
+                else:
+                    # Hidden or missing counts keep their previous value
+                    values = [old if new is None else new for new, old in zip(values, previous)]
+                    deltas = [new - old for new, old in zip(values, previous)]
+                    changed = any(deltas)
+
+                if changed:
+                    snapshots.append((item_id, fetched_at, *deltas))
+                updates.append((item_id, fetched_at, fetched_at if changed else None, *values))
+
+            # Differences of crawls within the same second add up in one row
+            self.conn.executemany(
+                f'INSERT INTO {resource}_snapshots VALUES ({", ".join("?" * (len(counts) + 2))}) '
+                f'ON CONFLICT ({id_column}, fetched_at) DO UPDATE SET '
+                + ', '.join(f'{count}_delta = {count}_delta + excluded.{count}_delta' for count in counts),
+                snapshots
+            )
+            self.conn.executemany(
+                f'INSERT INTO {resource}_latest VALUES ({", ".join("?" * (len(counts) + 3))}) '
+                f'ON CONFLICT ({id_column}) DO UPDATE SET fetched_at = excluded.fetched_at, '
+                f'changed_at = COALESCE(excluded.changed_at, changed_at), '
+                + ', '.join(f'{count} = excluded.{count}' for count in counts),
+                updates
+            )
+            self.conn.commit()
+
+        return len(snapshots)
+
+    def record_videos(self, data, fetched_at: float = None) -> int:
+        """
+        Args:
+            data: Items of request_videos_data() or DataFrame of videos_frame()
+            fetched_at: Unix time of the crawl, now if not provided
+
+        Returns:
+            No. of videos whose counts changed
+        """
+        return self.record('videos', _video_counts(data), fetched_at)
+
+    def record_channels(self, data, fetched_at: float = None) -> int:
+        """
+        Args:
+            data: Items of request_channels_data() or DataFrame of extract_channel_data()
+            fetched_at: Unix time of the crawl, now if not provided
+
+        Returns:
+            No. of channels whose counts changed
+        """
+        return self.record('channels', _channel_counts(data), fetched_at)
+
+    def history(self, resource: str, item_id: str) -> pd.DataFrame:
+        """
+        Counts over time e.g. views over time of a video
+
+        Args:
+            resource: 'videos' or 'channels'
+            item_id: Video or channel id
+
+        Returns:
+            Pandas DataFrame with fetched_at and counts at each change
+        """
+        id_column, counts = SNAPSHOT_COUNTS[resource]
+        totals = ', '.join(f'SUM({count}_delta) OVER (ORDER BY fetched_at) AS {count}' for count in counts)
+
+        with self._lock:
+            frame = pd.read_sql_query(
+                f'SELECT fetched_at, {totals} FROM {resource}_snapshots '
+                f'WHERE {id_column} = ? ORDER BY fetched_at',
+                self.conn, params=(item_id,)
+            )
+
+        frame['fetched_at'] = pd.to_datetime(frame['fetched_at'], unit='s', utc=True)
+        return frame
+
+    def growth(self, resource: str, since: float = None) -> pd.DataFrame:
+        """
+        Counts gained by every video or channel
+
+        Args:
+            resource: 'videos' or 'channels'
+            since: Unix time, growth after this time. If not provided,
+                growth of the last crawl of every id
+
+        Returns:
+            Pandas DataFrame with id and gained counts, ids without change are not included
+        """
+        id_column, counts = SNAPSHOT_COUNTS[resource]
+        gains = ', '.join(f'SUM(s.{count}_delta) AS {count}' for count in counts)
+
+        if since is None:
+            # Changes recorded by the last crawl of the id, first crawls are not growth
+            query = (f'SELECT s.{id_column}, {gains} FROM {resource}_snapshots s '
+                     f'JOIN {resource}_latest l ON l.{id_column} = s.{id_column} '
+                     f'AND l.fetched_at = s.fetched_at '
+                     f'WHERE EXISTS (SELECT 1 FROM {resource}_snapshots p '
+                     f'WHERE p.{id_column} = s.{id_column} AND p.fetched_at < s.fetched_at) '
+                     f'GROUP BY s.{id_column}')
+            params = ()
+        else:
+            query = (f'SELECT s.{id_column}, {gains} FROM {resource}_snapshots s '
+                     f'WHERE s.fetched_at > ? GROUP BY s.{id_column}')
+            params = (int(since),)
+
+        with self._lock:
+            return pd.read_sql_query(query, self.conn, params=params)
+
+    def latest(self, resource: str) -> pd.DataFrame:
+        """
+        Returns:
+            Pandas DataFrame with latest counts, last crawl and last change time of every id
+        """
+        with self._lock:
+            frame = pd.read_sql_query(f'SELECT * FROM {resource}_latest', self.conn)
+
+        for column in ('fetched_at', 'changed_at'):
+            frame[column] = pd.to_datetime(frame[column], unit='s', utc=True)
+        return frame
+
+    def close(self):
+        self.conn.close()
+
+
 class Competitor:
-    def __init__(self, db_user, db_password):
-        self.conn = self.create_connection(db_user, db_password)
-        pass
+    """
+    MySQL / MariaDB persistence backend of extracted channels, videos and comments.
+
+    Rows are upserted with executemany in chunks of batch_size, every chunk
+    is committed on its own, so crawls of millions of rows never go through
+    a csv file. Connections are taken from a pool, so sinks of many threads
+    can write at the same time:
+
+        db = Competitor(DB_USER, DB_PASS)
+        yt.extract_channel_videos(channel_id, '', sink=db.sink('videos'))
+
+    ...
+
+    Attributes:
+        database: str
+            Name of the database, created if missing
+        pool_size: int
+            No. of pooled connections
+        batch_size: int
+            No. of rows sent and committed together
+
+    Methods:
+        create_schema():
+            Create tables of every resource
+        write():
+            Upsert rows of a resource
+        sink():
+            Returns sink writing rows of a resource to the database
+        connection():
+            Returns a connection of the pool
+    """
+
+    def __init__(self,
+                 db_user,
+                 db_password,
+                 host: str = 'localhost',
+                 database: str = 'yt_scrapper',
+                 pool_size: int = 5,
+                 batch_size: int = MYSQL_BATCH_SIZE):
+        self.host = host
+        self.database = database
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+
+        self.conn = self.create_connection(db_user, db_password, host)
+        cursor = self.conn.cursor()
+        cursor.execute(f'CREATE DATABASE IF NOT EXISTS `{database}` CHARACTER SET utf8mb4')
+        cursor.close()
+        self.conn.database = database
+
+        connector = _import_mysql_connector()
+        self.pool = connector.pooling.MySQLConnectionPool(
+            pool_name=f'yt_scrapper_{database}',
+            pool_size=pool_size,
+            host=host,
+            user=db_user,
+            password=db_password,
+            database=database,
+            charset='utf8mb4',
+            autocommit=False,
+        )
+        self.create_schema()
 
     @staticmethod
-    def create_connection(user, password):
+    def create_connection(user, password, host: str = 'localhost'):
         """
         Create connection with database using username and password
         Returns:
                 database connection object
         """
+        connector = _import_mysql_connector()
+
         conn = connector.connect(
-            host='localhost',
+            host=host,
             user=user,
             password=password
         )
         return conn
+
+    def connection(self):
+        """
+        Returns a connection of the pool, close() gives it back to the pool
+        """
+        return self.pool.get_connection()
+
+    def create_schema(self):
+        """
+        Create a table for every resource of MYSQL_KEYS, columns are the typed columns of sinks.SCHEMAS
+        """
+        conn = self.connection()
+        try:
+            cursor = conn.cursor()
+            for resource in MYSQL_KEYS:
+                cursor.execute(_create_table_sql(resource))
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def write(self, resource: str, data) -> int:
+        """
+        Upsert rows of the resource, rows with an existing key are updated
+
+        Args:
+            resource: 'videos', 'channels' or 'comments'
+            data: List of records or Pandas DataFrame e.g. from videos_frame()
+
+        Returns:
+            No. of rows written
+        """
+        columns, rows = _mysql_rows(data, resource)
+        if not rows:
+            return 0
+
+        sql = _upsert_sql(resource, columns)
+
+        conn = self.connection()
+        try:
+            cursor = conn.cursor()
+            for i in range(0, len(rows), self.batch_size):
+                cursor.executemany(sql, rows[i: i + self.batch_size])
+                conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return len(rows)
+
+    def sink(self, resource: str):
+        """
+        Returns MySQLSink of the resource, usable wherever the extraction methods accept a sink
+        """
+        return MySQLSink(self, resource)
+
+    def close(self):
+        self.conn.close()
+
+
+class MySQLSink(Sink):
+    """
+    Sink writing rows of a resource to the Competitor database
+    """
+
+    def __init__(self, db: Competitor, resource: str):
+        self.db = db
+        self.resource = resource
+        self.rows = 0
+
+    def write(self, data):
+        self.rows += self.db.write(self.resource, data)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+# Built-in Modules import
+import os
+import re
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Project files import
+from .common import channel
+from .common import jobs
+from .common.jobs import JobState
+from .common.lazy import lazy_import
+from .common.sinks import create_sink
+
+pd = lazy_import('pandas')  # Loaded once the crawl is summarized, not by worker processes
+
+
+CHANNEL_ID_PATTERN = re.compile(r'(UC[\w-]{22})')  # Channel ids start with 'UC'
+
+_worker = {}  # YouTube instance and job state of the current worker process
+
+
+def read_channel_list(path: str) -> list:
+    """
+    Read channels from a text file, one channel per line. Lines can be
+    channel ids, '/channel/' urls, other channel urls or '@handles', empty
+    lines and lines starting with '#' are skipped.
+
+    Returns:
+        List of unique channel ids in the order of the file
+    """
+    channels_ids = {}  # Ordered set of IDs'
+
+    with open(path, encoding='utf-8') as file:
+        for line_no, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            match = CHANNEL_ID_PATTERN.search(line)
+            if match:
+                channels_ids.setdefault(match.group(1))
+            elif line.startswith('http'):
+                channels_ids.setdefault(channel.get_channel_id(line))  # Custom urls e.g. /c/name, /@name
+            elif line.startswith('@'):
+                channels_ids.setdefault(channel.get_channel_id(f'https://www.youtube.com/{line}'))
+            else:
+                raise Exception(f"'{line}' on line {line_no} of {path} is not a channel id, url or @handle")
+
+    print(f'Total channels in the list: {len(channels_ids)}')
+    return list(channels_ids)
+
+
+def split_keys(keys: list, processes: int) -> list:
+    """
+    Split API keys across processes. Every process gets its own keys when
+    there are enough of them, else keys are shared round-robin.
+
+    Every process has its own QuotaScheduler, so a shared key is charged
+    by each of them without knowing the others' usage. Quota errors of the
+    API still exhaust the key in every process that hits them.
+
+    Returns:
+        List of keys lists, one per process
+    """
+    if len(keys) >= processes:
+        return [keys[i::processes] for i in range(processes)]
+
+    return [[keys[i % len(keys)]] for i in range(processes)]
+
+
+def _create_youtube(keys: list, workers: int):
+    from .yt_scrapper import YouTube
+    return YouTube(keys, workers=workers)
+
+
+def _init_worker(keys_queue, workers: int, checkpoint_path: str, youtube_factory):
+    """
+    Create service, connection pool and job state of the worker process
+    """
+    keys = keys_queue.get()
+    _worker['youtube'] = (youtube_factory or _create_youtube)(keys, workers)
+    _worker['checkpoint'] = JobState(checkpoint_path) if checkpoint_path else None
+
+
+def _channel_part(output_dir: str, channel_id: str, output_format: str) -> str:
+    """
+    Returns path of the channel output, its partition directory of the parquet dataset or its csv file
+    """
+    if output_format == 'parquet':
+        return os.path.join(output_dir, f'channel_id={channel_id}')
+
+    return os.path.join(output_dir, 'channels', f'{channel_id}.csv')
+
+
+def _remove_part(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _crawl_channel(channel_id: str, output_dir: str, output_format: str) -> tuple:
+    """
+    Extract channel all videos in the worker process. Output of a previous
+    run is removed unless the channel job is resumed from the checkpoint,
+    output of a failed channel is removed unless it can be resumed.
+
+    Returns:
+        tuple: (channel_id, no. of videos written, error message or '')
+    """
+    yt = _worker['youtube']
+    checkpoint = _worker['checkpoint']
+    part = _channel_part(output_dir, channel_id, output_format)
+
+    if checkpoint is None or not checkpoint.status(jobs.channel_videos_job_id(channel_id)):
+        _remove_part(part)
+
+    if output_format == 'parquet':
+        sink = create_sink(output_dir, 'videos', 'parquet', partition_by=('channel_id',))
+    else:
+        sink = create_sink(part, 'videos', 'csv')
+
+    try:
+        with sink:
+            yt.extract_channel_videos(channel_id, channel_id, sink=sink, checkpoint=checkpoint)
+    except Exception as err:
+        if checkpoint is None:
+            _remove_part(part)
+            return channel_id, 0, f'{type(err).__name__}: {err}'
+        return channel_id, sink.rows, f'{type(err).__name__}: {err}'
+
+    return channel_id, sink.rows, ''
+
+
+def merge_csv_parts(output_dir: str, filename: str = 'videos', channels_ids: list = None) -> str:
+    """
+    Concatenate per channel csv files into one csv file, the header is kept once
+
+    Args:
+        output_dir: Directory of the crawl, parts are read from its 'channels' directory
+        filename: Name of the merged file without extension
+        channels_ids: Channels to be merged in this order, channels without a part
+            are skipped. All parts of the directory are merged if not provided
+
+    Returns:
+        Path of the merged csv file
+    """
+    parts_dir = os.path.join(output_dir, 'channels')
+    path = os.path.join(output_dir, f'{filename}.csv')
+
+    if channels_ids is None:
+        names = sorted(os.listdir(parts_dir))
+    else:
+        names = [f'{channel_id}.csv' for channel_id in channels_ids
+                 if os.path.exists(os.path.join(parts_dir, f'{channel_id}.csv'))]
+
+    with open(path, 'w', encoding='utf-8', newline='') as merged:
+        header_written = False
+        for name in names:
+            with open(os.path.join(parts_dir, name), encoding='utf-8', newline='') as part:
+                header = part.readline()
+                if not header_written:
+                    merged.write(header)
+                    header_written = True
+                shutil.copyfileobj(part, merged)
+
+    print(f'File created at: {path}')
+    return path
+
+
+def crawl_channels(keys,
+                   channels,
+                   output_dir: str,
+                   processes: int = None,
+                   workers: int = 8,
+                   output_format: str = 'parquet',
+                   checkpoint_path: str = None,
+                   youtube_factory=None) -> pd.DataFrame:
+    """
+    Extract all videos of many channels on a pool of worker processes. Every
+    process has its own service, connection pool and API keys, so throughput
+    grows with the no. of cores and keys. Keys are shared by processes when
+    there are fewer keys than processes, see split_keys().
+
+    Output of every channel is written again unless its job is resumed from
+    checkpoint_path, so a rerun never duplicates rows.
+
+    Args:
+        keys: API key or list of API keys, split across the processes
+        channels: Path of a channel list file (see read_channel_list()) or list of channel ids
+        output_dir: Directory of the merged dataset. Parquet datasets are partitioned
+            by channel_id, csv files of the channels crawled without an error are merged into videos.csv
+        processes: No. of worker processes, no. of cores by default
+        workers: No. of concurrent requests within each process
+        output_format: 'parquet' or 'csv'
+        checkpoint_path: SQLite file of JobState. If provided, finished channels are
+            skipped and stopped channels resume when the crawl is run again
+        youtube_factory: Callable(keys, workers) creating the YouTube instance of a
+            process, must be picklable
+
+    Returns:
+        Pandas DataFrame with channel_id, videos written and error of every channel
+    """
+    if output_format not in ('parquet', 'csv'):
+        raise Exception(f"'{output_format}' is not an acceptable keyword. Acceptable keywords are: parquet, csv")
+
+    keys = list(keys) if isinstance(keys, (list, tuple)) else [keys]
+    channels_ids = read_channel_list(channels) if isinstance(channels, str) else list(dict.fromkeys(channels))
+    processes = min(processes or os.cpu_count() or 1, len(channels_ids)) or 1
+
+    if output_format == 'csv':
+        os.makedirs(os.path.join(output_dir, 'channels'), exist_ok=True)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Every process takes its keys from the queue once, when it starts
+    manager = multiprocessing.Manager()
+    keys_queue = manager.Queue()
+    for process_keys in split_keys(keys, processes):
+        keys_queue.put(process_keys)
+
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=processes,
+                                 initializer=_init_worker,
+                                 initargs=(keys_queue, workers, checkpoint_path, youtube_factory)) as pool:
+            futures = [pool.submit(_crawl_channel, channel_id, output_dir, output_format)
+                       for channel_id in channels_ids]
+
+            for i, future in enumerate(as_completed(futures), 1):
+                channel_id, rows, error = future.result()
+                results.append((channel_id, rows, error))
+                if error:
+                    print(f'Channel failed {channel_id}: {error}')
+                if i % 10 == 0:
+                    print(f'No. of channels crawled: {i}/{len(channels_ids)}')
+    finally:
+        manager.shutdown()
+
+    summary = pd.DataFrame(results, columns=['channel_id', 'videos', 'error'])
+    summary = summary.set_index('channel_id').loc[channels_ids].reset_index()
+
+    if output_format == 'csv':
+        # Parts of failed channels are kept for resuming only
+        merge_csv_parts(output_dir, channels_ids=list(summary.loc[summary['error'] == '', 'channel_id']))
+
+    print(f'Total channels crawled: {len(summary)}, failed: {(summary["error"] != "").sum()}, '
+          f'videos: {summary["videos"].sum()}')
+    return summary
@@ -1,15 +1,13 @@
+from __future__ import annotations
+
 # Built-in Modules import
 import os
+import contextlib
 from datetime import datetime, timedelta
 
 # Installed Modules import
-import pandas as pd
 import dotenv
 
-# Google API imports
-from googleapiclient.discovery import build
-import google_auth_oauthlib.flow
-
 # Selenium imports
 # from selenium import webdriver
 # from selenium.webdriver.chrome.options import Options
@@ -17,8 +15,19 @@ import google_auth_oauthlib.flow
 
 
 # Project files import
-from .common import channel, video, playlist, search, funcs
-from .common.channel import get_channel_uploads_id
+from .common import channel, video, playlist, search, comment, jobs, funcs
+from .common.lazy import lazy_import
+from .common.keywords import KeywordMatcher
+from .common.quota import PRIORITY_LOW
+from .common.quota import QuotaScheduler
+from .common.retry import RetryPolicy
+from .common.service import Service
+from .common.service import build_service
+from .common.sinks import CsvSink
+
+# Heavy modules are loaded by the methods that use them
+pd = lazy_import('pandas')
+orchestrator = lazy_import('.orchestrator', __package__)
 
 dotenv.load_dotenv()  # Loads .env file
 
@@ -32,7 +41,25 @@ class YouTube:
 
     Attributes:
         key: str
-            Api key used to create service and authenticate user
+            Api key used to create service and authenticate user.
+            A list of keys can be passed to spread requests across them
+        workers: int
+            No. of batched requests sent concurrently
+        batch_http: bool
+            Pack videos and channels lookups into batch http requests
+        cache: Cache
+            Response cache used by every request e.g. SQLiteCache('yt_cache.sqlite')
+        scheduler: QuotaScheduler
+            Quota scheduler every request goes through. If not provided, one
+            tracking usage without a local cap is created, keys are switched
+            when the API answers quotaExceeded. e.g. QuotaScheduler(keys, budget=10000)
+            stops before the API does
+        retry: RetryPolicy
+            Backoff, rate limit and per endpoint metrics of every request,
+            e.g. RetryPolicy(retries=5, rate=50). Metrics: yt.retry.metrics.summary()
+        http:
+            Transport of the services, httplib2.Http by default. e.g.
+            ReplayHttp('yt_replay.sqlite') from common/replay.py serves recorded responses offline
 
     Methods:
         upload_response():
@@ -53,53 +80,128 @@ class YouTube:
             Creates a csv file in current working directory
         convert_duration_to_seconds():
             convert youtube duration format into seconds
+        extract_channel_comments():
+            Crawl all comments and replies of the channel videos
     """
 
-    def __init__(self, key):
+    def __init__(self,
+                 key,
+                 workers: int = 8,
+                 batch_http: bool = False,
+                 cache=None,
+                 scheduler=None,
+                 retry=None,
+                 http=None):
         API_SERVICE = 'youtube'
         API_VERSION = 'v3'
         self.api_service = API_SERVICE
         self.api_version = API_VERSION
 
-        self.key = key
-        self.service = self.construct_service()
+        self.keys = list(key) if isinstance(key, (list, tuple)) else [key]
+        self.key = self.keys[0]
+        self.workers = workers
+        self.batch_http = batch_http
+        self.cache = cache
+        self.scheduler = scheduler or QuotaScheduler(self.keys, budget=None)
+        self.retry = retry or RetryPolicy()
+        self.http = http
+        self.latest_uploads = {}  # Latest upload date per uploads playlist, reused by activity filters
+        # Service instance of each key is created when its first request is sent
+        self.service = Service(
+            dict.fromkeys(self.keys),
+            cache,
+            self.scheduler,
+            self.retry,
+            factory=self.construct_service
+        )
 
         client_secrets_file = "secret_files/secret_key.json"
         self.client_secrets_file = client_secrets_file
 
-    def construct_service(self):
+    def construct_service(self, key: str = None):
         """
-        Creates service object from build method
+        Creates service object from the bundled discovery document
         """
 
         # API_SERVICE = 'youtube'
         # API_VERSION = 'v3'
-        service = build(
+        service = build_service(
             self.api_service,
             self.api_version,
-            developerKey=self.key
+            developerKey=key or self.key,
+            http=self.http
         )
         return service
 
     def oauth_service(self, scopes):
+        import google_auth_oauthlib.flow
+
         flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
             self.client_secrets_file, scopes)
 
         credentials = flow.run_console()
 
-        youtube = build(
+        youtube = build_service(
             self.api_service,
             self.api_version,
             credentials=credentials)
         return youtube
 
+    @staticmethod
+    def _job_sink(filename: str, resource: str, sink=None, append: bool = True):
+        """
+        Returns sink of a checkpointed job or playlist sync, rows are written
+        to the csv file of create_csv() if no sink is provided. The file is
+        truncated unless append is True e.g. when a stopped job is resumed
+        """
+        if sink is not None:
+            return contextlib.nullcontext(sink)
+
+        return CsvSink(funcs.csv_path(filename), resource, append=append)
+
+    def _export_videos(self, videos_ids, filename: str, sink=None):
+        """
+        Args:
+            videos_ids: Iterable of videos ID's lists e.g. playlist.iter_videos_id()
+            filename: Name of output file without extension
+            sink: Sink from common/sinks.py
+
+        Write videos data to the sink page by page, or to a csv file if no sink is provided
+        """
+        if sink is None:
+            videos_ids = [video_id for page in videos_ids for video_id in page]
+            videos_data = video.extract_videos_data(self.service, videos_ids, self.workers, self.batch_http)
+
+            # Creates a CSV file in the current working directory
+            funcs.create_csv(videos_data, filename)
+            return
+
+        for videos_data in video.iter_videos_frames(self.service, videos_ids, self.workers):
+            sink.write(videos_data)
+
+        print(f'Total videos data written: {sink.rows}')
+
     def extract_channel_videos(self,
                                channel_id: str,
-                               filename: str):
+                               filename: str,
+                               sync_state=None,
+                               sink=None,
+                               checkpoint=None,
+                               restart: bool = False):
         """
         Args:
             channel_id: ID of the YouTube Channel
             filename: Name of output file without extension
+            sync_state: PlaylistState of previous runs. If provided, only the
+                videos uploaded since the previous run are extracted and appended
+                to the csv file or sink
+            sink: Sink the videos are written to page by page instead of the csv file,
+                e.g. ParquetSink('data/videos', 'videos', partition_by=('channel_id',))
+            checkpoint: JobState e.g. JobState('yt_jobs.sqlite'). If provided, progress is
+                saved while videos are written and a stopped extraction resumes where it stopped.
+                A finished extraction is skipped
+            restart: Start the checkpointed extraction over even if it is stopped or finished,
+                its csv file is replaced
 
         Returns:
             Return CSV file containing channel all videos data
@@ -108,25 +210,45 @@ class YouTube:
         a CSV file in the current working directory
         """
 
+        if checkpoint is not None:
+            job_id = jobs.channel_videos_job_id(channel_id)
+            if restart:
+                checkpoint.reset(job_id)
+
+            # Rows of a new job replace the csv file of previous runs, a resumed job appends to it
+            resume = bool(checkpoint.status(job_id))
+            with self._job_sink(filename, 'videos', sink, append=resume) as job_sink:
+                jobs.channel_videos_job(self.service, checkpoint, channel_id, job_sink, self.workers)
+            return
+
         # Retrieve channel uploads ID
         channel_uploads_id = channel.get_channel_uploads_id(self.service, channel_id)
 
-        # Retrieve Videos ID's based using channel upload playlist ID
-        videos_ids = playlist.get_videos_id(self.service, channel_uploads_id)
+        if sync_state is not None:
+            # New videos are appended to the previous runs' output, sync state is saved once they are written
+            with self._job_sink(filename, 'videos', sink) as sync_sink:
+                def write_new_videos(videos_ids):
+                    self._export_videos([videos_ids], filename, sync_sink)
+                    sync_sink.commit()
 
-        # Retrieve Videos Data
-        videos_data = video.extract_videos_data(self.service, videos_ids)
+                playlist.sync_videos_id(self.service, channel_uploads_id, sync_state, write_new_videos)
+            return
 
-        # Creates a CSV file in the current working directory
-        funcs.create_csv(videos_data, filename)
+        # Retrieve Videos ID's based using channel upload playlist ID
+        videos_ids = playlist.iter_videos_id(self.service, channel_uploads_id)
+
+        # Retrieve Videos Data and write it
+        self._export_videos(videos_ids, filename, sink)
 
     def extract_videos_from_playlist(self,
                                      youtube_playlist: str,
-                                     filename: str):
+                                     filename: str,
+                                     sink=None):
         """
         Args:
             youtube_playlist: YouTube playlist ID or playlist URL
             filename: Name of the output file without extension
+            sink: Sink the videos are written to page by page instead of the csv file
 
         Returns:
             Creates a .csv file in the current working directory
@@ -138,13 +260,10 @@ class YouTube:
         playlist_id = funcs.extract_playlist_id(youtube_playlist)
 
         # Grabs videos ID's from playlist
-        videos_ids = playlist.get_videos_id(self.service, playlist_id)
+        videos_ids = playlist.iter_videos_id(self.service, playlist_id)
 
-        # Retrieve videos data
-        videos_data = video.extract_videos_data(self.service, videos_ids)
-
-        # Creates a CSV file in the current working directory
-        funcs.create_csv(videos_data, filename)
+        # Retrieve videos data and write it
+        self._export_videos(videos_ids, filename, sink)
 
     def extract_channels_by_keyword(self,
                                     search_query: str,
@@ -153,7 +272,12 @@ class YouTube:
                                     subs_min: int = 0,
                                     subs_max: int = 1000000000,
                                     vid_count: int = 0,
-                                    last_activity: int = 0):
+                                    last_activity: int = 0,
+                                    sink=None,
+                                    max_results: int = 0,
+                                    search_shards: int = 1,
+                                    checkpoint=None,
+                                    restart: bool = False):
         """
         Search for channels by keyword and return data in .csv file
 
@@ -166,6 +290,15 @@ class YouTube:
             subs_max: Maximum number of subscribers a channel have
             vid_count: Minimum number of videos a channel must have
             last_activity: Last activity by channel in no. of days
+            sink: Sink the channels are written to instead of the csv file
+            max_results: Max no. of channels searched for, 0 for no limit
+            search_shards: Split the search into this many concurrent date windows
+                to get past the ~500 results cap of a single search
+            checkpoint: JobState e.g. JobState('yt_jobs.sqlite'). If provided, search pages and
+                written channels are saved and a stopped extraction resumes where it stopped.
+                Date windows are then searched one after another, a finished extraction is skipped
+            restart: Start the checkpointed extraction over even if it is stopped or finished,
+                its csv file is replaced
 
         Returns:
             .csv file of all channels related to keyword
@@ -174,30 +307,111 @@ class YouTube:
         if not filename:
             filename = search_query.strip().lower()
 
+        if checkpoint is not None:
+            filter_data = None
+            if filter_channels:
+                filter_data = lambda data: self._filter_channels(data, subs_min, subs_max,
+                                                                 vid_count, last_activity)
+
+            windows = search.create_date_windows(search_shards) if search_shards > 1 else None
+            job_id = jobs.channels_by_keyword_job_id(search_query)
+            if restart:
+                checkpoint.reset(job_id)
+
+            resume = bool(checkpoint.status(job_id))
+            with self._job_sink(filename, 'channels', sink, append=resume) as job_sink:
+                jobs.channels_by_keyword_job(self.service, checkpoint, search_query, job_sink,
+                                             self.workers, max_results, windows, filter_data)
+            return
+
+        if sink is not None:
+            self._stream_channels(search_query, sink, filter_channels, subs_min, subs_max,
+                                  vid_count, last_activity, max_results, search_shards)
+            return
+
         # Grabs channels id
-        channel_ids = search.search_by_keyword(self.service, search_query, 'channel')
+        if search_shards > 1:
+            channel_ids = search.search_sharded(self.service, search_query, 'channel',
+                                                search.create_date_windows(search_shards),
+                                                self.workers, max_results)
+        else:
+            channel_ids = search.search_by_keyword(self.service, search_query, 'channel', max_results)
 
         # Request & extract channels' data
-        channel_data = channel.request_channels_data(self.service, channel_ids)
+        channel_data = channel.request_channels_data(self.service, channel_ids, self.workers, self.batch_http)
 
         if filter_channels:
-            channel_data = channel.filter_channels_by_criteria(channel_data, subs_min, subs_max, vid_count)
-            if last_activity:
-                channel_data = channel.filter_active_channels(self.service, channel_data, last_activity)
+            channel_data = self._filter_channels(channel_data, subs_min, subs_max, vid_count, last_activity)
 
         channel_data = channel.extract_channel_data(channel_data)
 
         # Creates a .csv file in the /data of current working directory
         funcs.create_csv(channel_data, filename)
 
+    def _stream_channels(self,
+                         search_query: str,
+                         sink,
+                         filter_channels: bool,
+                         subs_min: int,
+                         subs_max: int,
+                         vid_count: int,
+                         last_activity: int,
+                         max_results: int,
+                         search_shards: int):
+        """
+        Write channels to the sink batch by batch, channels data is requested
+        while the later search pages are still arriving
+        """
+        if search_shards > 1:
+            channel_ids = [search.search_sharded(self.service, search_query, 'channel',
+                                                 search.create_date_windows(search_shards),
+                                                 self.workers, max_results)]
+        else:
+            channel_ids = search.iter_search_results(self.service, search_query, 'channel', max_results)
+
+        for channel_data in channel.iter_channels_data(self.service, channel_ids, self.workers):
+            if filter_channels:
+                channel_data = self._filter_channels(channel_data, subs_min, subs_max, vid_count, last_activity)
+            sink.write(channel.extract_channel_data(channel_data))
+
+        print(f'Total channels data written: {sink.rows}')
+
+    def _filter_channels(self,
+                         channel_data: list,
+                         subs_min: int,
+                         subs_max: int,
+                         vid_count: int,
+                         last_activity: int) -> list:
+        """
+        Filter channels by criteria, then by activity if last_activity is provided
+        """
+        channel_data = channel.filter_channels_by_criteria(channel_data, subs_min, subs_max, vid_count)
+        if last_activity:
+            # Activity checks are admitted after requests of other crawls
+            with self.scheduler.priority(PRIORITY_LOW):
+                channel_data = channel.filter_active_channels(self.service,
+                                                              channel_data,
+                                                              last_activity,
+                                                              self.workers,
+                                                              self.batch_http,
+                                                              self.latest_uploads)
+
+        return channel_data
+
     def extract_videos_by_keyword(self,
                                   search_query: str,
-                                  filename: str = ''):
+                                  filename: str = '',
+                                  sink=None,
+                                  max_results: int = 0,
+                                  search_shards: int = 1):
         """
         Extract YouTube videos data by keyword and creates a .csv file
         Args:
             search_query: Your search keyword
             filename: Filename to be saved with
+            sink: Sink the videos are written to page by page instead of the csv file
+            max_results: Max no. of videos searched for, 0 for no limit
+            search_shards: Split the search into this many concurrent date windows
 
         Returns:
             .csv file at /data in the current working directory
@@ -207,13 +421,73 @@ class YouTube:
             filename = search_query.strip().lower()
 
         # Grabs videos id's
-        videos_ids = search.search_by_keyword(self.service, search_query, 'video')
+        if search_shards > 1:
+            videos_ids = [search.search_sharded(self.service, search_query, 'video',
+                                                search.create_date_windows(search_shards),
+                                                self.workers, max_results)]
+        else:
+            videos_ids = search.iter_search_results(self.service, search_query, 'video', max_results)
+
+        # Videos data, written to .csv file at /data of current working directory or to the sink
+        self._export_videos(videos_ids, filename, sink)
+
+    def crawl_channels(self,
+                       channels,
+                       output_dir: str,
+                       processes: int = None,
+                       output_format: str = 'parquet',
+                       checkpoint_path: str = None) -> pd.DataFrame:
+        """
+        Extract all videos of many channels on a pool of worker processes,
+        API keys of the instance are split across the processes
+
+        Args:
+            channels: Path of a channel list file, one channel per line, or list of channel ids
+            output_dir: Directory of the merged dataset
+            processes: No. of worker processes, no. of cores by default
+            output_format: 'parquet' or 'csv'
+            checkpoint_path: SQLite file where progress is saved, e.g. 'yt_jobs.sqlite'
+
+        Returns:
+            Pandas dataframe with videos written and error of every channel
+        """
+        return orchestrator.crawl_channels(self.keys, channels, output_dir, processes,
+                                           self.workers, output_format, checkpoint_path)
+
+    def refresh_videos_stats(self, videos_ids: list, store) -> int:
+        """
+        Request counts of the videos and append them to the snapshot store.
+        With a cache, unchanged responses are revalidated with their ETag.
+
+        Args:
+            videos_ids: list of videos ID's
+            store: SnapshotStore e.g. SnapshotStore('yt_snapshots.sqlite') from yt_scrapper.db
 
-        # Videos data
-        videos_data = video.extract_videos_data(self.service, videos_ids)
+        Returns:
+            No. of videos whose counts changed since the last refresh
+        """
+        videos_data = video.request_videos_data(self.service, videos_ids, self.workers, self.batch_http)
+        changed = store.record_videos(videos_data)
 
-        # Create .csv file at /data of current working directory
-        funcs.create_csv(videos_data, filename)
+        print(f'Videos refreshed: {len(videos_data)}, changed: {changed}')
+        return changed
+
+    def refresh_channels_stats(self, channels_ids: list, store) -> int:
+        """
+        Request counts of the channels and append them to the snapshot store
+
+        Args:
+            channels_ids: list of channels ID's
+            store: SnapshotStore e.g. SnapshotStore('yt_snapshots.sqlite') from yt_scrapper.db
+
+        Returns:
+            No. of channels whose counts changed since the last refresh
+        """
+        channels_data = channel.request_channels_data(self.service, channels_ids, self.workers, self.batch_http)
+        changed = store.record_channels(channels_data)
+
+        print(f'Channels refreshed: {len(channels_data)}, changed: {changed}')
+        return changed
 
     def scrap_emails(self, data: pd.DataFrame):
 
@@ -326,34 +600,23 @@ class YouTube:
         return data
 
     @staticmethod
-    def filter_channels_by_keyword(search_pattern: str, data):
-        for channel in data:
-            try:
-                description = channel['brandingSettings']['channel']['description']
-            except KeyError:
-                description = 'NA'
-
-            try:
-                keywords = channel['brandingSettings']['channel']['keywords']
-                keywords = keywords.split('"')
-                keywords = [_.strip() for _ in [_.strip() for _ in keywords] if _]
-            except KeyError:
-                keywords = []
-
-            channel['brandingSettings']['channel']['keywords'] = keywords
-
-            if re.search(search_pattern, description.lower()):
-                if channel not in self.filtered_channels:
-                    self.filtered_channels.append(channel)
-                pattern_match = True
-            else:
-                pattern_match = False
+    def filter_channels_by_keyword(search_pattern,
+                                   data: list,
+                                   literal: bool = False) -> list:
+        """
+        Keep channels whose description or branding keywords match any pattern.
+        All patterns are compiled once and every channel is scanned in a single pass.
+
+        Args:
+            search_pattern: Regex pattern or list of patterns e.g. ['cooking', r'vlog\\d+']
+            data: List containing channels data from request_channels_data()
+            literal: If True patterns are matched as plain text instead of regex
 
-            if not pattern_match:
-                for word in keywords:
-                    if re.search(search_pattern, word):
-                        if channel not in self.filtered_channels:
-                            self.filtered_channels.append(channel)
+        Returns:
+            List of tuples (channel, patterns hit) of unique matching channels
+        """
+        matcher = KeywordMatcher(search_pattern, literal=literal)
+        return matcher.filter_channels(data)
 
     def sort_playlist_items(self,
                             playlist_id,
@@ -411,110 +674,67 @@ class YouTube:
 
     def retrieve_channel_comments(self,
                                   channel_id: str) -> list:
+        """
+        Args:
+            channel_id: ID of the YouTube Channel
 
-        comments_data = []
-
-        response = self.service.commentThreads().list(
-            part='id,snippet,replies',
-            allThreadsRelatedToChannelId=channel_id,
-            order='relevance',
-            maxResults=100
-        ).execute()
-
-        comments_data.extend(response['items'])
-        try:
-            next_page_token = response['nextPageToken']
-        except KeyError:
-            next_page_token = False
-
-        while next_page_token:
-            response = self.service.commentThreads().list(
-                part='id,snippet,replies',
-                allThreadsRelatedToChannelId=channel_id,
-                pageToken=next_page_token,
-                maxResults=100
-            ).execute()
+        Returns:
+            List of all comment threads related to the channel
+        """
+        comments_data = [thread for threads in comment.iter_threads(self.service,
+                                                                    allThreadsRelatedToChannelId=channel_id)
+                         for thread in threads]
 
-            comments_data.extend(response['items'])
+        print(f'Total comment threads found: {len(comments_data)}')
+        return comments_data
 
-            try:
-                next_page_token = response['nextPageToken']
-            except KeyError:
-                next_page_token = False
+    def extract_comments_data(self, comments_data: list) -> pd.DataFrame:
+        """
+        Args:
+            comments_data: List of comment threads e.g. from retrieve_channel_comments()
 
+        Returns:
+            Pandas dataframe built in one pass, one row per comment like extract_channel_comments().
+            Replies are linked to their thread by thread_id, replies not included in the threads are requested
+        """
+        comments_data = comment.build_comments_table(self.service, comments_data, self.workers).to_frame()
+
+        print(f'Total comments extracted: {len(comments_data)}')
         return comments_data
 
-    def extract_comments_data(self, comments_data):
-
-        videos_url = []
-        comments_id = []
-        main_comments = []
-        main_comments_authors = []
-        main_comments_authors_url = []
-        main_comments_published = []
-        total_comment_replies = []
-
-        for comment in comments_data:
-            comment_id = comment['id']
-            video_id = comment['snippet']['videoId']
-            video_url = f'https://www.youtube.com/watch?v={video_id}'
-            main_comment = comment['snippet']['topLevelComment']['snippet']['textDisplay']
-            main_comment_author = comment['snippet']['topLevelComment']['snippet']['authorDisplayName']
-            main_comment_author_url = comment['snippet']['topLevelComment']['snippet']['authorChannelUrl']
-            main_comment_published = comment['snippet']['topLevelComment']['snippet']['publishedAt']
-
-            # main_comment_time = datetime.strptime(main_comment_published, '%Y-%m-%d')
-            main_comment_replies = int(comment['snippet']['totalReplyCount'])
-
-            videos_url.append(video_url)
-            comments_id.append(comment_id)
-            main_comments.append(main_comment)
-            main_comments_authors.append(main_comment_author)
-            main_comments_authors_url.append(main_comment_author_url)
-            main_comments_published.append(main_comment_published)
-            total_comment_replies.append(main_comment_replies)
-
-            # if main_comment_replies:
-            #     replies_data = comment['replies']['comments']
-            #     for i in range(len(replies_data)):
-            #         globals()[f'reply_id_{i}'] = replies_data[i]['id']
-
-        comments_df = pd.DataFrame({
-            'video_url': videos_url,
-            'comment_id': comments_id,
-            'comment_text': main_comments,
-            'comment_date': main_comments_published,
-            'comment_author': main_comments_authors,
-            'comment_author_channel': main_comments_authors_url,
-            'comment_replies': total_comment_replies,
-        })
-
-        comment_index = 0
-
-        for comment in comments_data:
-            comment_replies = int(comment['snippet']['totalReplyCount'])
-
-            if comment_replies:
-                replies_data = comment['replies']['comments']
-
-                for i in range(len(replies_data)):
-                    reply_id = replies_data[i]['id']
-                    reply_text = replies_data[i]['snippet']['textDisplay']
-                    reply_author = replies_data[i]['snippet']['authorDisplayName']
-                    reply_channel = replies_data[i]['snippet']['authorChannelUrl']
-                    reply_likes = replies_data[i]['snippet']['likeCount']
-                    reply_added = replies_data[i]['snippet']['publishedAt']
-
-                    self.add_data_to_dict(reply_id, comments_df, f'reply_id_{i}', comment_index)
-                    self.add_data_to_dict(reply_text, comments_df, f'reply_text_{i}', comment_index)
-                    self.add_data_to_dict(reply_author, comments_df, f'reply_author_{i}', comment_index)
-                    self.add_data_to_dict(reply_channel, comments_df, f'reply_channel_{i}', comment_index)
-                    self.add_data_to_dict(reply_likes, comments_df, f'reply_likes_{i}', comment_index)
-                    self.add_data_to_dict(reply_added, comments_df, f'reply_added_{i}', comment_index)
-
-            comment_index += 1
-
-        return comments_df
+    def extract_channel_comments(self,
+                                 channel_id: str,
+                                 filename: str,
+                                 sink=None):
+        """
+        Crawl threads and replies of every video of the channel, many videos
+        are crawled at the same time
+
+        Args:
+            channel_id: ID of the YouTube Channel
+            filename: Name of output file without extension
+            sink: Sink the comments are written to video by video instead of the csv file
+        """
+        uploads_id = channel.get_channel_uploads_id(self.service, channel_id)
+        videos_ids = (video_id for page in playlist.iter_videos_id(self.service, uploads_id)
+                      for video_id in page)
+
+        frames = [comment.CommentsBuilder().to_frame()]
+        for video_id, video_comments in comment.iter_comments_frames(self.service, videos_ids, self.workers):
+            if sink is not None:
+                sink.write(video_comments)
+            else:
+                frames.append(video_comments)
+
+        if sink is not None:
+            print(f'Total comments written: {sink.rows}')
+            return
+
+        comments_data = pd.concat(frames, ignore_index=True)
+        print(f'Total comments extracted: {len(comments_data)}')
+
+        # Creates a CSV file in the current working directory
+        funcs.create_csv(comments_data, filename)
 
 
 if __name__ == '__main__':
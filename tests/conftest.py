@@ -0,0 +1,119 @@
+"""
+Fixtures of the offline tests. Responses come from the synthetic YouTube
+API of benchmarks/bench_api.py, importable through the pytest pythonpath
+of pyproject.toml, and are recorded by ReplayHttp into a cassette of each
+test, no API key or network is used.
+"""
+import json
+import threading
+
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+import httplib2
+import pytest
+
+from bench_api import SyntheticYouTube
+from yt_scrapper.yt_scrapper import YouTube
+from yt_scrapper.common.replay import ReplayHttp
+from yt_scrapper.common.retry import RetryPolicy
+
+
+SCALE = 120  # Items of the synthetic API, pages of 50 end with a partial page
+
+
+class FlakyUpstream:
+    """
+    Synthetic YouTube API failing the next requests of a resource with
+    the queued errors, then answering them as usual. Requests sent with
+    a key out of quota are answered with quotaExceeded
+
+    ...
+
+    Attributes:
+        api: SyntheticYouTube
+            API answering requests without a queued error
+        failures: dict
+            {resource: [(status, reason), ...]} errors of the next requests
+        requests: list
+            (resource, status) of every request received
+        out_of_quota: set
+            API keys answered with quotaExceeded
+    """
+
+    def __init__(self, scale: int = SCALE):
+        self.api = SyntheticYouTube(scale)
+        self.failures = {}
+        self.requests = []
+        self.out_of_quota = set()
+        self._lock = threading.Lock()
+
+    def fail(self, resource: str, *errors):
+        """
+        Queue errors e.g. fail('videos', (503, 'backendError')), None answers a request as usual
+        """
+        with self._lock:
+            self.failures.setdefault(resource, []).extend(errors)
+
+    def count(self, resource: str, status: int = None) -> int:
+        """
+        Returns no. of requests of the resource received, only those answered with status if provided
+        """
+        with self._lock:
+            return sum(1 for name, code in self.requests
+                       if name == resource and (status is None or code == status))
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        resource = urlsplit(uri).path.rsplit('/', 1)[-1]
+
+        with self._lock:
+            errors = self.failures.get(resource)
+            error = errors.pop(0) if errors else None
+        if set(parse_qs(urlsplit(uri).query).get('key', [])) & self.out_of_quota:
+            error = (403, 'quotaExceeded')
+
+        if error is None:
+            response, content = self.api.request(uri, method, body, headers)
+        else:
+            status, reason = error
+            content = json.dumps({'error': {'code': status, 'message': reason,
+                                            'errors': [{'reason': reason, 'message': reason}]}}).encode()
+            response = httplib2.Response({'status': status, 'content-type': 'application/json; charset=UTF-8'})
+
+        with self._lock:
+            self.requests.append((resource, response.status))
+        return response, content
+
+
+@pytest.fixture
+def upstream():
+    return FlakyUpstream()
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    return str(tmp_path / 'cassette.sqlite')
+
+
+@pytest.fixture
+def replay_http(cassette, upstream):
+    """
+    ReplayHttp recording the upstream responses missing in the cassette
+    """
+    http = ReplayHttp(cassette, mode='auto', http=upstream)
+    yield http
+    http.close()
+
+
+@pytest.fixture
+def create_youtube(replay_http):
+    """
+    Returns callable(keys=('key1',), **kwargs) creating a YouTube instance on
+    the replay transport, retries are sent again without a backoff
+    """
+    def create(keys=('key1',), **kwargs):
+        kwargs.setdefault('http', replay_http)
+        kwargs.setdefault('retry', RetryPolicy(base_delay=0))
+        return YouTube(list(keys), **kwargs)
+
+    return create
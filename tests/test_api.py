@@ -0,0 +1,142 @@
+import pytest
+
+from googleapiclient.errors import HttpError
+
+from bench_api import PLAYLIST_ID, channel_id, video_id
+from yt_scrapper.common import channel, playlist, search, video
+from yt_scrapper.common.cache import MemoryCache
+from yt_scrapper.common.replay import ReplayHttp
+from yt_scrapper.common.replay import ReplayMiss
+
+from .conftest import SCALE
+
+
+def test_playlist_pages(create_youtube, upstream):
+    yt = create_youtube()
+
+    assert playlist.get_videos_id(yt.service, PLAYLIST_ID) == [video_id(i) for i in range(SCALE)]
+    assert upstream.count('playlistItems') == 3
+
+
+def test_search_max_results(create_youtube):
+    yt = create_youtube()
+
+    assert search.search_by_keyword(yt.service, 'query', 'video', 70) == [video_id(i) for i in range(70)]
+
+
+def test_sharded_search_max_results_is_a_total(create_youtube):
+    yt = create_youtube()
+    windows = search.create_date_windows(3)
+
+    ids = search.search_sharded(yt.service, 'query', 'video', windows, 3, max_results=70)
+
+    # Newest window comes first, each one holds all 70 results
+    assert ids == [video_id(int(windows[0][0][:4]) * SCALE + i) for i in range(70)]
+
+
+def test_cassette_replays_offline(create_youtube, cassette):
+    videos_ids = [video_id(i) for i in range(SCALE)]
+    recorded = video.extract_videos_data(create_youtube().service, videos_ids)
+
+    http = ReplayHttp(cassette, mode='replay')
+    yt = create_youtube(http=http)
+    try:
+        assert video.extract_videos_data(yt.service, videos_ids).equals(recorded)
+        assert http.replayed == 3
+
+        with pytest.raises(ReplayMiss):
+            video.request_videos_data(yt.service, ['unknown'])
+    finally:
+        http.close()
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_batch_http_matches_single_requests(create_youtube, workers):
+    videos_ids = [video_id(i) for i in reversed(range(SCALE))]
+
+    single = video.extract_videos_data(create_youtube().service, videos_ids, workers)
+    batched = video.extract_videos_data(create_youtube(batch_http=True).service, videos_ids, workers, True)
+
+    assert list(batched['URL'].str[-11:]) == videos_ids
+    assert batched.equals(single)
+
+
+@pytest.mark.parametrize('batch_http', [False, True])
+def test_cache_revalidates_with_etag(create_youtube, upstream, batch_http):
+    cache = MemoryCache(ttls={'videos': 0})  # Every stored response is expired at once
+    yt = create_youtube(cache=cache, batch_http=batch_http)
+    videos_ids = [video_id(i) for i in range(SCALE)]
+
+    first = video.request_videos_data(yt.service, videos_ids, batch_http=batch_http)
+    second = video.request_videos_data(yt.service, videos_ids, batch_http=batch_http)
+
+    assert second == first
+    assert cache.stats()['revalidated'] == 3
+    assert upstream.count('videos', 304) == 3
+
+
+def test_fresh_cache_sends_nothing(create_youtube, upstream):
+    yt = create_youtube(cache=MemoryCache())
+
+    playlist.get_videos_id(yt.service, PLAYLIST_ID)
+    playlist.get_videos_id(yt.service, PLAYLIST_ID)
+
+    assert upstream.count('playlistItems') == 3
+
+
+def test_retry_temporary_failure(create_youtube, upstream, replay_http):
+    upstream.fail('videos', (503, 'backendError'), (403, 'rateLimitExceeded'))
+    yt = create_youtube()
+
+    items = video.request_videos_data(yt.service, [video_id(0)])
+
+    assert [item['id'] for item in items] == [video_id(0)]
+    assert yt.retry.metrics.summary()['videos.list']['retries'] == 2
+    # Failures are not recorded, the cassette replays the response of the retry
+    assert replay_http.stats()['stored'] == replay_http.recorded == 1
+
+
+def test_fatal_error_is_not_retried(create_youtube, upstream):
+    upstream.fail('videos', (404, 'videoNotFound'))
+    yt = create_youtube()
+
+    with pytest.raises(HttpError):
+        video.request_videos_data(yt.service, [video_id(0)])
+
+    assert upstream.count('videos') == 1
+    assert yt.retry.metrics.summary()['videos.list']['retries'] == 0
+
+
+def test_quota_exceeded_switches_key(create_youtube, upstream):
+    upstream.fail('videos', (403, 'quotaExceeded'))
+    yt = create_youtube(keys=('key1', 'key2'))
+
+    items = video.request_videos_data(yt.service, [video_id(0)])
+
+    assert [item['id'] for item in items] == [video_id(0)]
+    assert [usage['remaining'] for usage in yt.scheduler.usage()['keys'].values()][0] == 0
+
+
+def test_list_next_is_sent_with_the_next_key(create_youtube, upstream):
+    yt = create_youtube(keys=('key1', 'key2'))
+    request = yt.service.playlistItems().list(playlistId=PLAYLIST_ID, part='contentDetails', maxResults=50)
+    response = request.execute()
+    request.execute()  # Sent with key2, keys are picked round-robin
+
+    # The next page request is created from the uri of the first one, which holds key1
+    upstream.out_of_quota.add('key1')
+    response = yt.service.playlistItems().list_next(request, response).execute()
+
+    assert [item['contentDetails']['videoId'] for item in response['items']] == [video_id(i) for i in range(50, 100)]
+    assert upstream.count('playlistItems', 403) == 1
+
+
+@pytest.mark.parametrize('batch_http', [False, True])
+def test_missing_uploads_playlist_has_no_latest_upload(create_youtube, upstream, batch_http):
+    upstream.fail('playlistItems', (404, 'playlistNotFound'))
+    yt = create_youtube()
+    uploads_ids = ['UU' + channel_id(i)[2:] for i in range(2)]
+
+    latest = channel.request_latest_uploads(yt.service, uploads_ids, batch_http=batch_http)
+
+    assert latest == {uploads_ids[0]: '', uploads_ids[1]: '2022-01-02'}
@@ -0,0 +1,121 @@
+import os
+import asyncio
+from urllib.parse import urlsplit, parse_qs
+
+import httpx
+import pytest
+
+from googleapiclient.errors import HttpError
+
+from bench_api import channel_id, video_id
+from yt_scrapper.async_yt_scrapper import AsyncYouTube
+from yt_scrapper.common.quota import QuotaScheduler
+from yt_scrapper.common.retry import RetryPolicy
+
+from .conftest import SCALE
+
+
+def _run(upstream, coroutine, keys=('key1',), **kwargs):
+    """
+    Run coroutine(yt) on an AsyncYouTube whose requests are answered by upstream
+
+    Returns:
+        tuple: (result, API keys the requests were sent with, AsyncYouTube instance)
+    """
+    sent_keys = []
+
+    def handler(request):
+        sent_keys.append(parse_qs(urlsplit(str(request.url)).query)['key'][0])
+        response, content = upstream.request(str(request.url), request.method, None, dict(request.headers))
+        return httpx.Response(response.status, content=content, headers={'content-type': 'application/json'})
+
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler),
+                                   base_url='https://www.googleapis.com/youtube/v3')
+        async with AsyncYouTube(list(keys), client=client, retry=RetryPolicy(base_delay=0), **kwargs) as yt:
+            return await coroutine(yt), yt
+
+    result, yt = asyncio.run(main())
+    return result, sent_keys, yt
+
+
+def _request_videos(yt):
+    return yt.request_items('videos', [video_id(i) for i in range(SCALE)], 'snippet')
+
+
+def test_requests_are_sent_with_charged_keys(upstream):
+    scheduler = QuotaScheduler(['key1', 'key2'], budget=None)
+
+    items, sent_keys, _ = _run(upstream, _request_videos, ('key1', 'key2'), scheduler=scheduler)
+
+    assert [item['id'] for item in items] == [video_id(i) for i in range(SCALE)]
+    assert sorted(sent_keys) == ['key1', 'key1', 'key2']
+    assert scheduler.usage()['keys']['key1']['requests'] == 2
+
+
+def test_quota_exceeded_switches_key(upstream):
+    upstream.fail('videos', (403, 'quotaExceeded'))
+
+    items, sent_keys, yt = _run(upstream, lambda yt: yt.request('videos', part='id', id=[video_id(0)]),
+                                ('key1', 'key2'))
+
+    assert sent_keys == ['key1', 'key2']
+    assert yt.scheduler.exhausted == {'key1'}
+
+
+def test_temporary_failure_is_retried(upstream):
+    upstream.fail('videos', (503, 'backendError'), (403, 'rateLimitExceeded'))
+
+    response, sent_keys, yt = _run(upstream, lambda yt: yt.request('videos', part='id', id=[video_id(0)]))
+
+    assert [item['id'] for item in response['items']] == [video_id(0)]
+    assert yt.retry.metrics.summary()['videos.list']['retries'] == 2
+
+
+def test_fatal_error_is_raised(upstream):
+    upstream.fail('videos', (404, 'videoNotFound'))
+
+    with pytest.raises(HttpError) as err:
+        _run(upstream, lambda yt: yt.request('videos', part='id', id=[video_id(0)]))
+
+    assert err.value.resp.status == 404
+    assert upstream.count('videos') == 1
+
+
+class CountingScheduler(QuotaScheduler):
+    """
+    Quota scheduler recording the most requests it had in flight at once
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquired = 0
+        self.most_in_flight = 0
+
+    def acquire(self, *args, **kwargs):
+        key = super().acquire(*args, **kwargs)
+        with self._condition:
+            self.acquired += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        return key
+
+
+def test_requests_take_scheduler_slots(upstream):
+    scheduler = CountingScheduler(['key1'], budget=None, max_concurrent=1)
+
+    items, _, _ = _run(upstream, _request_videos, scheduler=scheduler)
+
+    assert len(items) == SCALE
+    assert scheduler.acquired == 3
+    assert scheduler.most_in_flight == 1 and scheduler.in_flight == 0
+
+
+def test_csv_matches_youtube(create_youtube, upstream, tmp_path, monkeypatch):
+    os.makedirs(tmp_path / 'data')
+    os.makedirs(tmp_path / 'work')
+    monkeypatch.chdir(tmp_path / 'work')
+
+    create_youtube().extract_channel_videos(channel_id(1), 'sync')
+    _run(upstream, lambda yt: yt.extract_channel_videos(channel_id(1), 'async'))
+
+    assert (tmp_path / 'data' / 'async.csv').read_text() == (tmp_path / 'data' / 'sync.csv').read_text()
@@ -0,0 +1,92 @@
+import pytest
+
+from googleapiclient.errors import HttpError
+
+from bench_api import video_id
+from yt_scrapper.common.batch import execute_batch
+from yt_scrapper.common.cache import MemoryCache
+from yt_scrapper.common.fetch import create_batches
+
+from .conftest import SCALE
+
+
+def _requests(yt) -> list:
+    """
+    Returns videos requests of 50 ids, 3 sub-requests of a batch http request
+    """
+    return [yt.service.videos().list(id=batch, part='snippet,statistics', maxResults=50)
+            for batch in create_batches([video_id(i) for i in range(SCALE)])]
+
+
+def _ids(responses: list) -> list:
+    return [item['id'] for response in responses for item in response['items']]
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_failed_sub_request_is_retried_alone(create_youtube, upstream, workers):
+    upstream.fail('videos', (503, 'backendError'))
+    yt = create_youtube(batch_http=True)
+
+    responses = execute_batch(yt.service, _requests(yt), batch_size=2, workers=workers)
+
+    assert _ids(responses) == [video_id(i) for i in range(SCALE)]
+    assert upstream.count('videos') == 4
+    assert yt.retry.metrics.summary()['videos.list']['retries'] == 1
+
+
+def test_fatal_sub_request_error_is_raised(create_youtube, upstream):
+    upstream.fail('videos', (404, 'videoNotFound'))
+    yt = create_youtube(batch_http=True)
+
+    with pytest.raises(HttpError) as err:
+        execute_batch(yt.service, _requests(yt))
+
+    assert err.value.resp.status == 404
+    assert upstream.count('videos') == 3  # Sent once, the other sub-requests are not retried
+    assert yt.retry.metrics.summary()['videos.list']['retries'] == 0
+
+
+def test_sub_request_failing_every_retry_is_raised(create_youtube, upstream):
+    upstream.fail('videos', *[(503, 'backendError')] * 3)
+    yt = create_youtube(batch_http=True)
+
+    with pytest.raises(HttpError) as err:
+        execute_batch(yt.service, _requests(yt)[:1], retries=2)
+
+    assert err.value.resp.status == 503
+    assert upstream.count('videos') == 3
+
+
+def test_expired_responses_are_revalidated(create_youtube, upstream):
+    cache = MemoryCache(ttls={'videos': 0})
+    yt = create_youtube(batch_http=True, cache=cache)
+
+    first = execute_batch(yt.service, _requests(yt))
+    # A revalidation failing temporarily is retried with its ETag
+    upstream.fail('videos', (503, 'backendError'))
+    second = execute_batch(yt.service, _requests(yt))
+
+    assert second == first
+    assert upstream.count('videos', 304) == 3
+    assert cache.stats()['revalidated'] == 3
+
+
+def test_fresh_responses_are_not_sent(create_youtube, upstream):
+    yt = create_youtube(batch_http=True, cache=MemoryCache())
+
+    first = execute_batch(yt.service, _requests(yt))
+    second = execute_batch(yt.service, _requests(yt))
+
+    assert second == first
+    assert upstream.count('videos') == 3
+
+
+def test_sub_request_out_of_quota_switches_key(create_youtube, upstream):
+    upstream.out_of_quota.add('key1')
+    yt = create_youtube(keys=('key1', 'key2'), batch_http=True)
+
+    responses = execute_batch(yt.service, _requests(yt))
+
+    assert _ids(responses) == [video_id(i) for i in range(SCALE)]
+    usage = yt.scheduler.usage()['keys']
+    assert [key['remaining'] for key in usage.values()] == [0, None]
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+import bench_api
+
+
+BASELINE = os.path.join(os.path.dirname(bench_api.__file__), 'baseline.json')
+
+
+def _results(items_per_sec: float, requests: int) -> dict:
+    return {'1000': {'get_videos_id': {'seconds': 1000 / items_per_sec, 'items': 1000,
+                                       'items_per_sec': items_per_sec, 'requests': requests}}}
+
+
+def test_check_regressions():
+    baseline = _results(1000, 20)
+
+    assert bench_api.check_regressions(_results(900, 20), baseline, 0.2) == []
+    assert len(bench_api.check_regressions(_results(700, 20), baseline, 0.2)) == 1
+    assert len(bench_api.check_regressions(_results(1000, 21), baseline, 0.2)) == 1
+    assert bench_api.check_regressions(_results(700, 20), {}, 0.2) == []
+
+
+def test_request_counts_match_baseline(tmp_path):
+    """
+    No workload sends more requests than the baseline, a tolerance of 1 leaves throughput unchecked
+    """
+    argv = ['--scales', '1000', '--repeat', '1', '--cassettes', str(tmp_path),
+            '--baseline', BASELINE, '--tolerance', '1']
+
+    assert bench_api.main(argv) == 0
+
+
+@pytest.mark.bench
+def test_throughput_against_baseline(tmp_path):
+    """
+    Throughput depends on the machine, run with 'python -m pytest -m bench'
+    where the baseline was measured
+    """
+    argv = ['--scales', '1000', '--repeat', '3', '--cassettes', str(tmp_path), '--baseline', BASELINE]
+
+    assert bench_api.main(argv) == 0
@@ -0,0 +1,17 @@
+from bench_api import CHANNEL_ID, video_id
+from yt_scrapper.common import comment
+
+
+def test_channel_and_video_comments_share_one_table(create_youtube):
+    yt = create_youtube()
+    threads = yt.retrieve_channel_comments(CHANNEL_ID)
+
+    comments = yt.extract_comments_data(threads)
+
+    assert list(comments.columns) == comment.COMMENTS_COLUMNS
+    assert len(comments) == sum(1 + thread['snippet']['totalReplyCount'] for thread in threads)
+    replies = comments[comments['kind'] == 'reply']
+    assert (replies['parent_id'] == replies['thread_id']).all()
+
+    # The synthetic API answers every video with the threads of the channel
+    assert comment.crawl_video_comments(yt.service, video_id(0)).equals(comments)
@@ -0,0 +1,143 @@
+import pytest
+
+from bench_api import SyntheticYouTube, video_id
+from bench_startup import run_case
+from yt_scrapper import db
+from yt_scrapper.common.video import videos_frame
+from yt_scrapper.db import SnapshotStore
+
+
+def test_import_loads_no_heavy_modules():
+    assert run_case('import yt_scrapper.db')[1] == []
+
+
+def test_snapshots_within_a_second_add_up(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.sqlite'))
+
+    for views in (100, 150, 180):
+        store.record('videos', [('v1', views, 1, 0)], fetched_at=1700000000.5)
+
+    assert store.history('videos', 'v1')['views'].tolist() == [180]
+    assert store.latest('videos')['views'].tolist() == [180]
+
+    store.record('videos', [('v1', 200, 1, 0)], fetched_at=1700000060)
+
+    assert store.history('videos', 'v1')['views'].tolist() == [180, 200]
+    assert store.growth('videos')['views'].tolist() == [20]
+    store.close()
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql):
+        self.conn.log.append(('execute', sql))
+
+    def executemany(self, sql, rows):
+        if len(self.conn.log) + 1 == self.conn.fail_at:
+            raise RuntimeError('Lost connection to MySQL server')
+        self.conn.log.append(('executemany', sql, list(rows)))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """
+    Records statements, commits and rollbacks, executemany() fails at the fail_at'th log entry
+    """
+
+    def __init__(self, fail_at: int = 0):
+        self.log = []
+        self.fail_at = fail_at
+        self.closed = False
+        self.database = None
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.log.append(('commit',))
+
+    def rollback(self):
+        self.log.append(('rollback',))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnector:
+    """
+    Stands in for mysql.connector, connections of the pool are kept in taken
+    """
+
+    def __init__(self, fail_at: int = 0):
+        self.fail_at = fail_at
+        self.taken = []
+        self.pooling = self
+
+    def connect(self, **kwargs):
+        return FakeConnection()
+
+    def MySQLConnectionPool(self, **kwargs):
+        self.pool_kwargs = kwargs
+        return self
+
+    def get_connection(self):
+        self.taken.append(FakeConnection(self.fail_at))
+        return self.taken[-1]
+
+
+def _competitor(monkeypatch, fail_at: int = 0, batch_size: int = 2):
+    connector = FakeConnector(fail_at)
+    monkeypatch.setattr(db, '_import_mysql_connector', lambda: connector)
+    return db.Competitor('user', 'password', batch_size=batch_size), connector
+
+
+def _videos(count: int):
+    return videos_frame(SyntheticYouTube._videos({'id': ','.join(video_id(i) for i in range(count))})['items'])
+
+
+def test_competitor_creates_schema(monkeypatch):
+    competitor, connector = _competitor(monkeypatch)
+
+    assert competitor.conn.log == [('execute', 'CREATE DATABASE IF NOT EXISTS `yt_scrapper` CHARACTER SET utf8mb4')]
+    schema = connector.taken[0]
+    statements = [entry[1] for entry in schema.log if entry[0] == 'execute']
+    assert statements[0].startswith('CREATE TABLE IF NOT EXISTS `videos` (')
+    assert '`URL` VARCHAR(255) NOT NULL' in statements[0] and 'PRIMARY KEY (`URL`)' in statements[0]
+    assert len(statements) == 3 and schema.log[-1] == ('commit',) and schema.closed
+
+
+def test_competitor_upserts_in_committed_chunks(monkeypatch):
+    competitor, connector = _competitor(monkeypatch)
+
+    assert competitor.write('videos', _videos(5)) == 5
+
+    conn = connector.taken[-1]
+    assert [entry[0] for entry in conn.log] == ['executemany', 'commit'] * 3
+    chunks = [entry[2] for entry in conn.log if entry[0] == 'executemany']
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+    sql = conn.log[0][1]
+    assert sql.startswith('INSERT INTO `videos` (`title`, `date`, `views`, `URL`,')
+    assert sql.count('%s') == 9
+    assert 'ON DUPLICATE KEY UPDATE `title` = VALUES(`title`)' in sql
+    assert '`URL` = VALUES' not in sql
+    assert chunks[0][0][3] == 'https://www.youtube.com/watch?v=v0000000000'
+    assert conn.closed
+
+
+def test_competitor_rolls_back_failed_chunk(monkeypatch):
+    competitor, connector = _competitor(monkeypatch, fail_at=3)
+
+    sink = competitor.sink('videos')
+    with pytest.raises(RuntimeError):
+        sink.write(_videos(5))
+
+    conn = connector.taken[-1]
+    # First chunk stays committed, the failed one is rolled back
+    assert [entry[0] for entry in conn.log] == ['executemany', 'commit', 'rollback']
+    assert conn.closed
+    assert sink.rows == 0
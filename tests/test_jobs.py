@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+import pytest
+
+from googleapiclient.errors import HttpError
+
+from bench_api import channel_id
+from yt_scrapper.common.jobs import JobState
+from yt_scrapper.common.jobs import channel_videos_job_id
+from yt_scrapper.common.retry import RetryPolicy
+
+from .conftest import SCALE
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Working directory of the test, csv files are created at tmp_path/data
+    """
+    os.makedirs(tmp_path / 'data')
+    os.makedirs(tmp_path / 'work')
+    monkeypatch.chdir(tmp_path / 'work')
+    return tmp_path
+
+
+def test_new_job_replaces_old_csv(create_youtube, workdir):
+    pd.DataFrame({'title': ['stale'] * 3}).to_csv(workdir / 'data' / 'videos.csv', index=False)
+    state = JobState(str(workdir / 'jobs.sqlite'))
+
+    create_youtube().extract_channel_videos(channel_id(1), 'videos', checkpoint=state)
+
+    videos = pd.read_csv(workdir / 'data' / 'videos.csv')
+    assert len(videos) == SCALE
+    assert 'stale' not in set(videos['title'])
+
+
+def test_resumed_job_appends(create_youtube, upstream, workdir):
+    state = JobState(str(workdir / 'jobs.sqlite'))
+    upstream.fail('videos', None, (503, 'backendError'))
+
+    with pytest.raises(HttpError):
+        yt = create_youtube(workers=1, retry=RetryPolicy(retries=0))
+        yt.extract_channel_videos(channel_id(1), 'videos', checkpoint=state)
+    assert len(pd.read_csv(workdir / 'data' / 'videos.csv')) == 50
+
+    create_youtube(workers=1).extract_channel_videos(channel_id(1), 'videos', checkpoint=state)
+
+    videos = pd.read_csv(workdir / 'data' / 'videos.csv')
+    assert len(videos) == SCALE
+    assert videos['URL'].is_unique
+
+
+def test_finished_job_is_skipped_unless_restarted(create_youtube, upstream, workdir):
+    state = JobState(str(workdir / 'jobs.sqlite'))
+    yt = create_youtube()
+    yt.extract_channel_videos(channel_id(1), 'videos', checkpoint=state)
+    requests = upstream.count('videos')
+
+    yt.extract_channel_videos(channel_id(1), 'videos', checkpoint=state)
+    assert upstream.count('videos') == requests
+    assert len(pd.read_csv(workdir / 'data' / 'videos.csv')) == SCALE
+
+    yt.extract_channel_videos(channel_id(1), 'videos', checkpoint=state, restart=True)
+    assert len(pd.read_csv(workdir / 'data' / 'videos.csv')) == SCALE
+    assert state.status(channel_videos_job_id(channel_id(1))) == 'done'
@@ -0,0 +1,48 @@
+import pytest
+
+from yt_scrapper.common.grab import _grab_channel_keywords_list
+from yt_scrapper.common.keywords import KeywordMatcher
+
+
+def test_overlapping_patterns_are_found():
+    matcher = KeywordMatcher(['street food', 'food'])
+
+    assert matcher.find('best street food') == ['street food', 'food']
+    assert matcher.find('Food trucks') == ['food']
+    assert matcher.find('travel vlog') == []
+
+
+def test_pattern_inside_a_longer_hit():
+    matcher = KeywordMatcher([r'cook\w*', 'book'], literal=False)
+
+    assert matcher.find('cookbook reviews') == [r'cook\w*', 'book']
+
+
+def test_literal_patterns_are_escaped():
+    matcher = KeywordMatcher(['c++', 'c'], literal=True)
+
+    assert matcher.find('learn C++ today') == ['c++', 'c']
+    assert matcher.find('ccc') == ['c']
+
+
+def test_backreferences_and_inline_flags():
+    matcher = KeywordMatcher([r'(\w)\1', '(?s)a.b', r'(?P<word>go)(?P=word)', 'vlog'], flags=0)
+
+    assert matcher.find('a\nb gogo vlog') == ['(?s)a.b', r'(?P<word>go)(?P=word)', 'vlog']
+    assert matcher.find('letter') == [r'(\w)\1']
+    assert matcher.find('vlog', first=True) == ['vlog']
+
+
+def test_invalid_pattern_is_reported():
+    with pytest.raises(Exception, match='not a valid keyword pattern'):
+        KeywordMatcher(['food', '(unclosed'])
+
+
+def test_match_channel_description_and_keywords():
+    item = {'id': 'UC1', 'brandingSettings': {'channel': {'description': 'Street food tours',
+                                                           'keywords': 'travel "night market"'}}}
+    matcher = KeywordMatcher(['street food', 'food', 'market'])
+
+    assert _grab_channel_keywords_list(item) == ['travel', 'night market']
+    assert matcher.match_channel(item) == ['street food', 'food', 'market']
+    assert matcher.filter_channels([item, item]) == [(item, ['street food', 'food', 'market'])]
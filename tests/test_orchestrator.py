@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+import pytest
+
+from bench_api import channel_id
+from yt_scrapper.orchestrator import crawl_channels
+from yt_scrapper.orchestrator import read_channel_list
+from yt_scrapper.yt_scrapper import YouTube
+from yt_scrapper.common.retry import RetryPolicy
+
+from .conftest import SCALE, FlakyUpstream
+
+
+class YouTubeFactory:
+    """
+    Picklable youtube_factory of the worker processes, the queued errors
+    of a resource are answered to the requests of every process
+    """
+
+    def __init__(self, resource: str = 'playlistItems', *errors):
+        self.resource = resource
+        self.errors = errors
+
+    def __call__(self, keys, workers):
+        upstream = FlakyUpstream()
+        upstream.fail(self.resource, *self.errors)
+        return YouTube(keys, workers=workers, http=upstream, retry=RetryPolicy(base_delay=0))
+
+
+CHANNELS = [channel_id(1), channel_id(2)]
+
+
+def test_rerun_replaces_output(tmp_path):
+    for _ in range(2):
+        crawl_channels(['key1'], CHANNELS, str(tmp_path), 1, 1, 'csv', youtube_factory=YouTubeFactory())
+
+    assert len(pd.read_csv(tmp_path / 'videos.csv')) == SCALE * len(CHANNELS)
+
+
+def test_rerun_removes_parquet_partition(tmp_path):
+    partition = tmp_path / f'channel_id={CHANNELS[0]}'
+    os.makedirs(partition)
+    (partition / 'part-stale.parquet').write_bytes(b'')
+
+    crawl_channels(['key1'], CHANNELS[:1], str(tmp_path), 1, 1, 'parquet', youtube_factory=YouTubeFactory())
+
+    assert not os.path.exists(partition / 'part-stale.parquet')
+
+
+def test_merge_skips_stale_and_failed_parts(tmp_path):
+    os.makedirs(tmp_path / 'channels')
+    pd.DataFrame({'title': ['stale'] * 3}).to_csv(tmp_path / 'channels' / f'{channel_id(9)}.csv', index=False)
+
+    # The single process fails its first channel
+    summary = crawl_channels(['key1'], CHANNELS, str(tmp_path), 1, 1, 'csv',
+                             youtube_factory=YouTubeFactory('playlistItems', (404, 'playlistNotFound')))
+
+    assert list(summary['videos']) == [0, SCALE]
+    assert summary['error'].iloc[0].startswith('HttpError')
+    assert not os.path.exists(tmp_path / 'channels' / f'{CHANNELS[0]}.csv')
+
+    videos = pd.read_csv(tmp_path / 'videos.csv')
+    assert len(videos) == SCALE
+    assert 'stale' not in set(videos['title'])
+
+
+def test_failed_checkpointed_channel_is_kept_but_not_merged(tmp_path):
+    # The first channel fails after its first batch of videos is written
+    factory = YouTubeFactory('videos', None, (404, 'videoNotFound'))
+    summary = crawl_channels(['key1'], CHANNELS, str(tmp_path), 1, 1, 'csv',
+                             checkpoint_path=str(tmp_path / 'jobs.sqlite'), youtube_factory=factory)
+
+    assert list(summary['videos']) == [50, SCALE]
+    assert len(pd.read_csv(tmp_path / 'channels' / f'{CHANNELS[0]}.csv')) == 50
+    assert len(pd.read_csv(tmp_path / 'videos.csv')) == SCALE
+
+
+def test_channel_list_rejects_unknown_lines(tmp_path):
+    path = tmp_path / 'channels.txt'
+    path.write_text(f'# channels\n{CHANNELS[0]}\nhttps://www.youtube.com/channel/{CHANNELS[1]}\n\n')
+    assert read_channel_list(str(path)) == CHANNELS
+
+    path.write_text(f'{CHANNELS[0]}\nstreet food\n')
+    with pytest.raises(Exception, match='line 2'):
+        read_channel_list(str(path))
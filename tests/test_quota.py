@@ -0,0 +1,34 @@
+import pytest
+
+from yt_scrapper.common.quota import QuotaExceeded
+from yt_scrapper.common.quota import QuotaScheduler
+
+
+def test_default_scheduler_has_no_local_cap(create_youtube):
+    scheduler = create_youtube().scheduler
+
+    for _ in range(200):
+        scheduler.charge(100, 'search.list')
+
+    assert scheduler.usage()['keys']['key1'] == {'used': 20000, 'remaining': None, 'requests': 200}
+
+
+def test_exhausted_key_is_skipped_without_budget():
+    scheduler = QuotaScheduler(['key1', 'key2'], budget=None)
+
+    scheduler.exhaust('key1')
+
+    assert scheduler.charge(1, 'videos.list') == 'key2'
+    assert scheduler.usage()['keys']['key1']['remaining'] == 0
+
+    scheduler.exhaust('key2')
+    with pytest.raises(QuotaExceeded):
+        scheduler.charge(1, 'videos.list')
+
+
+def test_budget_is_enforced():
+    scheduler = QuotaScheduler(['key1'], budget=150)
+
+    scheduler.charge(100, 'search.list')
+    with pytest.raises(QuotaExceeded):
+        scheduler.charge(100, 'search.list')
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from yt_scrapper.common.sinks import create_sink
+
+
+RECORDS = [{'title': 'first', 'channel_id': 'UC1'}, {'title': 'second', 'channel_id': 'UC2'}]
+
+READERS = {
+    'csv': pd.read_csv,
+    'ndjson': lambda path: pd.read_json(path, lines=True),
+    'parquet': pd.read_parquet,
+}
+
+
+@pytest.mark.parametrize('output_format, name, options', [
+    ('csv', 'videos.csv', {}),
+    ('ndjson', 'videos.ndjson', {}),
+    ('parquet', 'videos', {}),
+    ('parquet', 'videos', {'partition_by': ('channel_id',)}),
+])
+@pytest.mark.parametrize('append, rows', [(False, 2), (True, 4)])
+def test_rerun_replaces_file_unless_appending(tmp_path, output_format, name, options, append, rows):
+    path = str(tmp_path / name)
+
+    for _ in range(2):
+        with create_sink(path, 'videos', output_format, append=append, **options) as sink:
+            sink.write(RECORDS)
+
+    assert len(READERS[output_format](path)) == rows
+
+
+def test_parquet_file_is_replaced_but_never_appended_to(tmp_path):
+    path = str(tmp_path / 'videos.parquet')
+
+    for _ in range(2):
+        with create_sink(path, 'videos', 'parquet', append=False) as sink:
+            sink.write(RECORDS)
+    assert len(pd.read_parquet(path)) == 2
+
+    with pytest.raises(Exception, match="can't be appended to"):
+        create_sink(path, 'videos', 'parquet', append=True)
+
+
+def test_csv_rows_are_appended_in_the_order_of_the_header(tmp_path):
+    path = str(tmp_path / 'videos.csv')
+    pd.DataFrame({'channel_id': ['UC0'], 'title': ['zero']}).to_csv(path, index=False)
+
+    with create_sink(path, 'videos', 'csv') as sink:
+        sink.write(RECORDS)
+    assert list(pd.read_csv(path)['channel_id']) == ['UC0', 'UC1', 'UC2']
+
+    # A file written before channel_id was added
+    pd.DataFrame({'title': ['zero']}).to_csv(path, index=False)
+    with pytest.raises(Exception, match="can't be appended"):
+        with create_sink(path, 'videos', 'csv') as sink:
+            sink.write(RECORDS)
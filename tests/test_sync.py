@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+import pytest
+
+from googleapiclient.errors import HttpError
+
+from bench_api import channel_id
+from yt_scrapper.common.sync import PlaylistState
+
+from .conftest import SCALE
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Working directory of the test, csv files are created at tmp_path/data
+    """
+    os.makedirs(tmp_path / 'work')
+    monkeypatch.chdir(tmp_path / 'work')
+    return tmp_path
+
+
+def test_sync_appends_new_videos_only(create_youtube, upstream, workdir):
+    state = PlaylistState(str(workdir / 'sync.sqlite'))
+    yt = create_youtube()
+
+    yt.extract_channel_videos(channel_id(1), 'videos', sync_state=state)
+    # Playlist is unchanged, its first page is answered with 304 Not Modified
+    yt.extract_channel_videos(channel_id(1), 'videos', sync_state=state)
+
+    assert len(pd.read_csv(workdir / 'data' / 'videos.csv')) == SCALE
+    assert upstream.count('playlistItems', 304) == 1
+    assert len(state.get('UU' + channel_id(1)[2:])[1]) == SCALE
+
+
+def test_sync_state_is_kept_if_writing_fails(create_youtube, upstream, workdir):
+    state = PlaylistState(str(workdir / 'sync.sqlite'))
+    upstream.fail('videos', (404, 'videoNotFound'))
+
+    with pytest.raises(HttpError):
+        create_youtube().extract_channel_videos(channel_id(1), 'videos', sync_state=state)
+
+    assert state.get('UU' + channel_id(1)[2:]) == ('', [])